@@ -12,7 +12,7 @@ from flask_migrate import Migrate
 from flask_wtf.csrf import CSRFProtect
 from config import get_config
 import redis
-from app.services.email_service import mail
+from app.services.mail import mail
 
 # Initialize extensions
 db = SQLAlchemy()
@@ -27,95 +27,90 @@ talisman = None  # Will be initialized conditionally in create_app
 # Rate limiter will be initialized in create_app with proper storage
 limiter = None
 
-# Redis connection
+# Redis: one connection pool per process, shared by the limiter, SocketIO and redis_client
+redis_pool = None
 redis_client = None
 
 
 def create_app(config_name=None):
     """Application factory pattern"""
+    import json
     import logging
     import sys
+    import time
     logging.basicConfig(stream=sys.stdout, level=logging.INFO)
     logger = logging.getLogger(__name__)
-    
-    logger.info("[1/10] Creating Flask app...")
+
+    # Boot phases are timed and reported as one structured record at the end
+    boot = {'phases': {}}
+    boot_start = phase_start = time.perf_counter()
+
+    def phase_done(name):
+        nonlocal phase_start
+        now = time.perf_counter()
+        boot['phases'][name] = round((now - phase_start) * 1000.0, 1)
+        phase_start = now
+
     app = Flask(__name__)
 
     # Load configuration
-    logger.info("[2/10] Loading configuration...")
     if config_name:
         from config import config_dict
         app.config.from_object(config_dict[config_name])
     else:
         app.config.from_object(get_config())
     
-    # Disable template caching for development
-    app.config['TEMPLATES_AUTO_RELOAD'] = True
-    app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
+    # Template reloading, bytecode cache and static max-age come from the config profile
+    from app.utils.template_cache import configure_templates
+    boot['jinja_bytecode_cache'] = configure_templates(app)
+
+    phase_done('config')
 
     # Initialize extensions with app
-    logger.info("[3/10] Initializing database...")
     db.init_app(app)
-    logger.info("[3/10] Initializing migrations...")
     migrate.init_app(app, db)
-    logger.info("[3/10] Initializing login manager...")
     login_manager.init_app(app)
-    logger.info("[3/10] Initializing bcrypt...")
     bcrypt.init_app(app)
-    logger.info("[3/10] Initializing CSRF...")
-    csrf.init_app(app)  # Initialize CSRF protection
-    logger.info("[3/10] Initializing mail...")
+    csrf.init_app(app)  # Individual routes can be exempted using @csrf.exempt
     mail.init_app(app)
-    logger.info("[3/10] Initializing CORS...")
     CORS(app, origins=app.config['CORS_ORIGINS'])
-    
-    # CSRF Protection - now properly initialized
-    # Note: Individual routes can be exempted using @csrf.exempt decorator
-    
-    # Initialize rate limiter with Redis storage for production
-    logger.info("[4/10] Initializing rate limiter...")
-    global limiter
-    
-    # Only try Redis if explicitly configured (not the default localhost)
+    phase_done('extensions')
+
+    # Redis: one pool, probed once. Only used if explicitly configured (not the default localhost)
+    global limiter, redis_pool, redis_client
     redis_url = app.config.get('REDIS_URL', '')
-    use_redis = redis_url and not redis_url.startswith('redis://localhost')
-    
-    if use_redis:
-        try:
-            # Try to use Redis for rate limiting (required for multi-worker production)
-            from flask_limiter import Limiter
-            from flask_limiter.util import get_remote_address
-            redis_test = redis.from_url(redis_url, socket_connect_timeout=3)
-            redis_test.ping()
-            
-            limiter = Limiter(
-                get_remote_address,
-                app=app,
-                default_limits=["200 per day", "50 per hour"],
-                storage_uri=redis_url
-            )
-            app.logger.info("[OK] Rate limiter using Redis storage (production-ready)")
-        except Exception as e:
-            # Fall back to memory storage
-            from flask_limiter import Limiter
-            from flask_limiter.util import get_remote_address
-            limiter = Limiter(
-                get_remote_address,
-                app=app,
-                default_limits=["200 per day", "50 per hour"]
-            )
-            app.logger.warning(f"[WARN] Rate limiter Redis failed, using memory ({str(e)[:80]})")
+    use_redis = False
+    if redis_url and not redis_url.startswith('redis://localhost'):
+        from app.utils.redis_pool import create_pool, probe
+        if redis_pool is None:
+            redis_pool = create_pool(redis_url, app.config)
+        client = redis.Redis(connection_pool=redis_pool)
+        use_redis, latency_ms, error = probe(client)
+        boot['redis'] = {'ok': use_redis, 'probe_ms': round(latency_ms, 1)}
+        if use_redis:
+            redis_client = client
+        else:
+            redis_client = None
+            redis_pool.disconnect()
+            app.logger.warning(f"[WARN] Redis unavailable, using in-process fallbacks ({error})")
     else:
-        # Use memory storage directly
-        from flask_limiter import Limiter
-        from flask_limiter.util import get_remote_address
-        limiter = Limiter(
-            get_remote_address,
-            app=app,
-            default_limits=["200 per day", "50 per hour"]
-        )
-        app.logger.info("[OK] Rate limiter using memory storage (development mode)")
-    
+        redis_client = None
+        boot['redis'] = None
+    phase_done('redis')
+
+    # Rate limiter: Redis storage on the shared pool (required for multi-worker production), else memory
+    from flask_limiter import Limiter
+    from flask_limiter.util import get_remote_address
+    limiter_options = {'storage_uri': redis_url, 'storage_options': {'connection_pool': redis_pool}} if use_redis else {}
+    limiter = Limiter(
+        get_remote_address,
+        app=app,
+        default_limits=["200 per day", "50 per hour"],
+        **limiter_options
+    )
+    boot['limiter'] = 'redis' if use_redis else 'memory'
+    phase_done('limiter')
+
     # Initialize compression for better performance & SEO
     compress.init_app(app)
     
@@ -139,8 +134,7 @@ def create_app(config_name=None):
                 "https://cdn.socket.io",
                 "https://js.stripe.com",
                 "https://player.vimeo.com",
-                "https://assets.calendly.com",
-                "https://cdn.tailwindcss.com"  # Tailwind CDN
+                "https://assets.calendly.com"
             ],
             'style-src': [
                 "'self'",
@@ -186,53 +180,40 @@ def create_app(config_name=None):
                 'camera': "'none'"
             }
         )
-        app.logger.info("Flask-Talisman enabled: HTTPS enforcement & security headers active")
+    boot['talisman'] = not app.config.get('DEBUG', False)
+    phase_done('security')
 
     # Initialize SocketIO
     # For development, use threading mode (works without Redis)
-    # For production, use eventlet with Redis message queue
-    logger.info("[5/10] Initializing SocketIO...")
+    # For production, use eventlet with the Redis message queue on the shared pool
     socketio_options = {
         'cors_allowed_origins': app.config['CORS_ORIGINS'],
         'logger': app.config.get('SOCKETIO_LOGGER', False),
         'engineio_logger': app.config.get('SOCKETIO_ENGINEIO_LOGGER', False)
     }
-    
-    # Try to use Redis message queue if available (for production)
+
     if use_redis:
-        try:
-            redis_test = redis.from_url(redis_url, socket_connect_timeout=3)
-            redis_test.ping()
-            socketio_options['message_queue'] = redis_url
-            socketio_options['async_mode'] = 'eventlet'
-            app.logger.info("[OK] SocketIO using Redis message queue with eventlet")
-        except Exception as e:
-            # Fall back to threading mode for development
-            socketio_options['async_mode'] = 'threading'
-            app.logger.warning(f"[WARN] SocketIO Redis failed, using threading ({str(e)[:80]})")
+        from app.utils.redis_pool import PooledRedisManager, create_pubsub_pool
+        socketio_options['client_manager'] = PooledRedisManager(
+            redis_url, redis_pool, create_pubsub_pool(redis_url, app.config), channel='flask-socketio'
+        )
+        socketio_options['async_mode'] = 'eventlet'
     else:
-        # Use threading mode directly
+        # Explicit None: init_app keeps options between calls, so clear a previous app's queue
+        socketio_options['client_manager'] = None
         socketio_options['async_mode'] = 'threading'
-        app.logger.info("[OK] SocketIO using threading mode (development)")
-    
+    boot['socketio'] = socketio_options['async_mode']
+
+    # Namespaces are kept on the SocketIO object and registered by init_app
+    from app.routes.chat import ChatNamespace
+    if not any(handler.namespace == '/chat' for handler in socketio.namespace_handlers):
+        socketio.on_namespace(ChatNamespace('/chat'))
+
     socketio.init_app(app, **socketio_options)
+    phase_done('socketio')
 
-    # Initialize Redis client if available
-    global redis_client
-    if use_redis:
-        try:
-            redis_client = redis.from_url(redis_url, socket_connect_timeout=3)
-            redis_client.ping()
-            app.logger.info("[OK] Redis client connected successfully")
-        except Exception as e:
-            redis_client = None
-            app.logger.warning(f"[WARN] Redis client failed ({str(e)[:80]})")
-    else:
-        redis_client = None
-        app.logger.info("[OK] Redis client skipped (not configured)")
 
     # Configure Flask-Login
-    logger.info("[6/10] Configuring Flask-Login...")
     login_manager.login_view = 'auth.login'
     login_manager.login_message = 'Please log in to access this page.'
     login_manager.login_message_category = 'info'
@@ -245,7 +226,6 @@ def create_app(config_name=None):
         return User.query.get(int(user_id))
 
     # Register blueprints
-    logger.info("[7/10] Registering blueprints...")
     from app.routes.main import main_bp
     from app.routes.auth import auth_bp
     from app.routes.admin import admin_bp
@@ -257,9 +237,13 @@ def create_app(config_name=None):
     app.register_blueprint(admin_bp, url_prefix='/admin')
     app.register_blueprint(payment_bp, url_prefix='/payment')
     app.register_blueprint(seo_bp)
+    phase_done('blueprints')
+
+    # CLI commands (`flask init-db`, `flask email-worker`, ...)
+    from app.cli import register_commands
+    register_commands(app)
 
     # Register error handlers
-    logger.info("[8/10] Registering error handlers...")
     @app.errorhandler(404)
     def not_found_error(error):
         from flask import render_template
@@ -276,11 +260,19 @@ def create_app(config_name=None):
         from flask import render_template
         return render_template('errors/403.html'), 403
 
-    # Create database tables
-    logger.info("[9/10] Creating database tables...")
-    with app.app_context():
-        db.create_all()
-    logger.info("[9/10] Database tables created successfully")
+    # Create database tables (dev/test); production is migrated by `flask db upgrade`
+    # at deploy, so only check that the database is at the Alembic head
+    if app.config.get('DB_CREATE_ALL', True):
+        with app.app_context():
+            db.create_all()
+        boot['schema'] = 'create_all'
+    else:
+        from app.utils.schema import schema_status
+        status, detail = schema_status(app, db)
+        boot['schema'] = status
+        if status != 'current':
+            app.logger.error(f"[WARN] Database schema is {status}: {detail} (run `flask db upgrade`)")
+    phase_done('database')
 
     # Context processor for global template variables
     @app.context_processor
@@ -293,6 +285,9 @@ def create_app(config_name=None):
             'SOCIAL_LINKEDIN': app.config.get('SOCIAL_LINKEDIN', 'https://linkedin.com/company/momentumclips'),
             'SOCIAL_TWITTER': app.config.get('SOCIAL_TWITTER', 'https://twitter.com/momentumclips'),
             'SOCIAL_YOUTUBE': app.config.get('SOCIAL_YOUTUBE', 'https://youtube.com/@momentumclipsbansko'),
+            'CHAT_ENABLED': bool(app.config.get('CHAT_ENABLED') and app.config.get('ANTHROPIC_API_KEY')),
+            'TAILWIND_CSS': app.extensions.get('tailwind_css', False),
+            'TAILWIND_CDN': app.extensions.get('tailwind_cdn', False),
         }
     
     # Register custom template filters
@@ -311,7 +306,6 @@ def create_app(config_name=None):
         return f"${value:,.2f}"
 
     # Context processors
-    logger.info("[10/10] Setting up template context processors...")
     @app.context_processor
     def utility_processor():
         """Make utility functions available in templates"""
@@ -320,5 +314,51 @@ def create_app(config_name=None):
             'support_email': app.config['SUPPORT_EMAIL']
         }
 
-    logger.info("✅ Application created successfully!")
+    # Fingerprinted static URLs (manifest loaded once per worker)
+    from app.utils.assets import init_assets
+    boot['assets'] = init_assets(app)
+    boot['tailwind_css'] = app.extensions['tailwind_css']
+
+    phase_done('templates')
+
+    boot['total_ms'] = round((time.perf_counter() - boot_start) * 1000.0, 1)
+    app.extensions['boot'] = boot
+    from app.utils import metrics
+    metrics.observe('app.boot', boot['total_ms'])
+    logger.info('app.boot ' + json.dumps(boot, sort_keys=True))
     return app
+
+
+def start_background_tasks(app):
+    """
+    Start this worker's background tasks (server entry points only)
+
+    Called by wsgi.py and `python app.py`, never by create_app(), so `flask`
+    CLI commands and tests don't run a second email worker, Stripe event
+    processor or scheduler next to the server's. Each *_IN_PROCESS flag turns
+    one task off when it runs as its own `flask <command>` process instead.
+
+    Args:
+        app: Flask application
+    """
+    if app.config.get('TESTING'):
+        return
+
+    # Periodically flush buffered video view/like counters
+    from app.services.counter_service import video_counters
+    video_counters.start_flusher(app, socketio)
+
+    # Deliver queued emails from a background task (or run `flask email-worker` instead)
+    if app.config.get('EMAIL_WORKER_IN_PROCESS'):
+        from app.services.email_worker import start_background_worker
+        start_background_worker(app, socketio)
+
+    # Apply stored Stripe webhook events from a background task (or run `flask stripe-events`)
+    if app.config.get('STRIPE_EVENTS_IN_PROCESS'):
+        from app.services.stripe_events import start_background_processor
+        start_background_processor(app, socketio)
+
+    # Publish queued social posts when they fall due (or run `flask social-scheduler`)
+    if app.config.get('SOCIAL_SCHEDULER_IN_PROCESS'):
+        from app.services.post_scheduler import start_scheduler
+        start_scheduler(app)
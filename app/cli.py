@@ -0,0 +1,568 @@
+"""
+Flask CLI commands
+
+Registered on the app by create_app(), so `flask <command>` finds them
+through the normal app discovery (FLASK_APP=app.py or the app package).
+"""
+import os
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app import db
+
+
+def make_shell_context():
+    """Make database models available in Flask shell"""
+    from app.models.user import User
+    from app.models.booking import Booking
+    from app.models.package import Package
+    from app.models.video import Video
+    from app.models.testimonial import Testimonial
+
+    return {
+        'db': db,
+        'User': User,
+        'Booking': Booking,
+        'Package': Package,
+        'Video': Video,
+        'Testimonial': Testimonial
+    }
+
+
+@click.command()
+@with_appcontext
+def init_db():
+    """Initialize the database"""
+    db.create_all()
+    print('Database initialized successfully!')
+
+
+@click.command()
+@with_appcontext
+def create_admin():
+    """Create an admin user"""
+    from app.models.user import User
+    from getpass import getpass
+
+    print("Create Admin User")
+    print("-" * 50)
+
+    email = input("Email: ")
+    name = input("Name: ")
+    password = getpass("Password: ")
+    confirm_password = getpass("Confirm Password: ")
+
+    if password != confirm_password:
+        print("Passwords don't match!")
+        return
+
+    # Check if user already exists
+    existing_user = User.query.filter_by(email=email).first()
+    if existing_user:
+        print(f"User with email {email} already exists!")
+        return
+
+    # Create admin user
+    admin = User(
+        email=email,
+        name=name,
+        is_admin=True
+    )
+    admin.set_password(password)
+
+    db.session.add(admin)
+    db.session.commit()
+
+    print(f"Admin user '{name}' created successfully!")
+
+
+@click.command()
+@with_appcontext
+def seed_db():
+    """Seed the database with sample data"""
+    from app.models.package import Package
+    from app.models.video import Video
+    from app.models.testimonial import Testimonial
+    from datetime import datetime
+
+    print("Seeding database with sample data...")
+
+    # Create sample packages
+    packages = [
+        Package(
+            name="Beginner Bundle",
+            description="Perfect for first-timers! We'll capture your initial runs and create a memorable highlight reel.",
+            price=199.99,
+            duration=2,
+            features="2-hour session, 1 edited video (3-5 min), 10+ raw clips, Music & effects, Social media formats",
+            is_active=True
+        ),
+        Package(
+            name="Pro Session",
+            description="Full-day coverage with professional editing for serious riders.",
+            price=499.99,
+            duration=6,
+            features="6-hour session, 2 edited videos (5-10 min each), 50+ raw clips, Drone footage, Before/after comparisons, Priority editing",
+            is_active=True
+        ),
+        Package(
+            name="Epic Package",
+            description="Multi-day coverage with cinematic editing. Perfect for week-long trips!",
+            price=1299.99,
+            duration=24,
+            features="3-day coverage, 3 edited videos (10-15 min each), Unlimited raw footage, Drone & GoPro, Custom music selection, Photo package included",
+            is_active=True
+        ),
+    ]
+
+    for package in packages:
+        db.session.add(package)
+
+    # Create sample videos (using YouTube video IDs)
+    # Note: Replace these with your actual YouTube video IDs
+    videos = [
+        Video(
+            title="Epic Backcountry Run - Powder Day",
+            description="Amazing powder day at the backcountry bowl with fresh tracks and perfect conditions",
+            youtube_id="QlMPuDNU5F8",  # Example snowboarding video
+            location_tag="Backcountry",
+            style_tag="Powder",
+            rider_level="Advanced",
+            is_featured=True,
+            view_count=1250,
+            like_count=89
+        ),
+        Video(
+            title="Park Session - Tricks & Rails",
+            description="Shredding the terrain park with style, hitting rails and boxes with perfect execution",
+            youtube_id="FLOkz2xQ6Fo",  # Example snowboarding video
+            location_tag="Terrain Park",
+            style_tag="Freestyle",
+            rider_level="Intermediate",
+            is_featured=True,
+            view_count=890,
+            like_count=62
+        ),
+        Video(
+            title="First Timer's Success Story",
+            description="From nervous beginner to confident rider - watch the incredible progression in just one day",
+            youtube_id="7Q4ioF2OHlE",  # Example snowboarding video
+            location_tag="Beginner Slopes",
+            style_tag="Learning",
+            rider_level="Beginner",
+            is_featured=True,
+            view_count=2100,
+            like_count=145
+        ),
+        Video(
+            title="Bansko Mountain Highlights",
+            description="Epic runs down the slopes of Bansko, Bulgaria's premier snowboard destination",
+            youtube_id="dQw4w9WgXcQ",  # Replace with your video
+            location_tag="Resort",
+            style_tag="All-Mountain",
+            rider_level="Intermediate",
+            is_featured=True,
+            view_count=1580,
+            like_count=98
+        ),
+        Video(
+            title="Night Riding Under the Lights",
+            description="Experience the magic of night snowboarding with perfectly groomed slopes and atmospheric lighting",
+            youtube_id="8q8wq8qQ8q8",  # Replace with your video
+            location_tag="Resort",
+            style_tag="Night Riding",
+            rider_level="Intermediate",
+            is_featured=False,
+            view_count=756,
+            like_count=51
+        ),
+        Video(
+            title="Pro Tricks Tutorial - 360 Spins",
+            description="Learn how to nail perfect 360 spins with our expert instructor breaking down the technique",
+            youtube_id="abc123def456",  # Replace with your video
+            location_tag="Terrain Park",
+            style_tag="Freestyle",
+            rider_level="Advanced",
+            is_featured=False,
+            view_count=3200,
+            like_count=287
+        ),
+    ]
+
+    for video in videos:
+        db.session.add(video)
+
+    # Create sample testimonials
+    testimonials = [
+        Testimonial(
+            client_name="Sarah Johnson",
+            client_photo_url="/static/images/client-1.jpg",
+            rating=5,
+            testimonial_text="Absolutely incredible experience! The team captured every moment perfectly, and the edited video brought tears to my eyes. Worth every penny!",
+            project_type="Pro Session",
+            is_featured=True
+        ),
+        Testimonial(
+            client_name="Mike Chen",
+            client_photo_url="/static/images/client-2.jpg",
+            rating=5,
+            testimonial_text="As a beginner, I was nervous about being filmed, but they made me feel so comfortable. The final video shows my progression beautifully!",
+            project_type="Beginner Bundle",
+            is_featured=True
+        ),
+        Testimonial(
+            client_name="Alex Thompson",
+            client_photo_url="/static/images/client-3.jpg",
+            rating=5,
+            testimonial_text="I've worked with several video companies, and this is by far the best. Professional, creative, and they truly understand snowboarding culture.",
+            project_type="Epic Package",
+            is_featured=True
+        ),
+    ]
+
+    for testimonial in testimonials:
+        db.session.add(testimonial)
+
+    db.session.commit()
+    print("Database seeded successfully!")
+    print(f"- Added {len(packages)} packages")
+    print(f"- Added {len(videos)} videos")
+    print(f"- Added {len(testimonials)} testimonials")
+
+
+@click.command()
+@click.option('--once', is_flag=True, help='Deliver one batch and exit.')
+@with_appcontext
+def email_worker(once):
+    """Deliver queued emails from the outbox"""
+    from app.services.email_worker import EmailOutboxWorker
+    from app.models.email_outbox import EmailOutbox
+
+    worker = EmailOutboxWorker()
+    if once:
+        sent = worker.drain_once()
+        print(f'Sent {sent} email(s); {EmailOutbox.pending_count()} still queued')
+        return
+
+    print('Email outbox worker running (Ctrl+C to stop)...')
+    worker.run()
+
+
+@click.command()
+@click.option('--once', is_flag=True, help='Apply one batch and exit.')
+@with_appcontext
+def stripe_events(once):
+    """Apply stored Stripe webhook events"""
+    from app.services.stripe_events import StripeEventProcessor
+    from app.models.stripe_event import StripeEvent
+
+    processor = StripeEventProcessor()
+    if once:
+        applied = processor.drain_once()
+        print(f'Applied {applied} event(s); {StripeEvent.pending_count()} still queued')
+        return
+
+    print('Stripe event processor running (Ctrl+C to stop)...')
+    processor.run()
+
+
+@click.command()
+@click.option('--subject', help='Subject for a new campaign.')
+@click.option('--template', default='newsletter_welcome', show_default=True,
+              help='Template under emails/ (without .html).')
+@click.option('--resume', 'resume_id', type=int, help='Resume an interrupted campaign by ID.')
+@with_appcontext
+def newsletter_send(subject, template, resume_id):
+    """Send a newsletter campaign to all active subscribers"""
+    from app.services.newsletter_service import NewsletterCampaignSender
+    from app.models.newsletter_campaign import NewsletterCampaign
+
+    sender = NewsletterCampaignSender()
+    if resume_id:
+        campaign = NewsletterCampaign.query.get(resume_id)
+        if not campaign:
+            raise click.ClickException(f'Campaign {resume_id} not found')
+        print(f'Resuming campaign {campaign.id} after subscriber {campaign.last_subscriber_id}...')
+    else:
+        if not subject:
+            raise click.UsageError('--subject is required for a new campaign')
+        campaign = sender.create_campaign(subject, template)
+        print(f'Created campaign {campaign.id}')
+
+    try:
+        sender.run(campaign)
+    except KeyboardInterrupt:
+        print(f'Interrupted; resume with: flask newsletter-send --resume {campaign.id}')
+        return
+
+    print(f'Campaign {campaign.id} {campaign.status}: {campaign.sent_count} sent, {campaign.failed_count} failed')
+
+
+@click.command()
+@click.option('--dry-run', is_flag=True, help='Only report drift, do not rewrite the rollup.')
+@with_appcontext
+def rebuild_stats(dry_run):
+    """Recompute the admin dashboard rollup and report drift"""
+    from app.models.dashboard_stat import DashboardStat
+
+    drift = DashboardStat.rebuild(dry_run=dry_run)
+    if not drift:
+        print('Dashboard stats are in sync.')
+        return
+
+    print(f'{len(drift)} value(s) drifted:')
+    for key in sorted(drift):
+        stored, actual = drift[key]
+        print(f'  {key}: stored={stored} actual={actual} ({actual - stored:+d})')
+    print('Nothing written (dry run).' if dry_run else 'Dashboard stats rebuilt.')
+
+
+@click.command()
+@click.option('--full', is_flag=True, help='Ignore the high-water mark and scan every session.')
+@click.option('--dry-run', is_flag=True, help='Report what would change without writing.')
+@click.option('--batch-size', type=click.IntRange(1, 100), help='Sessions per Stripe page / commit.')
+@with_appcontext
+def stripe_reconcile(full, dry_run, batch_size):
+    """Backfill public bookings from paid Stripe Checkout Sessions"""
+    from app.services.stripe_reconcile import StripeReconciler
+
+    try:
+        result = StripeReconciler(page_size=batch_size).run(full=full, dry_run=dry_run)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    print(f"Scanned {result['scanned']} session(s) in {result['pages']} page(s): "
+          f"{result['inserted']} inserted, {result['updated']} updated"
+          + (' (dry run, nothing written)' if dry_run else ''))
+
+
+@click.command()
+@click.option('--target', type=click.Choice(['package', 'app']), default='app', show_default=True,
+              help='Profile `import app` alone, or also create_app().')
+@click.option('--config', 'config_name', default='testing', show_default=True,
+              help='Config for create_app (testing starts no background workers).')
+@click.option('--top', type=click.IntRange(1, 500), default=25, show_default=True, help='Rows per table.')
+@click.option('--fail-over', type=float, help='Exit non-zero if total import time exceeds this many ms.')
+@with_appcontext
+def import_profile(target, config_name, top, fail_over):
+    """Report per-module import time of a fresh worker (python -X importtime)"""
+    from app.utils.import_profile import TARGETS, by_package, profile_imports, total_us
+    app = current_app._get_current_object()
+
+    try:
+        entries = profile_imports(TARGETS[target].format(config=config_name), cwd=os.path.dirname(app.root_path))
+    except RuntimeError as e:
+        raise click.ClickException(f'Profiled interpreter failed:\n{e}')
+
+    total_ms = total_us(entries) / 1000.0
+    print(f'{len(entries)} modules imported in {total_ms:.1f} ms ({target})')
+
+    print(f'\nTop {top} packages by self time:')
+    for package, self_us in by_package(entries)[:top]:
+        print(f'  {self_us / 1000.0:9.1f} ms  {package}')
+
+    print(f'\nTop {top} modules by cumulative time:')
+    slowest = sorted(entries, key=lambda entry: entry['cumulative_us'], reverse=True)[:top]
+    for entry in slowest:
+        print(f"  {entry['cumulative_us'] / 1000.0:9.1f} ms  {entry['module']}")
+
+    if fail_over is not None and total_ms > fail_over:
+        raise click.ClickException(f'Import time {total_ms:.1f} ms is over the {fail_over:.1f} ms budget')
+
+
+@click.command()
+@with_appcontext
+def templates_compile():
+    """Precompile every template into the Jinja bytecode cache (run at deploy)"""
+    from app.utils.template_cache import compile_templates
+    app = current_app._get_current_object()
+
+    if app.jinja_env.bytecode_cache is None:
+        raise click.ClickException('JINJA_BYTECODE_CACHE is off for this config; nothing to write')
+
+    compiled, errors = compile_templates(app)
+    for name, error in sorted(errors.items()):
+        print(f'  [FAIL] {name}: {error}')
+    print(f'{compiled} template(s) compiled into {app.jinja_env.bytecode_cache.directory}')
+    if errors:
+        raise click.ClickException(f'{len(errors)} template(s) failed to compile')
+
+
+@click.command()
+@click.option('--iterations', default=200, type=click.IntRange(1), help='Warm renders per template and profile.')
+@with_appcontext
+def templates_benchmark(iterations):
+    """Compare template render times under the development and production profiles"""
+    from app.utils.template_cache import benchmark_templates
+    app = current_app._get_current_object()
+
+    try:
+        results = benchmark_templates(app, iterations=iterations)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+
+    print(f"{'template':<22} {'profile':<12} {'cold ms':>9} {'warm ms':>9}")
+    for name, profiles in results.items():
+        for profile, timing in profiles.items():
+            print(f"{name:<22} {profile:<12} {timing['cold_ms']:9.2f} {timing['warm_ms']:9.3f}")
+
+
+@click.command()
+@click.option('--no-minify', is_flag=True, help='Fingerprint and compress without minifying CSS/JS.')
+@click.option('--prune', is_flag=True, help='Delete built files the new manifest no longer references.')
+@with_appcontext
+def assets_build(no_minify, prune):
+    """Bundle, minify, fingerprint and precompress static assets into static/build/"""
+    from app.utils.assets import BUNDLES, build_assets, prune_build
+    app = current_app._get_current_object()
+
+    try:
+        manifest = build_assets(app.static_folder, minify=not no_minify)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    print(f"{'asset':<28} {'source':>9} {'built':>9} {'gzip':>9} {'br':>9}")
+    text_assets = sorted(path for path in manifest['sizes'] if path.endswith(('.css', '.js')) and path not in BUNDLES)
+    for path in sorted(BUNDLES) + text_assets:
+        sizes = manifest['sizes'][path]
+        columns = [f'{sizes[key]:,}' if key in sizes else '-' for key in ('source', 'built', 'gzip', 'br')]
+        print(f'{path:<28} ' + ' '.join(f'{column:>9}' for column in columns))
+    print(f"{len(manifest['assets'])} asset(s) written to {app.static_folder}/build (manifest.json)")
+
+    if prune:
+        print(f'{prune_build(app.static_folder, manifest)} stale file(s) removed')
+    if not app.config.get('ASSETS_USE_MANIFEST'):
+        print('ASSETS_USE_MANIFEST is off for this config; pages keep the unversioned URLs')
+
+
+@click.command()
+@click.option('--path', 'paths', multiple=True, help='Page to weigh (repeatable; default: / and /gallery).')
+@click.option('--offline', is_flag=True, help='Do not fetch external scripts and stylesheets.')
+@with_appcontext
+def page_weight(paths, offline):
+    """Compare page weight with the Tailwind CDN runtime and the compiled site.css"""
+    from app.utils.assets import TAILWIND_STYLESHEET, detect_stylesheet
+    from app.utils.page_weight import MODES, compare_modes
+    app = current_app._get_current_object()
+
+    if not detect_stylesheet(app):
+        raise click.ClickException(f'{TAILWIND_STYLESHEET} is missing; run `npm run build:css` first')
+
+    try:
+        results = compare_modes(app, paths or ['/', '/gallery'], fetch=not offline)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+
+    for path, modes in results.items():
+        print(f'\n{path}')
+        for mode in MODES:
+            report = modes[mode]
+            print(f"  {mode + ':':<14} {'bytes':>9} {'transfer':>9}")
+            for asset in report['assets']:
+                size = f"{asset['raw']:>9,} {asset['transfer']:>9,}" if asset['transfer'] is not None else f"{'?':>9} {'?':>9}"
+                print(f"    {asset['kind']:<10} {size}  {asset['url']}")
+            print(f"    {'total':<10} {report['raw']:>9,} {report['transfer']:>9,}  "
+                  f"{report['requests']} request(s), {report['unsized']} unsized")
+        before, after = modes['cdn'], modes['compiled']
+        print(f"  compiled vs cdn: {after['transfer'] - before['transfer']:+,} bytes transferred, "
+              f"{after['requests'] - before['requests']:+d} request(s)")
+
+
+@click.command()
+@click.option('--full', is_flag=True, help='Ignore the high-water mark and fetch all history.')
+@click.option('--no-metrics', is_flag=True, help='Only sync posts, skip analytics snapshots.')
+@click.option('--page-size', type=click.IntRange(1, 500), help='Posts per commit / analytics fan-out.')
+@with_appcontext
+def social_sync(full, no_metrics, page_size):
+    """Sync Ayrshare post history and engagement into local tables"""
+    from app.services.social_sync import SocialSync
+
+    try:
+        result = SocialSync(page_size=page_size).run(full=full, with_metrics=not no_metrics)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    print(f"Fetched {result['fetched']} post(s) in {result['pages']} page(s): "
+          f"{result['inserted']} new, {result['snapshots']} metric snapshot(s)")
+
+
+@click.command()
+@click.option('--once', is_flag=True, help='Publish the posts that are due now and exit.')
+@with_appcontext
+def social_scheduler(once):
+    """Publish queued social posts as they fall due"""
+    from app.services.post_scheduler import PostDispatcher, start_scheduler
+    app = current_app._get_current_object()
+
+    if once:
+        try:
+            posted, failed = PostDispatcher().run()
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        print(f'{posted} post(s) published, {failed} failed')
+        return
+
+    if start_scheduler(app) is None:
+        raise click.ClickException('AYRSHARE_API_KEY is not set')
+    print('Social post scheduler running (Ctrl+C to stop)...')
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        pass
+
+
+@click.command()
+@click.option('--mode', type=click.Choice(['batch', 'pool']), help='Message Batches API or concurrent calls (default: CAPTION_MODE).')
+@click.option('--platform', 'platforms', multiple=True, help='Platform to caption (repeatable; default: CAPTION_PLATFORMS).')
+@click.option('--regenerate', is_flag=True, help='Also redo captions that are already done.')
+@click.option('--wait', is_flag=True, help='Poll until submitted batches have ended.')
+@with_appcontext
+def captions_generate(mode, platforms, regenerate, wait):
+    """Generate social captions for every video (resumes earlier runs)"""
+    from app.services.caption_batch import CaptionPipeline
+
+    try:
+        pipeline = CaptionPipeline(mode=mode, platforms=platforms or None)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    counts = pipeline.run(regenerate=regenerate, wait=wait)
+    print(', '.join(f'{count} {status}' for status, count in counts.items()))
+    if counts['submitted']:
+        print('Batches still processing; rerun to collect their results.')
+
+
+COMMANDS = (
+    init_db,
+    create_admin,
+    seed_db,
+    email_worker,
+    stripe_events,
+    newsletter_send,
+    rebuild_stats,
+    stripe_reconcile,
+    import_profile,
+    templates_compile,
+    templates_benchmark,
+    assets_build,
+    page_weight,
+    social_sync,
+    social_scheduler,
+    captions_generate,
+)
+
+
+def register_commands(app):
+    """
+    Add the CLI commands and shell context to the app
+
+    Args:
+        app: Flask application
+    """
+    for command in COMMANDS:
+        app.cli.add_command(command)
+    app.shell_context_processor(make_shell_context)
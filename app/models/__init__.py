@@ -7,5 +7,14 @@ from .newsletter import Newsletter
 from .waiver import Waiver
 from .public_booking import PublicBooking
 from .public_booking_waiver import PublicBookingWaiver
+from .email_outbox import EmailOutbox
+from .newsletter_campaign import NewsletterCampaign
+from .dashboard_stat import DashboardStat
+from .stripe_event import StripeEvent
+from .sync_state import SyncState
+from .video_caption import VideoCaption
+from .social_post import SocialPost, SocialPostMetrics
+from .scheduled_post import ScheduledPost
+from .video_counter_claim import VideoCounterClaim
 
-__all__ = ['User', 'Package', 'Booking', 'Video', 'Testimonial', 'Newsletter', 'Waiver', 'PublicBooking', 'PublicBookingWaiver']
+__all__ = ['User', 'Package', 'Booking', 'Video', 'Testimonial', 'Newsletter', 'Waiver', 'PublicBooking', 'PublicBookingWaiver', 'EmailOutbox', 'NewsletterCampaign', 'DashboardStat', 'StripeEvent', 'SyncState', 'VideoCaption', 'SocialPost', 'SocialPostMetrics', 'ScheduledPost', 'VideoCounterClaim']
@@ -1,6 +1,9 @@
 from app import db
+from flask import current_app
 from datetime import datetime
 from enum import Enum
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+from sqlalchemy.orm import Session as SessionBase
 
 
 class BookingStatus(Enum):
@@ -17,6 +20,10 @@ class Booking(db.Model):
     """Booking model for session reservations"""
 
     __tablename__ = 'bookings'
+    __table_args__ = (
+        # Covers availability lookups: package + status filter, ranged on date
+        db.Index('ix_bookings_package_status_date', 'package_id', 'status', 'booking_date'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -59,6 +66,9 @@ class Booking(db.Model):
     # Waiver status
     waiver_signed = db.Column(db.Boolean, nullable=False, default=False)
 
+    # Pre-signed-token waiver links (sha256 digest, backfilled by migration)
+    legacy_waiver_token = db.Column(db.String(32), nullable=True, unique=True, index=True)
+
     # Timestamps
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -112,13 +122,64 @@ class Booking(db.Model):
             return False
         return self.booking_date > datetime.utcnow() + timedelta(hours=24)
 
-    def confirm_payment(self, payment_intent_id, charge_id=None):
+    def generate_waiver_token(self):
+        """
+        Generate a signed waiver link token
+
+        The booking id is embedded in the token, so resolving it is a signature
+        check plus a primary-key lookup.
+
+        Returns:
+            Secure token string
+        """
+        serializer = URLSafeTimedSerializer(current_app.config['SECRET_KEY'])
+        return serializer.dumps({'booking_id': self.id}, salt='waiver-token-salt')
+
+    @staticmethod
+    def verify_waiver_token(token, expires_in=None):
+        """
+        Verify a waiver link token and return the booking id
+
+        Args:
+            token: Signed token, or a legacy 32-character hex token
+            expires_in: Maximum token age in seconds (default: WAIVER_TOKEN_MAX_AGE)
+
+        Returns:
+            Booking id if the token is valid, None otherwise
+        """
+        if not token:
+            return None
+
+        # Legacy tokens were bare sha256 digests - resolve them through the index
+        if len(token) == 32 and all(c in '0123456789abcdef' for c in token):
+            booking_id = db.session.query(Booking.id)\
+                .filter(Booking.legacy_waiver_token == token)\
+                .scalar()
+            return booking_id
+
+        if expires_in is None:
+            expires_in = current_app.config.get('WAIVER_TOKEN_MAX_AGE')
+
+        serializer = URLSafeTimedSerializer(current_app.config['SECRET_KEY'])
+        try:
+            data = serializer.loads(token, salt='waiver-token-salt', max_age=expires_in)
+        except (BadSignature, SignatureExpired):
+            return None
+
+        booking_id = data.get('booking_id') if isinstance(data, dict) else None
+        if not isinstance(booking_id, int):
+            return None
+
+        return booking_id
+
+    def confirm_payment(self, payment_intent_id, charge_id=None, commit=True):
         """Mark booking as confirmed after payment"""
         self.status = BookingStatus.CONFIRMED.value
         self.stripe_payment_intent_id = payment_intent_id
         self.stripe_charge_id = charge_id
         self.paid_at = datetime.utcnow()
-        db.session.commit()
+        if commit:
+            db.session.commit()
 
     def mark_in_progress(self):
         """Mark booking as in progress"""
@@ -157,6 +218,17 @@ class Booking(db.Model):
 
         return query.all()
 
+    @staticmethod
+    def get_booked_datetimes(package_id, start_date, end_date):
+        """Get start times of active bookings for a package (column projection, no ORM rows)"""
+        rows = db.session.query(Booking.booking_date).filter(
+            Booking.package_id == package_id,
+            Booking.status.in_([BookingStatus.CONFIRMED.value, BookingStatus.PENDING.value]),
+            Booking.booking_date >= start_date,
+            Booking.booking_date <= end_date
+        ).order_by(Booking.booking_date).all()
+        return [row[0] for row in rows]
+
     @staticmethod
     def get_bookings_by_date_range(start_date, end_date):
         """Get bookings within a date range"""
@@ -176,3 +248,59 @@ class Booking(db.Model):
         ).first()
 
         return existing is None
+
+
+PENDING_INVALIDATIONS = 'availability_invalidations'
+
+
+def _invalidate_availability(mapper, connection, target):
+    """Queue the month(s) a booking touches for invalidation when the session commits"""
+    from sqlalchemy import inspect
+
+    state = inspect(target)
+    package_ids = {target.package_id}
+    dates = {target.booking_date}
+    for attr, values in (('package_id', package_ids), ('booking_date', dates)):
+        history = state.attrs[attr].history
+        values.update(v for v in history.deleted or () if v is not None)
+
+    pending = state.session.info.setdefault(PENDING_INVALIDATIONS, set())
+    for package_id in package_ids:
+        for when in dates:
+            if package_id is not None and when is not None:
+                pending.add((package_id, when.year, when.month))
+
+
+def _invalidate_on_update(mapper, connection, target):
+    """Only status, date or package changes affect availability"""
+    from sqlalchemy import inspect
+    state = inspect(target)
+    if any(state.attrs[attr].history.has_changes() for attr in ('status', 'booking_date', 'package_id')):
+        _invalidate_availability(mapper, connection, target)
+
+
+def _invalidate_after_commit(session):
+    """
+    Drop cached months once the booking changes are committed
+
+    Clearing at flush time would let a concurrent read rebuild the month
+    from pre-commit data (or from a transaction that then rolls back) and
+    cache it for the full TTL.
+    """
+    from app.services.availability_service import AvailabilityService
+
+    for package_id, year, month in session.info.pop(PENDING_INVALIDATIONS, ()):
+        AvailabilityService.invalidate(package_id, datetime(year, month, 1))
+
+
+def _discard_after_rollback(session, previous_transaction):
+    """A rolled-back transaction changed nothing (savepoint rollbacks keep the outer queue)"""
+    if previous_transaction.parent is None:
+        session.info.pop(PENDING_INVALIDATIONS, None)
+
+
+db.event.listen(Booking, 'after_insert', _invalidate_availability)
+db.event.listen(Booking, 'after_update', _invalidate_on_update)
+db.event.listen(Booking, 'after_delete', _invalidate_availability)
+db.event.listen(SessionBase, 'after_commit', _invalidate_after_commit)
+db.event.listen(SessionBase, 'after_soft_rollback', _discard_after_rollback)
@@ -0,0 +1,246 @@
+from app import db
+from datetime import datetime
+from sqlalchemy import func, inspect
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from .user import User
+from .video import Video
+from .testimonial import Testimonial
+from .public_booking import PublicBooking
+
+
+# PublicBooking statuses that count towards revenue
+REVENUE_STATUSES = ('paid', 'waiver_signed', 'scheduled', 'completed')
+
+# Rollup keys
+TOTAL_KEY = 'total:{}'  # row count of a table
+STATUS_KEY = 'bookings:{}'  # public bookings in a status
+REVENUE_KEY = 'revenue_cents:{}'  # public booking amount_cents in a status
+
+TOTAL_MODELS = (User, Video, Testimonial, PublicBooking)
+
+
+class DashboardStat(db.Model):
+    """
+    Rollup counter for the admin dashboard
+
+    Rows are adjusted by mapper events inside the same transaction as the
+    insert/update/delete that changes them, so the dashboard reads a handful
+    of rows instead of scanning history. `flask rebuild-stats` recomputes
+    them from the source tables (needed after bulk UPDATEs, which bypass
+    mapper events).
+
+    """
+
+    __tablename__ = 'dashboard_stats'
+
+    key = db.Column(db.String(80), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<DashboardStat {self.key}={self.value}>'
+
+    @staticmethod
+    def apply(connection, deltas):
+        """
+        Add deltas to rollup rows on the flushing connection
+
+        Args:
+            connection: Connection of the current flush (same transaction)
+            deltas: Dict mapping key -> delta
+        """
+        now = datetime.utcnow()
+        for key, delta in deltas.items():
+            if not delta:
+                continue
+            stmt = _upsert(connection.dialect.name, key, delta, now)
+            if stmt is not None:
+                connection.execute(stmt)
+            else:
+                _update_or_insert(connection, key, delta, now)
+
+    @staticmethod
+    def snapshot():
+        """
+        Read all rollup rows
+
+        Returns:
+            Dict with total_users, total_bookings, total_videos,
+            total_testimonials, revenue_cents, booking_stats ({status: count})
+            and revenue_by_status ({status: cents})
+        """
+        values = dict(db.session.query(DashboardStat.key, DashboardStat.value).all())
+
+        booking_stats = {}
+        revenue_by_status = {}
+        for key, value in values.items():
+            kind, _, name = key.partition(':')
+            if kind == 'bookings' and value:
+                booking_stats[name] = value
+            elif kind == 'revenue_cents' and value:
+                revenue_by_status[name] = value
+
+        return {
+            'total_users': values.get(TOTAL_KEY.format(User.__tablename__), 0),
+            'total_bookings': values.get(TOTAL_KEY.format(PublicBooking.__tablename__), 0),
+            'total_videos': values.get(TOTAL_KEY.format(Video.__tablename__), 0),
+            'total_testimonials': values.get(TOTAL_KEY.format(Testimonial.__tablename__), 0),
+            'revenue_cents': sum(revenue_by_status.get(status, 0) for status in REVENUE_STATUSES),
+            'booking_stats': booking_stats,
+            'revenue_by_status': revenue_by_status
+        }
+
+    @staticmethod
+    def compute():
+        """Recompute every rollup value from the source tables"""
+        values = {}
+        for model in TOTAL_MODELS:
+            values[TOTAL_KEY.format(model.__tablename__)] = db.session.query(func.count(model.id)).scalar() or 0
+
+        rows = db.session.query(
+            PublicBooking.status,
+            func.count(PublicBooking.id),
+            func.coalesce(func.sum(PublicBooking.amount_cents), 0)
+        ).group_by(PublicBooking.status).all()
+        for status, count, revenue in rows:
+            values[STATUS_KEY.format(status)] = count
+            values[REVENUE_KEY.format(status)] = int(revenue)
+
+        return values
+
+    @staticmethod
+    def rebuild(dry_run=False):
+        """
+        Recompute the rollup and replace the stored rows
+
+        Args:
+            dry_run: Only report drift, don't write
+
+        Returns:
+            Dict mapping key -> (stored, actual) for every value that drifted
+        """
+        actual = DashboardStat.compute()
+        stored = dict(db.session.query(DashboardStat.key, DashboardStat.value).all())
+
+        drift = {}
+        for key in set(actual) | set(stored):
+            if stored.get(key, 0) != actual.get(key, 0):
+                drift[key] = (stored.get(key, 0), actual.get(key, 0))
+
+        if not dry_run:
+            DashboardStat.query.delete()
+            now = datetime.utcnow()
+            for key, value in actual.items():
+                db.session.add(DashboardStat(key=key, value=value, updated_at=now))
+            db.session.commit()
+
+        return drift
+
+
+def _upsert(dialect, key, delta, now):
+    """
+    Single-statement add-or-create for one rollup row
+
+    A new key is created and incremented atomically, so two transactions
+    hitting it first can't both INSERT (the loser's IntegrityError would
+    abort the booking/user flush that triggered it).
+
+    Returns:
+        The statement, or None for a dialect without one (see _update_or_insert)
+    """
+    table = DashboardStat.__table__
+    if dialect == 'mysql':
+        stmt = mysql.insert(table).values(key=key, value=delta, updated_at=now)
+        return stmt.on_duplicate_key_update(value=table.c.value + delta, updated_at=now)
+
+    insert = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}.get(dialect)
+    if insert is None:
+        return None
+    stmt = insert(table).values(key=key, value=delta, updated_at=now)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.key], set_={'value': table.c.value + delta, 'updated_at': now}
+    )
+
+
+def _update_or_insert(connection, key, delta, now):
+    """
+    Portable add-or-create for dialects without an upsert
+
+    UPDATE first; if no row exists, INSERT inside a savepoint so losing the
+    race to a concurrent INSERT only rolls back the savepoint, then UPDATE
+    the row that transaction created.
+    """
+    from sqlalchemy.exc import IntegrityError
+
+    table = DashboardStat.__table__
+    update = table.update().where(table.c.key == key).values(value=table.c.value + delta, updated_at=now)
+    if connection.execute(update).rowcount:
+        return
+    try:
+        with connection.begin_nested():
+            connection.execute(table.insert().values(key=key, value=delta, updated_at=now))
+    except IntegrityError:
+        connection.execute(update)
+
+
+def _booking_deltas(status, amount_cents, sign):
+    return {
+        STATUS_KEY.format(status): sign,
+        REVENUE_KEY.format(status): sign * (amount_cents or 0)
+    }
+
+
+def _merge(into, deltas):
+    for key, delta in deltas.items():
+        into[key] = into.get(key, 0) + delta
+    return into
+
+
+def _booking_inserted(mapper, connection, target):
+    deltas = {TOTAL_KEY.format(PublicBooking.__tablename__): 1}
+    _merge(deltas, _booking_deltas(target.status, target.amount_cents, 1))
+    DashboardStat.apply(connection, deltas)
+
+
+def _booking_updated(mapper, connection, target):
+    """Move the booking between status/revenue buckets when they change"""
+    state = inspect(target)
+    status_history = state.attrs.status.history
+    amount_history = state.attrs.amount_cents.history
+    if not (status_history.has_changes() or amount_history.has_changes()):
+        return
+
+    old_status = status_history.deleted[0] if status_history.deleted else target.status
+    old_amount = amount_history.deleted[0] if amount_history.deleted else target.amount_cents
+
+    deltas = _booking_deltas(old_status, old_amount, -1)
+    _merge(deltas, _booking_deltas(target.status, target.amount_cents, 1))
+    DashboardStat.apply(connection, deltas)
+
+
+def _booking_deleted(mapper, connection, target):
+    state = inspect(target)
+    status_history = state.attrs.status.history
+    amount_history = state.attrs.amount_cents.history
+    status = status_history.deleted[0] if status_history.deleted else target.status
+    amount = amount_history.deleted[0] if amount_history.deleted else target.amount_cents
+
+    deltas = {TOTAL_KEY.format(PublicBooking.__tablename__): -1}
+    _merge(deltas, _booking_deltas(status, amount, -1))
+    DashboardStat.apply(connection, deltas)
+
+
+def _count_listener(sign):
+    def listener(mapper, connection, target):
+        DashboardStat.apply(connection, {TOTAL_KEY.format(mapper.local_table.name): sign})
+    return listener
+
+
+db.event.listen(PublicBooking, 'after_insert', _booking_inserted)
+db.event.listen(PublicBooking, 'after_update', _booking_updated)
+db.event.listen(PublicBooking, 'after_delete', _booking_deleted)
+
+for _model in (User, Video, Testimonial):
+    db.event.listen(_model, 'after_insert', _count_listener(1))
+    db.event.listen(_model, 'after_delete', _count_listener(-1))
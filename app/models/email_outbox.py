@@ -0,0 +1,61 @@
+from app import db
+from datetime import datetime
+import json
+
+
+class EmailOutbox(db.Model):
+    """
+    Rendered email waiting for delivery
+
+    Rows are written in the same transaction as the change that triggers the
+    email and delivered by the outbox worker (`flask email-worker` or the
+    in-process background task).
+
+    """
+
+    __tablename__ = 'email_outbox'
+
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_DEAD = 'dead'  # Gave up after EMAIL_OUTBOX_MAX_ATTEMPTS
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    # Fully rendered message
+    recipients = db.Column(db.Text, nullable=False)  # JSON array of addresses
+    sender = db.Column(db.String(200), nullable=True)
+    subject = db.Column(db.String(300), nullable=False)
+    html = db.Column(db.Text, nullable=True)
+    body = db.Column(db.Text, nullable=True)
+    template = db.Column(db.String(100), nullable=True)  # For diagnostics only
+
+    # Delivery state
+    status = db.Column(db.String(20), nullable=False, default=STATUS_PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # The worker polls: status = pending AND next_attempt_at <= now, oldest first
+        db.Index('ix_email_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    def __repr__(self):
+        return f'<EmailOutbox {self.id} {self.status} attempts={self.attempts}>'
+
+    @property
+    def recipient_list(self):
+        """Recipients as a Python list"""
+        return json.loads(self.recipients) if self.recipients else []
+
+    @staticmethod
+    def pending_count():
+        """Number of messages still waiting to be delivered"""
+        return EmailOutbox.query.filter(
+            EmailOutbox.status.in_([EmailOutbox.STATUS_PENDING, EmailOutbox.STATUS_SENDING])
+        ).count()
@@ -24,3 +24,38 @@ class Newsletter(db.Model):
             'is_active': self.is_active
         }
 
+    @staticmethod
+    def iter_active_pages(after_id=0, page_size=500):
+        """
+        Stream active subscribers as pages of (id, email), in id order
+
+        Uses keyset pagination (id > last seen id) so every page is an index
+        range scan regardless of how deep the cursor is, and yield_per so rows
+        are fetched from the driver in chunks. Only one page is held in memory,
+        and each page's query is fully consumed before it is handed out, so the
+        caller can commit between pages.
+
+        Args:
+            after_id: Only subscribers with a greater id (resume checkpoint)
+            page_size: Subscribers per page
+
+        Yields:
+            Lists of (id, email) tuples
+        """
+        last_id = after_id
+        while True:
+            query = db.session.query(Newsletter.id, Newsletter.email)\
+                .filter(Newsletter.is_active == True, Newsletter.id > last_id)\
+                .order_by(Newsletter.id)\
+                .limit(page_size)\
+                .execution_options(yield_per=min(page_size, 200))
+
+            page = [(row.id, row.email) for row in query]
+            if not page:
+                return
+
+            yield page
+
+            last_id = page[-1][0]
+            if len(page) < page_size:
+                return
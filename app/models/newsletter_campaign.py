@@ -0,0 +1,53 @@
+from app import db
+from datetime import datetime
+
+
+class NewsletterCampaign(db.Model):
+    """
+    A newsletter mailing to all active subscribers
+
+    `last_subscriber_id` is the checkpoint: every subscriber with a lower or
+    equal id has been handled, so an interrupted campaign resumes after it.
+
+    """
+
+    __tablename__ = 'newsletter_campaigns'
+
+    STATUS_DRAFT = 'draft'
+    STATUS_RUNNING = 'running'
+    STATUS_INTERRUPTED = 'interrupted'
+    STATUS_COMPLETED = 'completed'
+
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(300), nullable=False)
+    template = db.Column(db.String(100), nullable=False)  # emails/<template>.html
+
+    status = db.Column(db.String(20), nullable=False, default=STATUS_DRAFT, index=True)
+
+    # Progress / checkpoint
+    last_subscriber_id = db.Column(db.Integer, nullable=False, default=0)
+    sent_count = db.Column(db.Integer, nullable=False, default=0)
+    failed_count = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+
+    started_at = db.Column(db.DateTime, nullable=True)
+    completed_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<NewsletterCampaign {self.id} {self.status} sent={self.sent_count}>'
+
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'id': self.id,
+            'subject': self.subject,
+            'template': self.template,
+            'status': self.status,
+            'last_subscriber_id': self.last_subscriber_id,
+            'sent_count': self.sent_count,
+            'failed_count': self.failed_count,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
@@ -65,14 +65,79 @@ class Package(db.Model):
     @property
     def booking_count(self):
         """Get total number of bookings for this package"""
+        stats = getattr(self, '_stats', None)
+        if stats is not None:
+            return stats['booking_count']
         return self.bookings.count()
 
+    @property
+    def completed_count(self):
+        """Get number of completed bookings for this package"""
+        stats = getattr(self, '_stats', None)
+        if stats is not None:
+            return stats['completed_count']
+        from app.models.booking import Booking
+        return self.bookings.filter(Booking.status == 'completed').count()
+
     @property
     def total_revenue(self):
-        """Calculate total revenue from this package"""
+        """Calculate total revenue from completed bookings (locked booking amounts)"""
+        stats = getattr(self, '_stats', None)
+        if stats is not None:
+            return stats['revenue']
+        from app.models.booking import Booking
+        from sqlalchemy import func
+        revenue = db.session.query(func.coalesce(func.sum(Booking.amount), 0))\
+            .filter(Booking.package_id == self.id, Booking.status == 'completed')\
+            .scalar()
+        return float(revenue or 0)
+
+    @staticmethod
+    def with_stats(query=None, order_by_bookings=False, limit=None):
+        """
+        Load packages annotated with their booking aggregates in one query
+
+        Booking count, completed count and revenue (SUM of the locked
+        Booking.amount for completed bookings) come from a single GROUP BY
+        join, so booking_count / completed_count / total_revenue on the
+        returned packages don't query again.
+
+        Args:
+            query: Base Package query with filters/ordering (default: all packages)
+            order_by_bookings: Order by booking count, most booked first
+            limit: Maximum number of packages
+
+        Returns:
+            List of Package instances
+        """
         from app.models.booking import Booking
-        completed_bookings = self.bookings.filter(Booking.status == 'completed').count()
-        return float(self.price) * completed_bookings
+        from sqlalchemy import func, case
+
+        is_completed = Booking.status == 'completed'
+        booking_count = func.count(Booking.id)
+
+        query = (query if query is not None else Package.query)\
+            .outerjoin(Booking, Booking.package_id == Package.id)\
+            .group_by(Package.id)\
+            .add_columns(
+                booking_count.label('booking_count'),
+                func.coalesce(func.sum(case((is_completed, 1), else_=0)), 0).label('completed_count'),
+                func.coalesce(func.sum(case((is_completed, Booking.amount), else_=0)), 0).label('revenue')
+            )
+        if order_by_bookings:
+            query = query.order_by(None).order_by(booking_count.desc(), Package.display_order)
+        if limit is not None:
+            query = query.limit(limit)
+
+        packages = []
+        for package, bookings, completed, revenue in query.all():
+            package._stats = {
+                'booking_count': bookings,
+                'completed_count': completed,
+                'revenue': float(revenue or 0)
+            }
+            packages.append(package)
+        return packages
 
     @staticmethod
     def get_active_packages():
@@ -82,12 +147,8 @@ class Package(db.Model):
     @staticmethod
     def get_featured_packages(limit=3):
         """Get featured packages (top 3 by bookings)"""
-        from app.models.booking import Booking
-        from sqlalchemy import func
-
-        return Package.query.filter_by(is_active=True)\
-            .outerjoin(Booking)\
-            .group_by(Package.id)\
-            .order_by(func.count(Booking.id).desc())\
-            .limit(limit)\
-            .all()
+        return Package.with_stats(
+            Package.query.filter_by(is_active=True),
+            order_by_bookings=True,
+            limit=limit
+        )
@@ -23,7 +23,8 @@ class PublicBooking(db.Model):
     package_name = db.Column(db.String(200), nullable=False)
 
     # Money (Stripe uses cents)
-    amount_cents = db.Column(db.Integer, nullable=False, default=0)
+    # active_history: the previous value is needed by the dashboard rollup (see DashboardStat)
+    amount_cents = db.column_property(db.Column(db.Integer, nullable=False, default=0), active_history=True)
     currency = db.Column(db.String(10), nullable=False, default='eur')
 
     # Stripe identifiers
@@ -42,7 +43,7 @@ class PublicBooking(db.Model):
     calendly_location = db.Column(db.String(255), nullable=True)
 
     # Status in this public flow
-    status = db.Column(db.String(40), nullable=False, default='paid', index=True)
+    status = db.column_property(db.Column(db.String(40), nullable=False, default='paid', index=True), active_history=True)
     # paid -> waiver_signed -> scheduled -> completed/cancelled (admin-managed after that)
 
     # Admin-managed fields
@@ -56,4 +57,57 @@ class PublicBooking(db.Model):
     def __repr__(self):
         return f"<PublicBooking {self.id} {self.package_key} {self.status}>"
 
+    def apply_checkout_session(self, checkout_session):
+        """Copy payment details from a paid Stripe Checkout Session (object or event dict)"""
+        self.stripe_payment_intent_id = checkout_session.get('payment_intent') or self.stripe_payment_intent_id
+        self.amount_cents = int(checkout_session.get('amount_total') or self.amount_cents or 0)
+        self.currency = str(checkout_session.get('currency') or self.currency or 'eur')
+        details = checkout_session.get('customer_details') or {}
+        self.customer_email = self.customer_email or details.get('email')
+        self.customer_name = self.customer_name or details.get('name')
+        self.paid_at = self.paid_at or datetime.utcnow()
+
+    @staticmethod
+    def upsert_from_checkout_session(checkout_session, package_key, package_name):
+        """
+        Create or update the booking for a paid Checkout Session
+
+        Keyed by stripe_checkout_session_id, so the webhook and the success
+        page can both call it in any order. Status is only set on creation;
+        a booking that has moved on (waiver signed, scheduled, ...) keeps it.
+        Commits.
+
+        Args:
+            checkout_session: Stripe Checkout Session (object or event dict)
+            package_key: Package key from the session metadata
+            package_name: Package display name
+
+        Returns:
+            PublicBooking instance
+        """
+        from sqlalchemy.exc import IntegrityError
+
+        session_id = checkout_session.get('id')
+        booking = PublicBooking.query.filter_by(stripe_checkout_session_id=session_id).first()
+        if booking is None:
+            booking = PublicBooking(
+                package_key=package_key,
+                package_name=package_name,
+                stripe_checkout_session_id=session_id,
+                status='paid'
+            )
+            booking.apply_checkout_session(checkout_session)
+            try:
+                with db.session.begin_nested():
+                    db.session.add(booking)
+                db.session.commit()
+                return booking
+            except IntegrityError:
+                # The other path (webhook vs. success page) inserted it first
+                booking = PublicBooking.query.filter_by(stripe_checkout_session_id=session_id).one()
+
+        booking.apply_checkout_session(checkout_session)
+        db.session.commit()
+        return booking
+
 
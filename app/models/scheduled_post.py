@@ -0,0 +1,57 @@
+from app import db
+from datetime import datetime
+import json
+
+
+class ScheduledPost(db.Model):
+    """
+    Social post queued from /admin/social, published by the post scheduler
+
+    The row is the source of truth; APScheduler jobs only say when to look.
+    A batch claims due rows by moving them from `pending` to `sending` with
+    its claim token in one UPDATE, so a job that fires twice (restart,
+    second process) cannot publish the same post again.
+
+    """
+
+    __tablename__ = 'scheduled_posts'
+
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'  # Claimed by a batch; left here if the process died mid-post
+    STATUS_POSTED = 'posted'
+    STATUS_FAILED = 'failed'
+    STATUS_CANCELLED = 'cancelled'
+
+    id = db.Column(db.Integer, primary_key=True)
+    content = db.Column(db.Text, nullable=False)
+    platforms = db.Column(db.String(200), nullable=False)  # Comma-separated
+    media_urls = db.Column(db.Text, nullable=True)  # JSON array
+    video_id = db.Column(db.Integer, db.ForeignKey('videos.id', ondelete='SET NULL'), nullable=True)
+
+    scheduled_for = db.Column(db.DateTime, nullable=False)  # UTC
+    status = db.Column(db.String(20), nullable=False, default=STATUS_PENDING)
+    claim_token = db.Column(db.String(36), nullable=True, index=True)
+    ayrshare_id = db.Column(db.String(100), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    posted_at = db.Column(db.DateTime, nullable=True)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    video = db.relationship('Video')
+
+    __table_args__ = (
+        # Batches claim: status = pending AND scheduled_for <= now
+        db.Index('ix_scheduled_posts_status_scheduled_for', 'status', 'scheduled_for'),
+    )
+
+    def __repr__(self):
+        return f'<ScheduledPost {self.id} {self.status} at={self.scheduled_for}>'
+
+    @property
+    def platform_list(self):
+        return [platform for platform in (self.platforms or '').split(',') if platform]
+
+    @property
+    def media_url_list(self):
+        return json.loads(self.media_urls) if self.media_urls else []
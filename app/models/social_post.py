@@ -0,0 +1,113 @@
+from app import db
+from datetime import datetime
+import json
+
+
+class SocialPost(db.Model):
+    """
+    Local copy of a post published through Ayrshare
+
+    Kept up to date by `flask social-sync` so /admin/social renders without
+    calling Ayrshare. The latest engagement totals (summed over platforms)
+    are denormalized here; the time series lives in SocialPostMetrics.
+    """
+
+    __tablename__ = 'social_posts'
+
+    id = db.Column(db.Integer, primary_key=True)
+    ayrshare_id = db.Column(db.String(100), unique=True, nullable=False)
+    content = db.Column(db.Text, nullable=True)
+    platforms = db.Column(db.String(200), nullable=True)  # Comma-separated
+    post_urls = db.Column(db.Text, nullable=True)  # JSON object: platform -> URL
+    status = db.Column(db.String(20), nullable=True)
+    published_at = db.Column(db.DateTime, nullable=True, index=True)
+
+    likes = db.Column(db.Integer, nullable=False, default=0)
+    comments = db.Column(db.Integer, nullable=False, default=0)
+    shares = db.Column(db.Integer, nullable=False, default=0)
+    impressions = db.Column(db.Integer, nullable=False, default=0)
+    metrics_updated_at = db.Column(db.DateTime, nullable=True)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    metrics = db.relationship('SocialPostMetrics', backref='post', lazy='dynamic',
+                              cascade='all, delete-orphan', passive_deletes=True)
+
+    def __repr__(self):
+        return f'<SocialPost {self.ayrshare_id}>'
+
+    @property
+    def platform_list(self):
+        return [platform for platform in (self.platforms or '').split(',') if platform]
+
+    @property
+    def url_map(self):
+        return json.loads(self.post_urls) if self.post_urls else {}
+
+    @staticmethod
+    def totals(since=None):
+        """
+        Post count and summed latest engagement
+
+        Args:
+            since: Only posts published at or after this datetime
+
+        Returns:
+            Dict with posts, likes, comments, shares and impressions
+        """
+        query = db.session.query(
+            db.func.count(SocialPost.id),
+            db.func.coalesce(db.func.sum(SocialPost.likes), 0),
+            db.func.coalesce(db.func.sum(SocialPost.comments), 0),
+            db.func.coalesce(db.func.sum(SocialPost.shares), 0),
+            db.func.coalesce(db.func.sum(SocialPost.impressions), 0)
+        )
+        if since is not None:
+            query = query.filter(SocialPost.published_at >= since)
+        posts, likes, comments, shares, impressions = query.one()
+        return {'posts': posts, 'likes': likes, 'comments': comments, 'shares': shares, 'impressions': impressions}
+
+
+class SocialPostMetrics(db.Model):
+    """Engagement snapshot of one post on one platform, taken at each sync"""
+
+    __tablename__ = 'social_post_metrics'
+
+    id = db.Column(db.Integer, primary_key=True)
+    post_id = db.Column(db.Integer, db.ForeignKey('social_posts.id', ondelete='CASCADE'), nullable=False)
+    platform = db.Column(db.String(20), nullable=False)
+    captured_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    likes = db.Column(db.Integer, nullable=False, default=0)
+    comments = db.Column(db.Integer, nullable=False, default=0)
+    shares = db.Column(db.Integer, nullable=False, default=0)
+    impressions = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_social_post_metrics_post_captured', 'post_id', 'captured_at'),
+    )
+
+    def __repr__(self):
+        return f'<SocialPostMetrics post={self.post_id} {self.platform} {self.captured_at}>'
+
+    @staticmethod
+    def trend(limit=10):
+        """
+        Engagement totals per sync run (all snapshots of a run share captured_at)
+
+        Returns:
+            List of dicts with captured_at, likes, comments, shares and
+            impressions, oldest first
+        """
+        rows = db.session.query(
+            SocialPostMetrics.captured_at,
+            db.func.sum(SocialPostMetrics.likes),
+            db.func.sum(SocialPostMetrics.comments),
+            db.func.sum(SocialPostMetrics.shares),
+            db.func.sum(SocialPostMetrics.impressions)
+        ).group_by(SocialPostMetrics.captured_at).order_by(SocialPostMetrics.captured_at.desc()).limit(limit).all()
+        return [
+            {'captured_at': captured_at, 'likes': likes, 'comments': comments, 'shares': shares, 'impressions': impressions}
+            for captured_at, likes, comments, shares, impressions in reversed(rows)
+        ]
@@ -0,0 +1,102 @@
+from app import db
+from datetime import datetime
+import json
+
+
+class StripeEvent(db.Model):
+    """
+    Verified Stripe webhook event, keyed by Stripe's event id
+
+    The webhook only verifies, stores and acknowledges; the event processor
+    (`flask stripe-events` or the in-process background task) applies stored
+    events in Stripe creation order. A redelivered event hits the primary key
+    and is acknowledged without being stored or applied again.
+
+    object_id is the id of the event's data.object (e.g. the Checkout
+    Session) so the processor can hold back later events for an object until
+    its earlier events are applied.
+    """
+
+    __tablename__ = 'stripe_events'
+
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_PROCESSED = 'processed'
+    STATUS_DEAD = 'dead'  # Gave up after STRIPE_EVENTS_MAX_ATTEMPTS
+
+    id = db.Column(db.String(255), primary_key=True)  # Stripe event id (evt_...)
+    type = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # Verified event JSON
+    stripe_created = db.Column(db.Integer, nullable=False, default=0)  # event.created (epoch seconds)
+    object_id = db.Column(db.String(255), nullable=True)  # data.object.id (cs_..., pi_...)
+
+    # Processing state
+    status = db.Column(db.String(20), nullable=False, default=STATUS_PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime, nullable=True)
+
+    received_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # The processor polls: status = pending AND next_attempt_at <= now, in Stripe order
+        db.Index('ix_stripe_events_status_next_attempt', 'status', 'next_attempt_at'),
+        # The claim skips events whose object has an earlier unapplied event
+        db.Index('ix_stripe_events_object_created', 'object_id', 'stripe_created'),
+    )
+
+    def __repr__(self):
+        return f'<StripeEvent {self.id} {self.type} {self.status}>'
+
+    @property
+    def data(self):
+        """The event as a dict"""
+        return json.loads(self.payload)
+
+    @staticmethod
+    def record(event_id, event_type, payload, created=None):
+        """
+        Store a verified event unless it was already received
+
+        Args:
+            event_id: Stripe event id
+            event_type: Stripe event type
+            payload: Raw verified JSON payload
+            created: event.created (epoch seconds)
+
+        Returns:
+            True if stored, False if it is a duplicate delivery
+        """
+        from sqlalchemy.exc import IntegrityError
+
+        if db.session.query(StripeEvent.id).filter_by(id=event_id).first() is not None:
+            return False
+
+        try:
+            obj = (json.loads(payload).get('data') or {}).get('object') or {}
+        except (ValueError, AttributeError):
+            obj = {}
+
+        try:
+            db.session.add(StripeEvent(
+                id=event_id,
+                type=event_type,
+                payload=payload,
+                stripe_created=int(created or 0),
+                object_id=obj.get('id') if isinstance(obj, dict) else None
+            ))
+            db.session.commit()
+        except IntegrityError:
+            # Concurrent redelivery stored it first
+            db.session.rollback()
+            return False
+        return True
+
+    @staticmethod
+    def pending_count():
+        """Number of events still waiting to be applied"""
+        return StripeEvent.query.filter(
+            StripeEvent.status.in_([StripeEvent.STATUS_PENDING, StripeEvent.STATUS_PROCESSING])
+        ).count()
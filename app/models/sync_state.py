@@ -0,0 +1,36 @@
+from app import db
+from datetime import datetime
+
+
+class SyncState(db.Model):
+    """
+    Named cursor / high-water mark for incremental sync jobs
+
+    e.g. `stripe_reconcile:checkout_sessions` -> epoch seconds of the last
+    completed `flask stripe-reconcile` run.
+    """
+
+    __tablename__ = 'sync_state'
+
+    key = db.Column(db.String(100), primary_key=True)
+    value = db.Column(db.String(255), nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<SyncState {self.key}={self.value}>'
+
+    @staticmethod
+    def get_value(key, default=None):
+        """Stored value for key, or default"""
+        state = db.session.get(SyncState, key)
+        return state.value if state is not None and state.value is not None else default
+
+    @staticmethod
+    def set_value(key, value):
+        """Store a value for key (added to the session; the caller commits)"""
+        state = db.session.get(SyncState, key)
+        if state is None:
+            state = SyncState(key=key)
+            db.session.add(state)
+        state.value = None if value is None else str(value)
+        return state
@@ -34,9 +34,9 @@ class Video(db.Model):
     is_featured = db.Column(db.Boolean, default=False, nullable=False, index=True)
     is_published = db.Column(db.Boolean, default=True, nullable=False)
 
-    # Engagement metrics
-    view_count = db.Column(db.Integer, default=0)
-    like_count = db.Column(db.Integer, default=0)
+    # Engagement metrics (persisted totals; see view_count/like_count for live values)
+    stored_view_count = db.Column('view_count', db.Integer, default=0)
+    stored_like_count = db.Column('like_count', db.Integer, default=0)
 
     # Display order
     display_order = db.Column(db.Integer, default=0)
@@ -99,15 +99,68 @@ class Video(db.Model):
         # maxresdefault.jpg is highest quality (1920x1080), fallback to hqdefault.jpg (480x360)
         return f'https://img.youtube.com/vi/{self.youtube_id}/maxresdefault.jpg'
 
+    @property
+    def view_count(self):
+        """View count including increments not yet flushed to the database"""
+        return (self.stored_view_count or 0) + self._pending_counts()['views']
+
+    @view_count.setter
+    def view_count(self, value):
+        self.stored_view_count = value
+
+    @property
+    def like_count(self):
+        """Like count including increments not yet flushed to the database"""
+        return (self.stored_like_count or 0) + self._pending_counts()['likes']
+
+    @like_count.setter
+    def like_count(self, value):
+        self.stored_like_count = value
+
+    def _pending_counts(self):
+        """Get buffered counter deltas for this video (prefetched by load_pending_counts)"""
+        pending = getattr(self, '_pending', None)
+        if pending is not None:
+            return pending
+        if self.id is None:
+            return {'views': 0, 'likes': 0}
+        from app.services.counter_service import video_counters
+        return video_counters.pending(self.id)
+
+    def _buffer_increment(self, field):
+        from app.services.counter_service import video_counters
+        video_counters.increment(self.id, field)
+        pending = getattr(self, '_pending', None)
+        if pending is not None:
+            pending[field] += 1
+
     def increment_views(self):
-        """Increment view count"""
-        self.view_count += 1
-        db.session.commit()
+        """Increment view count (buffered, flushed in batches)"""
+        self._buffer_increment('views')
 
     def increment_likes(self):
-        """Increment like count"""
-        self.like_count += 1
-        db.session.commit()
+        """Increment like count (buffered, flushed in batches)"""
+        self._buffer_increment('likes')
+
+    @staticmethod
+    def load_pending_counts(videos):
+        """
+        Prefetch buffered counter deltas for a page of videos
+
+        One Redis round trip for the whole list, instead of one per
+        view_count/like_count access while the page renders.
+
+        Args:
+            videos: Video instances
+
+        Returns:
+            The same videos
+        """
+        from app.services.counter_service import video_counters
+        pending = video_counters.pending_many([video.id for video in videos if video.id is not None])
+        for video in videos:
+            video._pending = pending.get(video.id, {'views': 0, 'likes': 0})
+        return videos
 
     @staticmethod
     def get_featured_videos(limit=6):
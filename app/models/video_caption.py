@@ -0,0 +1,55 @@
+from app import db
+from datetime import datetime
+
+
+class VideoCaption(db.Model):
+    """
+    AI-generated social media caption for one video on one platform
+
+    Rows are created as `pending` jobs by `flask captions-generate` and are
+    the pipeline's checkpoint: a `submitted` row is waiting on a Message
+    Batch (`batch_id`), so a rerun polls that batch instead of submitting
+    the job again.
+
+    """
+
+    __tablename__ = 'video_captions'
+
+    STATUS_PENDING = 'pending'
+    STATUS_SUBMITTED = 'submitted'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    id = db.Column(db.Integer, primary_key=True)
+    video_id = db.Column(db.Integer, db.ForeignKey('videos.id', ondelete='CASCADE'), nullable=False)
+    platform = db.Column(db.String(20), nullable=False)  # instagram, tiktok, facebook, linkedin
+
+    caption = db.Column(db.Text, nullable=True)
+    status = db.Column(db.String(20), nullable=False, default=STATUS_PENDING, index=True)
+    batch_id = db.Column(db.String(100), nullable=True, index=True)  # Message Batch the job was submitted in
+    model = db.Column(db.String(100), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    video = db.relationship('Video', backref=db.backref('captions', lazy='dynamic', passive_deletes=True))
+
+    __table_args__ = (
+        db.UniqueConstraint('video_id', 'platform', name='uq_video_captions_video_platform'),
+    )
+
+    def __repr__(self):
+        return f'<VideoCaption video={self.video_id} {self.platform} {self.status}>'
+
+    @property
+    def custom_id(self):
+        """Request id used in Message Batches (maps results back to this row)"""
+        return f'caption-{self.id}'
+
+    @staticmethod
+    def for_video(video_id, platform):
+        """Finished caption text for a video/platform, or None"""
+        return db.session.query(VideoCaption.caption).filter_by(
+            video_id=video_id, platform=platform, status=VideoCaption.STATUS_DONE
+        ).scalar()
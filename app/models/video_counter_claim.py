@@ -0,0 +1,51 @@
+from app import db
+from datetime import datetime, timedelta
+
+
+class VideoCounterClaim(db.Model):
+    """
+    Redis counter claim already applied to the videos table
+
+    The flusher inserts a row per claim in the same transaction as the
+    counter UPDATE. A claim that is seen again (its flusher died between
+    COMMIT and deleting the Redis hash) is then released without being
+    applied twice.
+    """
+
+    __tablename__ = 'video_counter_claims'
+
+    id = db.Column(db.String(120), primary_key=True)  # Claim id stored in the claimed hash
+    applied_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<VideoCounterClaim {self.id}>'
+
+    @staticmethod
+    def applied_ids(claim_ids):
+        """
+        Claim ids that were already applied
+
+        Args:
+            claim_ids: Claim ids about to be applied
+
+        Returns:
+            Set of the ids that already have a row
+        """
+        if not claim_ids:
+            return set()
+        rows = db.session.query(VideoCounterClaim.id).filter(VideoCounterClaim.id.in_(list(claim_ids))).all()
+        return {row.id for row in rows}
+
+    @staticmethod
+    def record(claim_ids, retention_seconds):
+        """
+        Add rows for applied claims and prune old ones (the caller commits)
+
+        Args:
+            claim_ids: Claim ids applied in the current transaction
+            retention_seconds: Keep rows this long (well past the claim stale time)
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=retention_seconds)
+        VideoCounterClaim.query.filter(VideoCounterClaim.applied_at < cutoff).delete(synchronize_session=False)
+        for claim_id in claim_ids:
+            db.session.add(VideoCounterClaim(id=claim_id))
@@ -2,6 +2,11 @@ from app import db
 from datetime import datetime
 
 
+def email_key(column):
+    """Normalized email for grouping and lookup: lower(trim(client_email)), as indexed"""
+    return db.func.lower(db.func.trim(column))
+
+
 class Waiver(db.Model):
     """Liability waiver model for legal protection"""
 
@@ -33,6 +38,11 @@ class Waiver(db.Model):
     # Relationship
     booking = db.relationship('Booking', backref=db.backref('waiver', uselist=False))
 
+    __table_args__ = (
+        # Case-insensitive email grouping/lookup, latest signature first (admin waivers pages)
+        db.Index('ix_waivers_email_lower_signed_at', email_key(client_email), signed_at),
+    )
+
     def __repr__(self):
         return f'<Waiver {self.id} - {self.client_name} - {self.signed_at}>'
 
@@ -60,6 +70,72 @@ class Waiver(db.Model):
         """Check if waiver is signed for a booking"""
         return Waiver.query.filter_by(booking_id=booking_id).first() is not None
 
+    @staticmethod
+    def email_groups(page=1, per_page=20):
+        """
+        Page through waivers grouped by case-insensitive email
+
+        Grouping, counts and latest-signature selection run in SQL: a window
+        over lower(trim(client_email)) ranks each email's signatures, and only the
+        latest one per email is joined back to its waiver and booking link.
+
+        Args:
+            page: Page number (1-based)
+            per_page: Emails per page
+
+        Returns:
+            Pagination whose items are dicts with email, count, latest and
+            latest_booking_id, ordered by latest signature, newest first
+        """
+        from app.models.public_booking_waiver import PublicBookingWaiver
+
+        key = email_key(Waiver.client_email)
+        ranked = db.session.query(
+            Waiver.id.label('waiver_id'),
+            db.func.count(Waiver.id).over(partition_by=key).label('signature_count'),
+            db.func.row_number().over(
+                partition_by=key,
+                order_by=(Waiver.signed_at.desc(), Waiver.id.desc())
+            ).label('position')
+        ).filter(key != '').subquery()
+
+        pagination = db.session.query(Waiver, ranked.c.signature_count, PublicBookingWaiver.public_booking_id)\
+            .join(ranked, ranked.c.waiver_id == Waiver.id)\
+            .outerjoin(PublicBookingWaiver, PublicBookingWaiver.waiver_id == Waiver.id)\
+            .filter(ranked.c.position == 1)\
+            .order_by(Waiver.signed_at.desc(), Waiver.id.desc())\
+            .paginate(page=page, per_page=per_page, error_out=False)
+
+        pagination.items = [
+            {
+                'email': waiver.client_email,
+                'count': count,
+                'latest': waiver,
+                'latest_booking_id': booking_id
+            }
+            for waiver, count, booking_id in pagination.items
+        ]
+        return pagination
+
+    @staticmethod
+    def for_email(email):
+        """
+        Get every signature for an email (case-insensitive) with its booking link
+
+        Args:
+            email: Client email
+
+        Returns:
+            List of (Waiver, public_booking_id or None), newest first
+        """
+        from app.models.public_booking_waiver import PublicBookingWaiver
+
+        return db.session.query(Waiver, PublicBookingWaiver.public_booking_id)\
+            .outerjoin(PublicBookingWaiver, PublicBookingWaiver.waiver_id == Waiver.id)\
+            .filter(email_key(Waiver.client_email) == email.strip().lower())\
+            .order_by(Waiver.signed_at.desc(), Waiver.id.desc())\
+            .all()
+
 
 # Current waiver version - increment when terms change
 CURRENT_WAIVER_VERSION = '1.0'
@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, current_app
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, current_app, abort
 from flask_login import login_required, current_user
 from functools import wraps
 from app import db
@@ -10,6 +10,11 @@ from app.models.package import Package
 from app.models.video import Video
 from app.models.testimonial import Testimonial
 from app.models.waiver import Waiver
+from app.models.dashboard_stat import DashboardStat
+from app.models.social_post import SocialPost, SocialPostMetrics
+from app.models.sync_state import SyncState
+from app.models.scheduled_post import ScheduledPost
+from app.services.post_scheduler import queue_post, social_timezone, to_local, to_utc
 from app.utils.validators import (
     validate_required, validate_price, validate_integer,
     validate_youtube_id, validate_url, validate_rating,
@@ -20,6 +25,8 @@ from sqlalchemy import func
 
 admin_bp = Blueprint('admin', __name__)
 
+SOCIAL_PLATFORMS = ('instagram', 'tiktok', 'facebook', 'linkedin')
+
 
 def admin_required(f):
     """Decorator to require admin access"""
@@ -37,17 +44,9 @@ def admin_required(f):
 @admin_required
 def dashboard():
     """Admin dashboard with overview statistics"""
-    # Get statistics
-    total_users = User.query.count()
-    total_bookings = PublicBooking.query.count()
-    total_videos = Video.query.count()
-    total_testimonials = Testimonial.query.count()
-
-    # Get revenue statistics
-    revenue_cents = db.session.query(func.coalesce(func.sum(PublicBooking.amount_cents), 0))\
-        .filter(PublicBooking.status.in_(['paid', 'waiver_signed', 'scheduled', 'completed']))\
-        .scalar()
-    total_revenue = float(revenue_cents or 0) / 100.0
+    # Get statistics (maintained incrementally, see DashboardStat)
+    stats = DashboardStat.snapshot()
+    total_revenue = float(stats['revenue_cents']) / 100.0
 
     # Get upcoming bookings
     upcoming_bookings = PublicBooking.query.filter(
@@ -58,22 +57,16 @@ def dashboard():
     # Get recent bookings
     recent_bookings = PublicBooking.query.order_by(PublicBooking.created_at.desc()).limit(10).all()
 
-    # Get booking statistics by status
-    booking_stats = db.session.query(
-        PublicBooking.status,
-        func.count(PublicBooking.id).label('count')
-    ).group_by(PublicBooking.status).all()
-
     return render_template(
         'admin/dashboard.html',
-        total_users=total_users,
-        total_bookings=total_bookings,
-        total_videos=total_videos,
-        total_testimonials=total_testimonials,
+        total_users=stats['total_users'],
+        total_bookings=stats['total_bookings'],
+        total_videos=stats['total_videos'],
+        total_testimonials=stats['total_testimonials'],
         total_revenue=total_revenue,
         upcoming_bookings=upcoming_bookings,
         recent_bookings=recent_bookings,
-        booking_stats=dict(booking_stats)
+        booking_stats=stats['booking_stats']
     )
 
 
@@ -157,7 +150,7 @@ def deliver_booking(booking_id):
 @admin_required
 def packages():
     """Manage packages"""
-    packages = Package.query.order_by(Package.display_order, Package.name).all()
+    packages = Package.with_stats(Package.query.order_by(Package.display_order, Package.name))
     return render_template('admin/packages.html', packages=packages)
 
 
@@ -257,7 +250,10 @@ def edit_package(package_id):
 @admin_required
 def delete_package(package_id):
     """Delete a package"""
-    package = Package.query.get_or_404(package_id)
+    packages = Package.with_stats(Package.query.filter(Package.id == package_id))
+    if not packages:
+        abort(404)
+    package = packages[0]
 
     # Check if package has bookings
     if package.booking_count > 0:
@@ -278,7 +274,7 @@ def delete_package(package_id):
 @admin_required
 def videos():
     """Manage videos"""
-    videos = Video.query.order_by(Video.created_at.desc()).all()
+    videos = Video.load_pending_counts(Video.query.order_by(Video.created_at.desc()).all())
     return render_template('admin/videos.html', videos=videos)
 
 
@@ -522,36 +518,12 @@ def view_user(user_id):
 @admin_required
 def waivers():
     """View all signed waivers"""
-    all_waivers = Waiver.query.order_by(Waiver.signed_at.desc()).all()
-
-    # Map waiver_id -> public_booking_id (if linked)
-    links = PublicBookingWaiver.query.all()
-    waiver_to_booking = {l.waiver_id: l.public_booking_id for l in links}
-
-    # Group by email (case-insensitive)
-    groups = {}
-    for w in all_waivers:
-        key = (w.client_email or '').strip().lower()
-        groups.setdefault(key, []).append(w)
-
-    waiver_groups = []
-    for key, ws in groups.items():
-        if not key:
-            continue
-        ws_sorted = sorted(ws, key=lambda x: x.signed_at or datetime.min, reverse=True)
-        latest = ws_sorted[0]
-        latest_booking_id = waiver_to_booking.get(latest.id)
-        waiver_groups.append({
-            'email': latest.client_email,
-            'count': len(ws_sorted),
-            'latest': latest,
-            'latest_booking_id': latest_booking_id
-        })
-
-    waiver_groups.sort(key=lambda g: g['latest'].signed_at or datetime.min, reverse=True)
-
-    linked_count = len(waiver_to_booking)
-    return render_template('admin/waivers.html', waiver_groups=waiver_groups, total_waivers=len(all_waivers), linked_count=linked_count)
+    page = request.args.get('page', 1, type=int)
+    waiver_groups = Waiver.email_groups(page=page, per_page=current_app.config['ADMIN_ITEMS_PER_PAGE'])
+
+    total_waivers = db.session.query(func.count(Waiver.id)).scalar()
+    linked_count = db.session.query(func.count(PublicBookingWaiver.id)).scalar()
+    return render_template('admin/waivers.html', waiver_groups=waiver_groups, total_waivers=total_waivers, linked_count=linked_count)
 
 
 @admin_bp.route('/waivers/email/<path:email>')
@@ -559,20 +531,95 @@ def waivers():
 @admin_required
 def waivers_by_email(email):
     """View all waiver signatures for a given email."""
-    waivers = Waiver.query.filter(func.lower(Waiver.client_email) == email.strip().lower())\
-        .order_by(Waiver.signed_at.desc()).all()
-    links = PublicBookingWaiver.query.all()
-    waiver_to_booking = {l.waiver_id: l.public_booking_id for l in links}
+    rows = Waiver.for_email(email)
+    waivers = [waiver for waiver, _ in rows]
+    waiver_to_booking = {waiver.id: booking_id for waiver, booking_id in rows if booking_id}
     return render_template('admin/waiver_email.html', email=email, waivers=waivers, waiver_to_booking=waiver_to_booking)
 
 
-# Social Media Management (Future Integration)
+# Social Media Management
 
 @admin_bp.route('/social')
 @login_required
 @admin_required
 def social_media():
-    """Social media management dashboard"""
-    # TODO: Integrate with Ayrshare API
-    flash('Social media automation coming soon!', 'info')
-    return render_template('admin/social.html')
+    """Social media dashboard (local tables only; filled by `flask social-sync`)"""
+    from app.services.social_sync import HIGH_WATER_MARK_KEY
+
+    page = request.args.get('page', 1, type=int)
+    posts = SocialPost.query.order_by(
+        SocialPost.published_at.is_(None), SocialPost.published_at.desc(), SocialPost.id.desc()
+    ).paginate(
+        page=page, per_page=current_app.config['ADMIN_ITEMS_PER_PAGE'], error_out=False
+    )
+
+    window_days = current_app.config.get('SOCIAL_METRICS_WINDOW_DAYS', 30)
+    totals = SocialPost.totals(since=datetime.utcnow() - timedelta(days=window_days))
+    last_synced = SyncState.get_value(HIGH_WATER_MARK_KEY)
+    last_synced = datetime.utcfromtimestamp(int(last_synced)) if last_synced else None
+
+    scheduled = ScheduledPost.query.filter(
+        ScheduledPost.status.in_([ScheduledPost.STATUS_PENDING, ScheduledPost.STATUS_SENDING, ScheduledPost.STATUS_FAILED])
+    ).order_by(ScheduledPost.scheduled_for).limit(50).all()
+
+    return render_template(
+        'admin/social.html',
+        posts=posts,
+        totals=totals,
+        window_days=window_days,
+        trend=SocialPostMetrics.trend(),
+        last_synced=last_synced,
+        scheduled=scheduled,
+        social_tz=social_timezone(),
+        to_local=to_local,
+        platforms=SOCIAL_PLATFORMS
+    )
+
+
+@admin_bp.route('/social/schedule', methods=['POST'])
+@login_required
+@admin_required
+def schedule_social_post():
+    """Queue a post for the post scheduler"""
+    content = sanitize_string(request.form.get('content', ''))
+    platforms = [platform for platform in request.form.getlist('platforms') if platform in SOCIAL_PLATFORMS]
+    scheduled_for = request.form.get('scheduled_for', '')
+
+    errors = []
+    if not content:
+        errors.append('Post text is required.')
+    if not platforms:
+        errors.append('Choose at least one platform.')
+    try:
+        scheduled_for = datetime.strptime(scheduled_for, '%Y-%m-%dT%H:%M')
+    except ValueError:
+        errors.append('Enter a valid date and time.')
+    else:
+        if to_utc(scheduled_for) <= datetime.utcnow():
+            errors.append('The time must be in the future.')
+
+    if errors:
+        for error in errors:
+            flash(error, 'danger')
+        return redirect(url_for('admin.social_media'))
+
+    media_url = request.form.get('media_url', '').strip()
+    queue_post(content, platforms, scheduled_for, media_urls=[media_url] if media_url else None)
+    flash(f'Post scheduled for {scheduled_for.strftime("%b %d, %H:%M")}.', 'success')
+    return redirect(url_for('admin.social_media'))
+
+
+@admin_bp.route('/social/scheduled/<int:post_id>/cancel', methods=['POST'])
+@login_required
+@admin_required
+def cancel_social_post(post_id):
+    """Cancel a queued post that has not been claimed yet"""
+    cancelled = ScheduledPost.query.filter_by(id=post_id, status=ScheduledPost.STATUS_PENDING).update(
+        {'status': ScheduledPost.STATUS_CANCELLED}, synchronize_session=False
+    )
+    db.session.commit()
+    if cancelled:
+        flash('Scheduled post cancelled.', 'success')
+    else:
+        flash('That post is already being published or has finished.', 'warning')
+    return redirect(url_for('admin.social_media'))
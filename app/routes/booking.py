@@ -3,9 +3,11 @@ from flask_login import login_required, current_user
 from app import db, limiter, csrf
 from app.models.booking import Booking, BookingStatus
 from app.models.package import Package
+from app.services.stripe_gateway import get_stripe_gateway
 from datetime import datetime, timedelta
 from sqlalchemy.exc import IntegrityError
 import os
+import stripe
 
 booking_bp = Blueprint('booking', __name__)
 
@@ -145,8 +147,6 @@ def view_booking(booking_id):
 @login_required
 def payment(booking_id):
     """Payment page for booking"""
-    import stripe  # Import here to avoid module-level issues
-    
     booking = Booking.query.get_or_404(booking_id)
 
     # Ensure user owns this booking
@@ -167,9 +167,6 @@ def payment(booking_id):
         flash('Payment system is not configured. Please contact support.', 'danger')
         return redirect(url_for('booking.index'))
 
-    # Initialize Stripe
-    stripe.api_key = stripe_secret
-
     # Render template with no-cache headers to prevent browser caching
     response = make_response(render_template(
         'booking/payment.html',
@@ -202,16 +199,12 @@ def cancel_booking(booking_id):
     refund_processed = False
     if booking.stripe_payment_intent_id and booking.status == BookingStatus.CONFIRMED.value:
         try:
-            import stripe  # Import here to avoid module-level issues
-            # Initialize Stripe
-            stripe.api_key = current_app.config.get('STRIPE_SECRET_KEY')
-            
-            if stripe.api_key:
-                # Create refund
-                refund = stripe.Refund.create(
-                    payment_intent=booking.stripe_payment_intent_id,
-                    reason='requested_by_customer'
-                )
+            if current_app.config.get('STRIPE_SECRET_KEY'):
+                # Create refund (one refund per booking, even if the request is retried)
+                refund = get_stripe_gateway().create_refund({
+                    'payment_intent': booking.stripe_payment_intent_id,
+                    'reason': 'requested_by_customer'
+                }, idempotency_key=f'refund-booking-{booking.id}')
                 
                 if refund.status == 'succeeded':
                     booking.status = BookingStatus.REFUNDED.value
@@ -220,7 +213,7 @@ def cancel_booking(booking_id):
                 else:
                     current_app.logger.warning(f'Refund pending for booking {booking.id}')
                     
-        except stripe.error.StripeError as e:
+        except stripe.StripeError as e:
             current_app.logger.error(f'Stripe refund error for booking {booking.id}: {str(e)}')
             flash(f'Booking cancelled but refund processing failed: {str(e)}. Please contact support.', 'warning')
             booking.cancel()
@@ -275,9 +268,6 @@ def check_availability():
 @limiter.limit("20 per hour")
 def create_checkout_session(booking_id):
     """Create a Stripe Checkout Session for booking"""
-    import stripe  # Import here to avoid module-level issues
-    from stripe.checkout import Session as CheckoutSession
-    
     booking = Booking.query.get_or_404(booking_id)
 
     # Ensure user owns this booking
@@ -302,37 +292,37 @@ def create_checkout_session(booking_id):
             flash('Payment system configuration error. Please contact support.', 'danger')
             return redirect(url_for('booking.index'))
         
-        stripe.api_key = stripe_key
+        unit_amount = int(float(booking.amount) * 100)  # Convert to cents
 
-        # Create Checkout Session
-        session = CheckoutSession.create(
-            payment_method_types=['card'],
-            line_items=[{
+        # Create Checkout Session (same booking + amount -> same session on retries/double submits)
+        session = get_stripe_gateway().create_checkout_session({
+            'payment_method_types': ['card'],
+            'line_items': [{
                 'price_data': {
                     'currency': booking.currency.lower() if booking.currency else 'usd',
                     'product_data': {
                         'name': f'{booking.package.name} - Momentum Clips',
                         'description': booking.package.description[:500] if booking.package.description else None,
                     },
-                    'unit_amount': int(float(booking.amount) * 100),  # Convert to cents
+                    'unit_amount': unit_amount,
                 },
                 'quantity': 1,
             }],
-            mode='payment',
-            success_url=url_for('booking.payment_success', booking_id=booking.id, _external=True) + '?session_id={CHECKOUT_SESSION_ID}',
-            cancel_url=url_for('booking.payment_cancel', booking_id=booking.id, _external=True),
-            client_reference_id=str(booking.id),
-            metadata={
+            'mode': 'payment',
+            'success_url': url_for('booking.payment_success', booking_id=booking.id, _external=True) + '?session_id={CHECKOUT_SESSION_ID}',
+            'cancel_url': url_for('booking.payment_cancel', booking_id=booking.id, _external=True),
+            'client_reference_id': str(booking.id),
+            'metadata': {
                 'booking_id': str(booking.id),
                 'user_id': str(booking.user_id),
                 'package_name': booking.package.name if booking.package else 'Unknown'
             },
-        )
+        }, idempotency_key=f'checkout-booking-{booking.id}-{unit_amount}')
 
         # Redirect to Stripe Checkout
         return redirect(session.url, code=303)
 
-    except stripe.error.StripeError as e:
+    except stripe.StripeError as e:
         current_app.logger.error(f'Stripe error: {str(e)}')
         flash(f'Payment error: {str(e)}', 'danger')
         return redirect(url_for('booking.payment', booking_id=booking.id))
@@ -346,9 +336,6 @@ def create_checkout_session(booking_id):
 @login_required
 def payment_success(booking_id):
     """Payment success callback"""
-    import stripe  # Import here to avoid module-level issues
-    from stripe.checkout import Session as CheckoutSession
-    
     booking = Booking.query.get_or_404(booking_id)
     
     # Ensure user owns this booking
@@ -361,8 +348,7 @@ def payment_success(booking_id):
     
     if session_id:
         try:
-            stripe.api_key = current_app.config.get('STRIPE_SECRET_KEY')
-            session = CheckoutSession.retrieve(session_id)
+            session = get_stripe_gateway().retrieve_checkout_session(session_id)
             
             # Verify the session belongs to this booking
             if session.client_reference_id == str(booking.id):
@@ -370,17 +356,19 @@ def payment_success(booking_id):
                 if booking.status == BookingStatus.PENDING.value:
                     booking.confirm_payment(
                         payment_intent_id=session.payment_intent,
-                        charge_id=session.payment_intent
+                        charge_id=session.payment_intent,
+                        commit=False
                     )
                     
-                    # Send confirmation email
+                    # Queue confirmation email in the same transaction
                     try:
                         from app.services.email_service import EmailService
                         email_service = EmailService()
-                        email_service.send_booking_confirmation(booking)
-                        current_app.logger.info(f'Confirmation email sent for booking {booking.id}')
+                        email_service.queue_booking_confirmation(booking)
+                        current_app.logger.info(f'Confirmation email queued for booking {booking.id}')
                     except Exception as e:
-                        current_app.logger.error(f'Failed to send confirmation email for booking {booking.id}: {str(e)}')
+                        current_app.logger.error(f'Failed to queue confirmation email for booking {booking.id}: {str(e)}')
+                    db.session.commit()
         except Exception as e:
             current_app.logger.error(f'Error retrieving checkout session: {str(e)}')
     
@@ -407,95 +395,9 @@ def payment_cancel(booking_id):
 @csrf.exempt
 @limiter.exempt
 def stripe_webhook():
-    """Handle Stripe webhook events"""
-    import stripe  # Import here to avoid module-level issues
-    
-    payload = request.get_data(as_text=True)
-    sig_header = request.headers.get('Stripe-Signature')
-    current_app.logger.info(
-        "Stripe webhook received",
-        extra={
-            "has_signature_header": bool(sig_header),
-            "payload_len": len(payload) if payload else 0,
-        },
-    )
-    
-    webhook_secret = current_app.config.get('STRIPE_WEBHOOK_SECRET')
-    
-    if not webhook_secret:
-        current_app.logger.warning('Stripe webhook called but STRIPE_WEBHOOK_SECRET not configured')
-        return jsonify({'error': 'Webhook not configured'}), 400
-    
-    try:
-        stripe.api_key = current_app.config.get('STRIPE_SECRET_KEY')
-        event = stripe.Webhook.construct_event(
-            payload, sig_header, webhook_secret
-        )
-    except ValueError as e:
-        # Invalid payload
-        current_app.logger.error(f'Invalid webhook payload: {str(e)}')
-        return jsonify({'error': 'Invalid payload'}), 400
-    except stripe.error.SignatureVerificationError as e:
-        # Invalid signature
-        current_app.logger.error(f'Invalid webhook signature: {str(e)}')
-        return jsonify({'error': 'Invalid signature'}), 400
-
-    current_app.logger.info(
-        "Stripe webhook verified",
-        extra={
-            "event_type": event.get("type"),
-            "event_id": event.get("id"),
-        },
-    )
-    
-    # Handle the event
-    event_type = event.get('type')
-    obj = (event.get('data') or {}).get('object') or {}
-
-    if event_type in ('checkout.session.completed', 'checkout.session.async_payment_succeeded'):
-        booking_id = obj.get('client_reference_id') or (obj.get('metadata') or {}).get('booking_id')
-        payment_status = obj.get('payment_status')
-        current_app.logger.info(
-            "Stripe checkout session event",
-            extra={
-                "event_type": event_type,
-                "booking_id": booking_id,
-                "session_id": obj.get("id"),
-                "payment_status": payment_status,
-            },
-        )
-        
-        if booking_id:
-            booking = Booking.query.get(int(booking_id))
-            if booking and booking.status == BookingStatus.PENDING.value:
-                booking.confirm_payment(
-                    payment_intent_id=obj.get('payment_intent'),
-                    charge_id=obj.get('payment_intent')
-                )
-                current_app.logger.info(f'Booking {booking_id} confirmed via webhook (Checkout Session)')
-                
-                # Send confirmation email to customer
-                try:
-                    from app.services.email_service import EmailService
-                    email_service = EmailService()
-                    email_service.send_booking_confirmation(booking)
-                    current_app.logger.info(f'Confirmation email sent for booking {booking_id}')
-                except Exception as e:
-                    current_app.logger.error(f'Failed to send confirmation email for booking {booking_id}: {str(e)}')
-                
-    elif event_type in ('checkout.session.expired', 'checkout.session.async_payment_failed'):
-        booking_id = obj.get('client_reference_id') or (obj.get('metadata') or {}).get('booking_id')
-        current_app.logger.warning(f'Checkout session expired for booking {booking_id}')
-        
-        # TODO: Notify customer of session expiration
-    else:
-        # Acknowledge but log unhandled event types for diagnosis
-        current_app.logger.info(
-            "Stripe webhook unhandled event type (acknowledged)",
-            extra={"event_type": event_type},
-        )
-    
-    return jsonify({'status': 'success'}), 200
+    """Handle Stripe webhook events (verify, store, acknowledge)"""
+    from app.services.stripe_events import receive_webhook
+    return receive_webhook()
 
 
 @booking_bp.route('/api/available-dates', methods=['GET'])
@@ -515,17 +417,49 @@ def get_available_dates():
     except ValueError:
         return jsonify({'success': False, 'message': 'Invalid date format'}), 400
 
-    # Get all bookings in this date range
-    bookings = Booking.get_bookings_by_date_range(start_date, end_date)
-
-    # Filter for this package and confirmed/pending status
+    # Only the start times of this package's active bookings
     booked_dates = [
-        booking.booking_date.isoformat()
-        for booking in bookings
-        if booking.package_id == package_id and booking.status in [BookingStatus.CONFIRMED.value, BookingStatus.PENDING.value]
+        booking_date.isoformat()
+        for booking_date in Booking.get_booked_datetimes(package_id, start_date, end_date)
     ]
 
     return jsonify({
         'success': True,
         'booked_dates': booked_dates
     })
+
+
+@booking_bp.route('/api/availability', methods=['GET'])
+@login_required
+def get_availability():
+    """Get free slot start times for every day of a month"""
+    from app.services.availability_service import AvailabilityService
+
+    package_id = request.args.get('package_id', type=int)
+    month_str = request.args.get('month')
+
+    if not package_id or not month_str:
+        return jsonify({'success': False, 'message': 'Missing parameters'}), 400
+
+    try:
+        month_start = datetime.strptime(month_str, '%Y-%m')
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid month format (expected YYYY-MM)'}), 400
+
+    package = Package.query.get_or_404(package_id)
+
+    availability = AvailabilityService()
+    free_slots = availability.free_slots(
+        package.id,
+        month_start.year,
+        month_start.month,
+        duration_hours=package.duration
+    )
+
+    return jsonify({
+        'success': True,
+        'package_id': package.id,
+        'month': month_start.strftime('%Y-%m'),
+        'slot_minutes': availability.slot_minutes,
+        'free_slots': free_slots
+    })
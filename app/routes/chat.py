@@ -0,0 +1,81 @@
+"""
+Customer chat over SocketIO
+
+Events on the /chat namespace:
+    client -> server  'message'     {'message': '...'}
+    server -> client  'chunk'       {'text': '...'} as tokens arrive
+    server -> client  'done'        {} when the reply is complete
+    server -> client  'chat_error'  {'error': '...'}
+"""
+import time
+
+from flask import current_app, request
+from flask_socketio import Namespace, emit
+
+from app.services.chat_service import (
+    ChatHistory, chat_enabled, chat_system_context, spend_message_budget, stream_slots
+)
+from app.utils import metrics
+
+
+class ChatNamespace(Namespace):
+    """Streams AIService.chat_stream replies to the browser"""
+
+    def on_connect(self):
+        if not chat_enabled():
+            return False
+        metrics.incr('chat.connections')
+
+    def on_disconnect(self):
+        ChatHistory(request.sid).clear()
+
+    def on_message(self, data):
+        from app.services.ai_service import AIService
+
+        message = str((data or {}).get('message') or '').strip()
+        if not message:
+            emit('chat_error', {'error': 'Please enter a message.'})
+            return
+        max_chars = current_app.config.get('CHAT_MAX_MESSAGE_CHARS', 1000)
+        if len(message) > max_chars:
+            emit('chat_error', {'error': f'Please keep messages under {max_chars} characters.'})
+            return
+
+        if not spend_message_budget(request.sid, request.remote_addr):
+            metrics.incr('chat.rejected_budget')
+            emit('chat_error', {'error': "You've sent a lot of messages. Please try again later or contact us by email."})
+            return
+
+        if not stream_slots.try_acquire(current_app.config.get('CHAT_MAX_CONCURRENT_STREAMS', 20)):
+            metrics.incr('chat.rejected_busy')
+            emit('chat_error', {'error': 'Our assistant is busy right now. Please try again in a moment.'})
+            return
+
+        metrics.gauge('chat.active_streams', stream_slots.active)
+        history = ChatHistory(request.sid)
+        start = time.perf_counter()
+        reply = []
+        try:
+            ai_service = AIService()
+            messages, summary = history.load(), history.load_summary()
+            recent, new_summary = ai_service.roll_up_history(messages, summary)
+            if new_summary != summary:
+                history.replace(recent, new_summary)
+
+            for text in ai_service.chat_stream(message, recent, chat_system_context(), summary=new_summary):
+                if not reply:
+                    metrics.observe('chat.ttft', (time.perf_counter() - start) * 1000.0)
+                reply.append(text)
+                emit('chunk', {'text': text})
+        except Exception as e:
+            current_app.logger.error(f'Chat stream error: {str(e)}')
+            metrics.incr('chat.errors')
+            emit('chat_error', {'error': 'Sorry, something went wrong. Please try again.'})
+            return
+        finally:
+            stream_slots.release()
+            metrics.gauge('chat.active_streams', stream_slots.active)
+            metrics.observe('chat.stream', (time.perf_counter() - start) * 1000.0)
+
+        history.append({'role': 'user', 'content': message}, {'role': 'assistant', 'content': ''.join(reply)})
+        emit('done', {})
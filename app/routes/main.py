@@ -9,7 +9,6 @@ from app import db, limiter, csrf
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 import re
-import hashlib
 
 main_bp = Blueprint('main', __name__)
 
@@ -54,6 +53,7 @@ def gallery():
         videos = Video.get_by_filters(location=location, style=style, level=level)
     else:
         videos = Video.get_recent_videos(limit=24)
+    Video.load_pending_counts(videos)
 
     return render_template(
         'gallery/index.html',
@@ -81,6 +81,7 @@ def video_detail(video_id):
     )
     # Remove current video from related
     related_videos = [v for v in related_videos if v.id != video.id][:3]
+    Video.load_pending_counts([video] + related_videos)
 
     return render_template(
         'gallery/video_detail.html',
@@ -153,6 +154,7 @@ def api_videos():
     limit = request.args.get('limit', 12, type=int)
 
     videos = Video.get_by_filters(location=location, style=style, level=level, limit=limit)
+    Video.load_pending_counts(videos)
 
     return jsonify({
         'success': True,
@@ -225,13 +227,12 @@ def newsletter_subscribe():
             # Create new subscription
             subscriber = Newsletter(email=email)
             db.session.add(subscriber)
-            db.session.commit()
             
-            # Send welcome email
+            # Queue welcome email in the same transaction
             try:
                 from app.services.email_service import EmailService
                 email_service = EmailService()
-                email_service.send_email(
+                email_service.queue_email(
                     to=email,
                     subject='Welcome to Momentum Clips!',
                     template='newsletter_welcome',
@@ -240,6 +241,8 @@ def newsletter_subscribe():
             except Exception as e:
                 current_app.logger.error(f'Newsletter welcome email error: {str(e)}')
             
+            db.session.commit()
+            
             flash('Thanks for subscribing! Check your email for a welcome message.', 'success')
         
         return redirect(request.referrer or url_for('main.index'))
@@ -343,13 +346,11 @@ def waiver_submit(token):
         # Update booking status
         booking.waiver_signed = True
         
-        db.session.commit()
-        
-        # Send confirmation email
+        # Queue confirmation email in the same transaction
         try:
             from app.services.email_service import EmailService
             email_service = EmailService()
-            email_service.send_email(
+            email_service.queue_email(
                 to=client_email,
                 subject='Waiver Signed - Momentum Clips',
                 template='waiver_confirmation',
@@ -361,6 +362,8 @@ def waiver_submit(token):
         except Exception as e:
             current_app.logger.error(f'Waiver confirmation email error: {str(e)}')
         
+        db.session.commit()
+        
         flash('Thank you! Your waiver has been signed successfully.', 'success')
         return render_template(
             'waiver_complete.html',
@@ -440,22 +443,19 @@ def waiver_standalone():
 
 
 def generate_waiver_token(booking_id):
-    """Generate a secure token for waiver link"""
-    secret = current_app.config.get('SECRET_KEY', 'default-secret')
-    data = f"{booking_id}-{secret}"
-    return hashlib.sha256(data.encode()).hexdigest()[:32]
+    """Generate a signed token for a waiver link"""
+    booking = Booking.query.get(booking_id)
+    if not booking:
+        raise ValueError("Unknown booking")
+    return booking.generate_waiver_token()
 
 
 def decode_waiver_token(token):
-    """Decode waiver token - for now just look up booking by checking all"""
-    # In production, you'd want to store token->booking_id mapping
-    # For now, iterate through recent bookings to find match
-    from app.models.booking import Booking
-    bookings = Booking.query.order_by(Booking.created_at.desc()).limit(1000).all()
-    for booking in bookings:
-        if generate_waiver_token(booking.id) == token:
-            return booking.id
-    raise ValueError("Invalid token")
+    """Decode a waiver token to its booking ID"""
+    booking_id = Booking.verify_waiver_token(token)
+    if booking_id is None:
+        raise ValueError("Invalid token")
+    return booking_id
 
 
 @main_bp.route('/health')
@@ -482,14 +482,12 @@ def health_check():
         health_status['services']['database'] = f'error: {str(e)}'
         health_status['status'] = 'unhealthy'
     
-    # Check Redis connectivity (if configured)
+    # Check Redis connectivity (if configured) on the shared pool
     if redis_client:
-        try:
-            redis_client.ping()
-            health_status['services']['redis'] = 'ok'
-        except Exception as e:
-            health_status['services']['redis'] = f'error: {str(e)}'
-            # Redis is optional, so don't mark as unhealthy
+        from app.utils.redis_pool import probe
+        ok, latency_ms, error = probe(redis_client)
+        # Redis is optional, so don't mark as unhealthy
+        health_status['services']['redis'] = f'ok ({latency_ms:.1f} ms)' if ok else f'error: {error}'
     else:
         health_status['services']['redis'] = 'not configured'
     
@@ -497,3 +495,36 @@ def health_check():
     status_code = 200 if health_status['status'] == 'healthy' else 503
     
     return jsonify(health_status), status_code
+
+
+@main_bp.route('/health/metrics')
+def health_metrics():
+    """
+    In-process metrics for this worker (counters, gauges, timings)
+
+    Only for admins or scrapers sending `Authorization: Bearer <METRICS_TOKEN>`;
+    everyone else gets a 404, so the endpoint is not advertised and anonymous
+    hits never reach the database.
+    """
+    import hmac
+    from flask import abort
+    from flask_login import current_user
+
+    token = current_app.config.get('METRICS_TOKEN')
+    supplied = request.headers.get('Authorization', '')
+    token_ok = bool(token) and hmac.compare_digest(supplied.encode(), f'Bearer {token}'.encode())
+    if not token_ok and not (current_user.is_authenticated and current_user.is_admin):
+        abort(404)
+
+    from app.utils import metrics
+    from app.services.counter_service import video_counters
+
+    from app.models.email_outbox import EmailOutbox
+
+    metrics.gauge('video_counters.unflushed_local_deltas', video_counters.unflushed_count())
+    try:
+        metrics.gauge('email_outbox.depth', EmailOutbox.pending_count())
+    except Exception as e:
+        current_app.logger.warning(f'Email outbox depth unavailable: {str(e)[:80]}')
+
+    return jsonify(metrics.snapshot())
@@ -3,10 +3,14 @@ Payment routes for Stripe Checkout
 Flow: Payment → Waiver → Calendly Booking
 """
 from flask import Blueprint, redirect, url_for, flash, request, current_app, render_template, session
-from app import db, csrf
+from app import db, csrf, limiter
 from app.services.email_service import EmailService
+from app.services.stripe_gateway import get_stripe_gateway
+from app.utils import metrics
 from urllib.parse import urlencode
 import hashlib
+import secrets
+import stripe
 from datetime import datetime
 
 payment_bp = Blueprint('payment', __name__)
@@ -39,15 +43,6 @@ def _generate_waiver_confirm_token(waiver_id: int) -> str:
     return hashlib.sha256(data.encode()).hexdigest()[:32]
 
 
-def get_stripe():
-    """Get configured stripe module"""
-    import stripe
-    stripe_key = current_app.config.get('STRIPE_SECRET_KEY')
-    if stripe_key:
-        stripe.api_key = stripe_key
-    return stripe
-
-
 @payment_bp.route('/checkout/<package>')
 def checkout(package):
     """Create Stripe Checkout session and redirect to payment"""
@@ -74,27 +69,19 @@ def checkout(package):
     
     pkg = PACKAGES[package]
     
+    # Repeated clicks in this browser session reuse the same Checkout Session
+    key_name = f'checkout_key_{package}'
+    if key_name not in session:
+        session[key_name] = secrets.token_hex(16)
+
     try:
-        # Import stripe and configure (Stripe v7.x works reliably with explicit submodule import)
-        import stripe
-        from stripe.checkout import Session as CheckoutSession
-        stripe.api_key = stripe_key
-        current_app.logger.info(f"Stripe version: {getattr(stripe, 'VERSION', 'unknown')}")
-        # Safe diagnostics (no secrets): key kind + length can help spot malformed env values
-        current_app.logger.info(
-            "Stripe key diagnostics",
-            extra={
-                "stripe_key_kind": ("sk_live" if stripe_key.startswith("sk_live_") else ("sk_test" if stripe_key.startswith("sk_test_") else "other")),
-                "stripe_key_len": len(stripe_key) if isinstance(stripe_key, str) else None,
-                "stripe_api_key_type": type(getattr(stripe, "api_key", None)).__name__,
-            },
-        )
-        
+        gateway = get_stripe_gateway()
+
         # Create Checkout Session
-        checkout_session = CheckoutSession.create(
-            payment_method_types=['card'],
-            allow_promotion_codes=True,
-            line_items=[{
+        checkout_session = gateway.create_checkout_session({
+            'payment_method_types': ['card'],
+            'allow_promotion_codes': True,
+            'line_items': [{
                 'price_data': {
                     'currency': 'eur',
                     'product_data': {
@@ -105,25 +92,23 @@ def checkout(package):
                 },
                 'quantity': 1,
             }],
-            mode='payment',
-            success_url=url_for('payment.success', package=package, _external=True) + '?session_id={CHECKOUT_SESSION_ID}',
-            cancel_url=url_for('payment.cancelled', _external=True),
-            metadata={
+            'mode': 'payment',
+            'success_url': url_for('payment.success', package=package, _external=True) + '?session_id={CHECKOUT_SESSION_ID}',
+            'cancel_url': url_for('payment.cancelled', _external=True),
+            'metadata': {
                 'package': package,
                 'package_name': pkg['name']
             },
-        )
+        }, idempotency_key=f'checkout-{package}-{session[key_name]}')
         
         current_app.logger.info(f'Checkout session created: {checkout_session.id}')
         return redirect(checkout_session.url, code=303)
         
-    except stripe.error.StripeError as e:
+    except stripe.StripeError as e:
         current_app.logger.error(f'Stripe Error: {str(e)}')
         flash('Unable to process payment. Please try again.', 'danger')
         return redirect(url_for('main.packages'))
     except Exception as e:
-        # Full traceback is critical here: we are seeing AttributeError post-200 from Stripe,
-        # which suggests an internal library issue (not Stripe credentials).
         key_kind = 'sk_live' if stripe_key.startswith('sk_live_') else ('sk_test' if stripe_key.startswith('sk_test_') else 'other')
         current_app.logger.exception(
             'Payment Error (unexpected exception after Stripe call)',
@@ -142,34 +127,37 @@ def success(package):
     """Handle successful payment - redirect to waiver"""
     session_id = request.args.get('session_id')
     
-    if not session_id:
+    if not session_id or package not in PACKAGES:
         flash('Invalid payment session.', 'danger')
         return redirect(url_for('main.packages'))
     
-    # Verify the payment was successful
-    stripe_key = current_app.config.get('STRIPE_SECRET_KEY')
-    if stripe_key:
+    from app.models.public_booking import PublicBooking
+
+    # Normally the checkout.session.completed webhook has already recorded the payment
+    booking = PublicBooking.query.filter_by(stripe_checkout_session_id=session_id).first()
+    if booking is not None and booking.paid_at is not None:
+        metrics.incr('payment.success.local')
+    elif current_app.config.get('STRIPE_SECRET_KEY'):
+        # Webhook not here yet: one short, no-retry lookup instead of waiting on Stripe
+        metrics.incr('payment.success.stripe_fallback')
         try:
-            import stripe
-            stripe.api_key = stripe_key
-            from stripe.checkout import Session as CheckoutSession
-            checkout_session = CheckoutSession.retrieve(session_id)
+            checkout_session = get_stripe_gateway().retrieve_checkout_session(session_id, fast=True)
             if checkout_session.payment_status != 'paid':
                 flash('Payment was not completed. Please try again.', 'warning')
                 return redirect(url_for('main.packages'))
-        except stripe.error.StripeError as e:
+            booking = PublicBooking.upsert_from_checkout_session(
+                checkout_session, package_key=package, package_name=PACKAGES[package]['name']
+            )
+        except stripe.StripeError as e:
+            # The webhook will fill in the payment details when it arrives
             current_app.logger.error(f'Stripe verification error: {str(e)}')
-    
-    # Store package info in session for waiver flow
-    session['paid_package'] = package
-    session['payment_session_id'] = session_id
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception('Failed to create/update PublicBooking on payment success')
 
-    # Create/update a public booking record (no user login)
-    try:
-        from app.models.public_booking import PublicBooking
-        # Use Checkout Session fields if available
-        booking = PublicBooking.query.filter_by(stripe_checkout_session_id=session_id).first()
-        if not booking:
+    if booking is None:
+        # Unverified placeholder; the webhook fills in the payment details
+        try:
             booking = PublicBooking(
                 package_key=package,
                 package_name=PACKAGES[package]['name'],
@@ -177,23 +165,36 @@ def success(package):
                 status='paid'
             )
             db.session.add(booking)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            booking = PublicBooking.query.filter_by(stripe_checkout_session_id=session_id).first()
+            if booking is None:
+                current_app.logger.exception('Failed to create PublicBooking on payment success')
 
-        # Best-effort: attach Stripe payment_intent and amount
-        if 'checkout_session' in locals():
-            booking.stripe_payment_intent_id = getattr(checkout_session, 'payment_intent', None)
-            booking.amount_cents = int(getattr(checkout_session, 'amount_total', 0) or 0)
-            booking.currency = str(getattr(checkout_session, 'currency', 'eur') or 'eur')
-            booking.paid_at = datetime.utcnow()
-        db.session.commit()
+    # Paid: the next checkout for this package starts a new session
+    session.pop(f'checkout_key_{package}', None)
+
+    # Store package info in session for waiver flow
+    session['paid_package'] = package
+    session['payment_session_id'] = session_id
+    if booking is not None:
         session['public_booking_id'] = booking.id
-    except Exception:
-        current_app.logger.exception('Failed to create/update PublicBooking on payment success')
     
     # Redirect to waiver signing
     flash('Payment successful! Please sign the liability waiver to continue.', 'success')
     return redirect(url_for('payment.waiver', package=package))
 
 
+@payment_bp.route('/webhook', methods=['POST'])
+@csrf.exempt
+@limiter.exempt
+def stripe_webhook():
+    """Handle Stripe webhook events (verify, store, acknowledge)"""
+    from app.services.stripe_events import receive_webhook
+    return receive_webhook()
+
+
 @payment_bp.route('/waiver/<package>', methods=['GET', 'POST'])
 def waiver(package):
     """Display and process liability waiver after payment"""
@@ -353,7 +354,7 @@ def complete(package):
     if session.get('confirmation_emailed_waiver_id') != waiver_id:
         try:
             email_service = EmailService()
-            email_service.send_email(
+            email_service.queue_email(
                 to=waiver.client_email,
                 subject='Booking Confirmed',
                 template='package_confirmation',
@@ -361,8 +362,10 @@ def complete(package):
                 package=pkg,
                 package_key=package,
             )
+            db.session.commit()
             session['confirmation_emailed_waiver_id'] = waiver_id
         except Exception:
-            current_app.logger.exception('Failed to send package confirmation email')
+            db.session.rollback()
+            current_app.logger.exception('Failed to queue package confirmation email')
 
     return render_template('payment/complete.html', waiver=waiver, pkg=pkg, package_key=package)
@@ -1,6 +1,31 @@
-from .ai_service import AIService
-from .payment_service import PaymentService
-from .social_service import SocialMediaService
-from .email_service import EmailService
+"""
+Service layer
 
-__all__ = ['AIService', 'PaymentService', 'SocialMediaService', 'EmailService']
+Services are resolved on first attribute access (PEP 562), so importing
+the package - which `app/__init__.py` does for `mail` - does not pull in
+the anthropic, stripe and requests SDKs before create_app runs.
+"""
+import importlib
+
+_LAZY = {
+    'AIService': '.ai_service',
+    'AsyncAIService': '.ai_service',
+    'PaymentService': '.payment_service',
+    'SocialMediaService': '.social_service',
+    'EmailService': '.email_service',
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
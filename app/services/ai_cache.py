@@ -0,0 +1,169 @@
+"""
+Content-addressed cache for single-prompt AI completions
+
+Responses are keyed by a hash of (model, normalized prompt, max_tokens,
+temperature), so re-posting the same video or a repeated FAQ-style inquiry
+is answered from the cache instead of another Claude call. Entries live in
+Redis when it is configured, otherwise in a local SQLite file; each AIService
+method has its own TTL (AI_CACHE_TTLS).
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from flask import current_app
+
+from app.utils import metrics
+
+
+CACHE_KEY = 'ai_cache:{digest}'
+
+
+def _redis():
+    """Get the shared Redis client (None when Redis is not configured)"""
+    import app as app_module
+    return app_module.redis_client
+
+
+def normalize_prompt(prompt):
+    """Collapse whitespace so formatting-only differences share an entry"""
+    return ' '.join(prompt.split())
+
+
+def cache_key(model, prompt, max_tokens, temperature=None):
+    """
+    Cache key for one completion request
+
+    Args:
+        model: Claude model name
+        prompt: Prompt text
+        max_tokens: max_tokens of the request
+        temperature: temperature of the request (None: API default)
+
+    Returns:
+        Key string
+    """
+    material = json.dumps([model, normalize_prompt(prompt), max_tokens, temperature], separators=(',', ':'))
+    return CACHE_KEY.format(digest=hashlib.sha256(material.encode('utf-8')).hexdigest())
+
+
+class _SQLiteStore:
+    """Local fallback store: one connection per process, shared by threads"""
+
+    def __init__(self, path):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS ai_cache '
+            '(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS ix_ai_cache_expires_at ON ai_cache (expires_at)')
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value FROM ai_cache WHERE key = ? AND expires_at > ?', (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        with self._lock:
+            self._conn.execute('DELETE FROM ai_cache WHERE expires_at <= ?', (now,))
+            self._conn.execute(
+                'INSERT OR REPLACE INTO ai_cache (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, value, now + ttl)
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def _sqlite_store():
+    """Get this process's SQLite store for the configured path"""
+    path = current_app.config.get('AI_CACHE_SQLITE_PATH') or os.path.join(current_app.instance_path, 'ai_cache.sqlite3')
+    store = _stores.get(path)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(path)
+            if store is None:
+                store = _stores[path] = _SQLiteStore(path)
+    return store
+
+
+def reset_ai_cache():
+    """Close and drop local stores (used by tests)"""
+    with _stores_lock:
+        stores = list(_stores.values())
+        _stores.clear()
+    for store in stores:
+        store.close()
+
+
+class AIResponseCache:
+    """Reads and writes cached completions for one AIService method"""
+
+    def __init__(self, method):
+        """
+        Args:
+            method: AIService method name (selects the TTL and metric names)
+        """
+        self.method = method
+        ttls = current_app.config.get('AI_CACHE_TTLS') or {}
+        self.ttl = ttls.get(method, 0) if current_app.config.get('AI_CACHE_ENABLED', True) else 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def get(self, key):
+        """
+        Cached response text for key
+
+        Returns:
+            Text, or None on a miss (or when caching is off for this method)
+        """
+        if not self.enabled:
+            return None
+
+        start = time.perf_counter()
+        value = None
+        redis_client = _redis()
+        try:
+            if redis_client is not None:
+                value = redis_client.get(key)
+                if isinstance(value, bytes):
+                    value = value.decode('utf-8')
+            else:
+                value = _sqlite_store().get(key)
+        except Exception as e:
+            current_app.logger.warning(f'AI cache read failed: {str(e)[:80]}')
+
+        metrics.observe('ai_cache.get', (time.perf_counter() - start) * 1000.0)
+        metrics.incr(f'ai_cache.{self.method}.{"hits" if value is not None else "misses"}')
+        return value
+
+    def set(self, key, value):
+        """Store response text for key with this method's TTL"""
+        if not self.enabled or value is None:
+            return
+
+        redis_client = _redis()
+        try:
+            if redis_client is not None:
+                redis_client.setex(key, self.ttl, value)
+            else:
+                _sqlite_store().set(key, value, self.ttl)
+        except Exception as e:
+            current_app.logger.warning(f'AI cache write failed: {str(e)[:80]}')
@@ -1,6 +1,129 @@
 import anthropic
+import httpx
+from concurrent.futures import ThreadPoolExecutor
 from flask import current_app
 import os
+import threading
+
+from app.utils import metrics
+
+
+CAPTION_MODEL = 'claude-sonnet-4-5-20250929'  # Use Sonnet 4 for most powerful AI
+CAPTION_MAX_TOKENS = 300
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def caption_prompt(video_title, video_description, platform):
+    """Prompt for a platform-specific video caption (shared with the batch caption pipeline)"""
+    return f"""Generate an engaging social media caption for a snowboard video.
+
+Video Title: {video_title}
+Video Description: {video_description}
+Platform: {platform}
+
+Requirements:
+- Engaging and exciting tone
+- Include relevant hashtags
+- Keep it concise and action-oriented
+- Match the platform's style ({platform})
+- Include a call-to-action
+
+Generate only the caption, no additional text."""
+
+
+def get_anthropic_client(api_key):
+    """
+    Get this process's Anthropic client for an API key
+
+    One client (and so one keep-alive connection pool) per key, shared by
+    every AIService instance instead of a new pool and TLS handshake per use.
+
+    Args:
+        api_key: Anthropic API key
+
+    Returns:
+        anthropic.Anthropic instance
+    """
+    client = _clients.get(api_key)
+    if client is not None:
+        return client
+
+    config = current_app.config
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            timeout = httpx.Timeout(
+                config.get('ANTHROPIC_TIMEOUT', 60.0),
+                connect=config.get('ANTHROPIC_CONNECT_TIMEOUT', 5.0)
+            )
+            client = anthropic.Anthropic(
+                api_key=api_key,
+                base_url=config.get('ANTHROPIC_BASE_URL'),
+                timeout=timeout,
+                max_retries=config.get('ANTHROPIC_MAX_RETRIES', 2),
+                http_client=anthropic.DefaultHttpxClient(
+                    timeout=timeout,
+                    limits=httpx.Limits(
+                        max_connections=config.get('ANTHROPIC_MAX_CONNECTIONS', 20),
+                        max_keepalive_connections=config.get('ANTHROPIC_MAX_KEEPALIVE', 10)
+                    )
+                )
+            )
+            _clients[api_key] = client
+    return client
+
+
+def estimate_tokens(text):
+    """Rough token count for history budgeting (about 4 characters per token)"""
+    return len(text or '') // 4 + 1
+
+
+def trim_history(conversation_history, budget):
+    """
+    Split history into (older, recent) so recent fits within `budget` tokens
+
+    recent keeps the newest messages and always starts with a user turn.
+    """
+    start = len(conversation_history)
+    used = 0
+    for index in range(len(conversation_history) - 1, -1, -1):
+        used += estimate_tokens(conversation_history[index]['content'])
+        if used > budget:
+            break
+        start = index
+    while start < len(conversation_history) and conversation_history[start]['role'] != 'user':
+        start += 1
+    return conversation_history[:start], conversation_history[start:]
+
+
+def system_blocks(system_context, summary=None):
+    """
+    System prompt as content blocks
+
+    A plain string becomes one block with a cache breakpoint; a list of
+    blocks is used as given (the caller marks its breakpoints). The summary
+    changes every few turns, so it goes last, after the cached prefix.
+    """
+    if not system_context:
+        blocks = []
+    elif isinstance(system_context, str):
+        blocks = [{'type': 'text', 'text': system_context, 'cache_control': {'type': 'ephemeral'}}]
+    else:
+        blocks = [dict(block) for block in system_context]
+    if summary:
+        blocks.append({'type': 'text', 'text': f'Summary of the earlier conversation:\n{summary}'})
+    return blocks
+
+
+def reset_anthropic_clients():
+    """Close and drop cached clients (used by tests)"""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
 
 
 class AIService:
@@ -13,53 +136,125 @@ class AIService:
         if not api_key:
             raise ValueError("ANTHROPIC_API_KEY not found in configuration")
 
-        self.client = anthropic.Anthropic(api_key=api_key)
+        self.client = get_anthropic_client(api_key)
         self.model = current_app.config.get('CLAUDE_MODEL', 'claude-sonnet-4-5-20250929')
         self.max_tokens = current_app.config.get('CLAUDE_MAX_TOKENS', 1024)
         self.temperature = current_app.config.get('CLAUDE_TEMPERATURE', 0.7)
 
-    def chat(self, message, conversation_history=None, system_context=None):
+    def _complete(self, method, prompt, model, max_tokens, bypass_cache=False):
+        """
+        Single-prompt completion through the response cache
+
+        Args:
+            method: Calling method name (selects the cache TTL)
+            prompt: User prompt
+            model: Claude model name
+            max_tokens: Response token limit
+            bypass_cache: Skip the cache read and refresh the entry
+
+        Returns:
+            Response text
+
+        Raises:
+            anthropic.APIError: The API call failed (nothing is cached)
+        """
+        from app.services.ai_cache import AIResponseCache, cache_key
+
+        cache = AIResponseCache(method)
+        key = cache_key(model, prompt, max_tokens)
+        if bypass_cache:
+            metrics.incr(f'ai_cache.{method}.bypassed')
+        else:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+
+        response = self.client.messages.create(
+            model=model,
+            max_tokens=max_tokens,
+            messages=[{
+                'role': 'user',
+                'content': prompt
+            }]
+        )
+
+        text = ""
+        for content_block in response.content:
+            if content_block.type == 'text':
+                text += content_block.text
+
+        cache.set(key, text)
+        return text
+
+    def _chat_params(self, message, conversation_history=None, system_context=None, summary=None):
+        """
+        Build the Messages API request for one chat turn
+
+        History is trimmed newest-first to CHAT_HISTORY_TOKEN_BUDGET; turns
+        beyond it should already be rolled into `summary` (see
+        roll_up_history). The system context goes first with cache
+        breakpoints so repeated turns reuse the prompt cache.
+        """
+        budget = current_app.config.get('CHAT_HISTORY_TOKEN_BUDGET', 2000)
+        _, recent_history = trim_history(conversation_history or [], budget)
+
+        # Build messages array
+        messages = list(recent_history)
+        messages.append({
+            'role': 'user',
+            'content': message
+        })
+
+        request_params = {
+            'model': self.model,
+            'max_tokens': self.max_tokens,
+            'temperature': self.temperature,
+            'messages': messages
+        }
+
+        system = system_blocks(system_context, summary)
+        if system:
+            request_params['system'] = system
+        return request_params
+
+    def _record_usage(self, usage):
+        """Log input tokens and prompt cache hit rate for one chat turn"""
+        if usage is None:
+            return
+        cache_read = getattr(usage, 'cache_read_input_tokens', 0) or 0
+        cache_write = getattr(usage, 'cache_creation_input_tokens', 0) or 0
+        input_tokens = (usage.input_tokens or 0) + cache_read + cache_write
+        hit_rate = cache_read / input_tokens if input_tokens else 0.0
+
+        metrics.incr('ai.chat.turns')
+        metrics.incr('ai.chat.input_tokens', input_tokens)
+        metrics.incr('ai.chat.cache_read_tokens', cache_read)
+        metrics.incr('ai.chat.cache_write_tokens', cache_write)
+        metrics.gauge('ai.chat.cache_hit_rate', round(hit_rate, 3))
+        current_app.logger.info(
+            f'Chat turn: {input_tokens} input tokens ({cache_read} cache read, '
+            f'{cache_write} cache write), cache hit rate {hit_rate:.0%}'
+        )
+
+    def chat(self, message, conversation_history=None, system_context=None, summary=None):
         """
         Send a message to Claude and get a response
 
         Args:
             message: User message string
             conversation_history: List of previous messages [{'role': 'user/assistant', 'content': '...'}]
-            system_context: System prompt for context
+            system_context: System prompt (string, or content blocks carrying their own cache breakpoints)
+            summary: Summary of turns rolled out of the history
 
         Returns:
             AI response string
         """
         try:
-            # Build messages array
-            messages = []
-
-            # Add conversation history if provided
-            if conversation_history:
-                # Limit history to last 10 messages to stay within token limits
-                recent_history = conversation_history[-10:]
-                messages.extend(recent_history)
-
-            # Add current message
-            messages.append({
-                'role': 'user',
-                'content': message
-            })
-
-            # Create request parameters
-            request_params = {
-                'model': self.model,
-                'max_tokens': self.max_tokens,
-                'temperature': self.temperature,
-                'messages': messages
-            }
-
-            # Add system context if provided
-            if system_context:
-                request_params['system'] = system_context
-
             # Make API call
-            response = self.client.messages.create(**request_params)
+            response = self.client.messages.create(
+                **self._chat_params(message, conversation_history, system_context, summary)
+            )
+            self._record_usage(getattr(response, 'usage', None))
 
             # Extract response text
             response_text = ""
@@ -73,109 +268,108 @@ class AIService:
             current_app.logger.error(f'Claude API Error: {str(e)}')
             raise Exception(f'AI service error: {str(e)}')
 
-    def chat_stream(self, message, conversation_history=None, system_context=None):
+    def chat_stream(self, message, conversation_history=None, system_context=None, summary=None):
         """
         Send a message to Claude and stream the response
 
         Args:
             message: User message string
             conversation_history: List of previous messages
-            system_context: System prompt for context
+            system_context: System prompt (string or content blocks)
+            summary: Summary of turns rolled out of the history
 
         Yields:
             Response text chunks as they arrive
         """
         try:
-            # Build messages array
-            messages = []
-
-            # Add conversation history if provided
-            if conversation_history:
-                # Limit history to last 10 messages
-                recent_history = conversation_history[-10:]
-                messages.extend(recent_history)
-
-            # Add current message
-            messages.append({
-                'role': 'user',
-                'content': message
-            })
-
-            # Create request parameters
-            request_params = {
-                'model': self.model,
-                'max_tokens': self.max_tokens,
-                'temperature': self.temperature,
-                'messages': messages
-            }
-
-            # Add system context if provided
-            if system_context:
-                request_params['system'] = system_context
-
             # Make streaming API call
-            with self.client.messages.stream(**request_params) as stream:
+            with self.client.messages.stream(
+                **self._chat_params(message, conversation_history, system_context, summary)
+            ) as stream:
                 for text in stream.text_stream:
                     yield text
+                self._record_usage(getattr(stream.get_final_message(), 'usage', None))
 
         except anthropic.APIError as e:
             current_app.logger.error(f'Claude API Streaming Error: {str(e)}')
             raise Exception(f'AI streaming error: {str(e)}')
 
-    def generate_caption(self, video_title, video_description, platform='instagram'):
+    def roll_up_history(self, conversation_history, summary=None):
         """
-        Generate social media caption for a video
+        Fold the oldest turns into a running summary once history exceeds its budget
+
+        History is cut back to half of CHAT_HISTORY_TOKEN_BUDGET so the
+        summary is only rewritten every few turns, not on every turn.
 
         Args:
-            video_title: Title of the video
-            video_description: Description of the video
-            platform: Social media platform (instagram, tiktok, facebook, linkedin)
+            conversation_history: Stored messages, oldest first
+            summary: Current summary of earlier turns (or None)
 
         Returns:
-            Generated caption string
+            (recent_history, summary); unchanged if within budget or the summary call fails
         """
-        prompt = f"""Generate an engaging social media caption for a snowboard video.
+        budget = current_app.config.get('CHAT_HISTORY_TOKEN_BUDGET', 2000)
+        if sum(estimate_tokens(m['content']) for m in conversation_history) <= budget:
+            return conversation_history, summary
 
-Video Title: {video_title}
-Video Description: {video_description}
-Platform: {platform}
+        older, recent = trim_history(conversation_history, budget // 2)
+        transcript = '\n'.join(f"{m['role'].title()}: {m['content']}" for m in older)
+        prompt = f"""Summarize this customer chat with a snowboard video production service so an assistant can continue it.
+Keep names, dates, packages, prices, and open questions. Reply with the summary only.
 
-Requirements:
-- Engaging and exciting tone
-- Include relevant hashtags
-- Keep it concise and action-oriented
-- Match the platform's style ({platform})
-- Include a call-to-action
+{'Summary so far: ' + summary if summary else ''}
 
-Generate only the caption, no additional text."""
+{transcript}"""
 
         try:
             response = self.client.messages.create(
-                model='claude-sonnet-4-5-20250929',  # Use Sonnet 4 for most powerful AI
-                max_tokens=300,
-                messages=[{
-                    'role': 'user',
-                    'content': prompt
-                }]
+                model=current_app.config.get('CHAT_SUMMARY_MODEL') or self.model,
+                max_tokens=current_app.config.get('CHAT_SUMMARY_MAX_TOKENS', 300),
+                messages=[{'role': 'user', 'content': prompt}]
             )
+        except anthropic.APIError as e:
+            current_app.logger.warning(f'Chat summary error: {str(e)}')
+            return conversation_history, summary
 
-            caption = ""
-            for content_block in response.content:
-                if content_block.type == 'text':
-                    caption += content_block.text
+        new_summary = ''.join(block.text for block in response.content if block.type == 'text').strip()
+        metrics.incr('ai.chat.summaries')
+        return recent, new_summary or summary
+
+    def generate_caption(self, video_title, video_description, platform='instagram', bypass_cache=False):
+        """
+        Generate social media caption for a video
+
+        Args:
+            video_title: Title of the video
+            video_description: Description of the video
+            platform: Social media platform (instagram, tiktok, facebook, linkedin)
+            bypass_cache: Always call Claude (the fresh caption replaces the cached one)
 
+        Returns:
+            Generated caption string
+        """
+        prompt = caption_prompt(video_title, video_description, platform)
+
+        try:
+            caption = self._complete(
+                'generate_caption', prompt,
+                model=CAPTION_MODEL,
+                max_tokens=CAPTION_MAX_TOKENS,
+                bypass_cache=bypass_cache
+            )
             return caption.strip()
 
         except anthropic.APIError as e:
             current_app.logger.error(f'Caption generation error: {str(e)}')
             return None
 
-    def analyze_customer_inquiry(self, inquiry_text):
+    def analyze_customer_inquiry(self, inquiry_text, bypass_cache=False):
         """
         Analyze customer inquiry and categorize intent
 
         Args:
             inquiry_text: Customer's message or inquiry
+            bypass_cache: Always call Claude
 
         Returns:
             Dict with intent, category, and suggested action
@@ -200,20 +394,13 @@ Respond in JSON format:
 }}"""
 
         try:
-            response = self.client.messages.create(
+            result = self._complete(
+                'analyze_customer_inquiry', prompt,
                 model='claude-sonnet-4-5-20250929',
                 max_tokens=150,
-                messages=[{
-                    'role': 'user',
-                    'content': prompt
-                }]
+                bypass_cache=bypass_cache
             )
 
-            result = ""
-            for content_block in response.content:
-                if content_block.type == 'text':
-                    result += content_block.text
-
             # Parse JSON response
             import json
             return json.loads(result.strip())
@@ -226,12 +413,13 @@ Respond in JSON format:
                 'suggested_action': 'Route to human support'
             }
 
-    def generate_booking_summary(self, booking_data):
+    def generate_booking_summary(self, booking_data, bypass_cache=False):
         """
         Generate a friendly booking confirmation summary
 
         Args:
             booking_data: Dict with booking details
+            bypass_cache: Always call Claude
 
         Returns:
             Friendly confirmation message
@@ -248,22 +436,86 @@ Details:
 Create a short, enthusiastic confirmation message (2-3 sentences) that makes the customer excited about their upcoming session."""
 
         try:
-            response = self.client.messages.create(
+            message = self._complete(
+                'generate_booking_summary', prompt,
                 model='claude-sonnet-4-5-20250929',
                 max_tokens=200,
-                messages=[{
-                    'role': 'user',
-                    'content': prompt
-                }]
+                bypass_cache=bypass_cache
             )
-
-            message = ""
-            for content_block in response.content:
-                if content_block.type == 'text':
-                    message += content_block.text
-
             return message.strip()
 
         except anthropic.APIError as e:
             current_app.logger.error(f'Booking summary generation error: {str(e)}')
             return "Your booking has been confirmed! We can't wait to capture your epic moments on the slopes."
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Process-wide worker pool, created on first use (after eventlet has monkey-patched threading)"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=current_app.config.get('AI_MAX_CONCURRENCY', 8),
+                    thread_name_prefix='ai'
+                )
+    return _executor
+
+
+class AsyncAIService:
+    """
+    Non-blocking AIService
+
+    Each method submits the AIService call to a bounded process-wide pool and
+    returns a concurrent.futures.Future, so several calls can be in flight at
+    once. Under the eventlet worker threading is monkey-patched: the pool
+    workers are green threads doing cooperative socket I/O, and waiting on
+    `future.result()` yields to the hub instead of blocking it.
+    """
+
+    def __init__(self, service=None):
+        """
+        Args:
+            service: AIService to wrap (default: a new one)
+        """
+        self.app = current_app._get_current_object()
+        self.service = service or AIService()
+        self.executor = _get_executor()
+
+    def submit(self, method, *args, **kwargs):
+        """
+        Run an AIService method in the pool
+
+        Args:
+            method: AIService method name
+
+        Returns:
+            Future resolving to the method's return value
+        """
+        fn = getattr(self.service, method)
+
+        def run():
+            with self.app.app_context():
+                return fn(*args, **kwargs)
+
+        return self.executor.submit(run)
+
+    def chat(self, message, conversation_history=None, system_context=None, summary=None):
+        """Future for AIService.chat"""
+        return self.submit('chat', message, conversation_history, system_context, summary)
+
+    def generate_caption(self, video_title, video_description, platform='instagram', bypass_cache=False):
+        """Future for AIService.generate_caption"""
+        return self.submit('generate_caption', video_title, video_description, platform, bypass_cache=bypass_cache)
+
+    def analyze_customer_inquiry(self, inquiry_text, bypass_cache=False):
+        """Future for AIService.analyze_customer_inquiry"""
+        return self.submit('analyze_customer_inquiry', inquiry_text, bypass_cache=bypass_cache)
+
+    def generate_booking_summary(self, booking_data, bypass_cache=False):
+        """Future for AIService.generate_booking_summary"""
+        return self.submit('generate_booking_summary', booking_data, bypass_cache=bypass_cache)
@@ -0,0 +1,201 @@
+"""
+Per-package slot availability
+
+Each day is a bitmask over the configured slot grid (bit i set = slot i taken).
+A month is computed from one projection over (package_id, status, booking_date)
+and cached per package/month until a booking in that month is created,
+cancelled or confirmed (cleared once that change commits).
+
+The cache belongs in Redis, where every worker sees the invalidation. The
+in-process fallback without Redis only hears about bookings made in its own
+worker, so it keeps months for AVAILABILITY_LOCAL_CACHE_TTL seconds only:
+another worker's booking can show as free for at most that long.
+"""
+import json
+import threading
+import time
+from calendar import monthrange
+from datetime import datetime, date, timedelta
+from math import ceil
+
+from flask import current_app
+
+
+# Statuses that hold a slot (same as Booking.is_slot_available)
+ACTIVE_STATUSES = ('pending', 'confirmed')
+
+CACHE_KEY = 'availability:{package_id}:{year:04d}-{month:02d}'
+
+_local_cache = {}
+_local_lock = threading.Lock()
+
+
+def _redis():
+    """Get the shared Redis client (None when Redis is not configured)"""
+    import app as app_module
+    return app_module.redis_client
+
+
+class AvailabilityService:
+    """Answers slot availability for a package a month at a time"""
+
+    def __init__(self):
+        """Load the slot grid from configuration"""
+        self.start_hour = current_app.config.get('BOOKING_SLOT_START_HOUR', 9)
+        self.end_hour = current_app.config.get('BOOKING_SLOT_END_HOUR', 17)
+        self.slot_minutes = current_app.config.get('BOOKING_SLOT_MINUTES', 60)
+        self.cache_ttl = current_app.config.get('AVAILABILITY_CACHE_TTL', 3600)
+        self.local_cache_ttl = current_app.config.get('AVAILABILITY_LOCAL_CACHE_TTL', 30)
+        self.slot_count = max(1, (self.end_hour - self.start_hour) * 60 // self.slot_minutes)
+
+    def slot_start(self, day, index):
+        """Get the start datetime of slot `index` on `day`"""
+        return datetime(day.year, day.month, day.day, self.start_hour) + timedelta(minutes=index * self.slot_minutes)
+
+    def _slots_needed(self, duration_hours):
+        """Number of consecutive slots a booking of this length occupies"""
+        return min(self.slot_count, max(1, ceil((duration_hours or 1) * 60 / self.slot_minutes)))
+
+    def _build_month(self, package_id, year, month, duration_hours):
+        """Compute {day_iso: taken_mask} for one package/month from the database"""
+        from app import db
+        from app.models.booking import Booking
+
+        month_start = datetime(year, month, 1)
+        month_end = month_start + timedelta(days=monthrange(year, month)[1])
+
+        # Only the columns needed, filtered by the (package_id, status, booking_date) index
+        rows = db.session.query(Booking.booking_date).filter(
+            Booking.package_id == package_id,
+            Booking.status.in_(ACTIVE_STATUSES),
+            Booking.booking_date >= month_start,
+            Booking.booking_date < month_end
+        ).all()
+
+        needed = self._slots_needed(duration_hours)
+        bitmap = {}
+        for (booking_date,) in rows:
+            minutes = (booking_date.hour - self.start_hour) * 60 + booking_date.minute
+            first = max(0, minutes // self.slot_minutes)
+            last = min(self.slot_count, ceil((minutes + needed * self.slot_minutes) / self.slot_minutes))
+            if first >= last:
+                continue
+            mask = ((1 << (last - first)) - 1) << first
+            key = booking_date.date().isoformat()
+            bitmap[key] = bitmap.get(key, 0) | mask
+
+        return bitmap
+
+    def month_bitmap(self, package_id, year, month, duration_hours=None):
+        """
+        Get the taken-slot bitmap for a package/month
+
+        Args:
+            package_id: Package ID
+            year: Year
+            month: Month (1-12)
+            duration_hours: Package duration (looked up if not given)
+
+        Returns:
+            Dict mapping ISO day -> bitmask of taken slots (days with no bookings omitted)
+        """
+        key = CACHE_KEY.format(package_id=package_id, year=year, month=month)
+
+        redis_client = _redis()
+        if redis_client is not None:
+            try:
+                cached = redis_client.get(key)
+                if cached is not None:
+                    return json.loads(cached)
+            except Exception as e:
+                current_app.logger.warning(f'Availability cache read failed: {str(e)[:80]}')
+        else:
+            with _local_lock:
+                cached = _local_cache.get(key)
+            if cached is not None and cached[0] > time.time():
+                return cached[1]
+
+        if duration_hours is None:
+            from app import db
+            from app.models.package import Package
+            duration_hours = db.session.query(Package.duration).filter(Package.id == package_id).scalar()
+
+        bitmap = self._build_month(package_id, year, month, duration_hours)
+
+        if redis_client is not None:
+            try:
+                redis_client.setex(key, self.cache_ttl, json.dumps(bitmap))
+            except Exception as e:
+                current_app.logger.warning(f'Availability cache write failed: {str(e)[:80]}')
+        else:
+            with _local_lock:
+                _local_cache[key] = (time.time() + self.local_cache_ttl, bitmap)
+
+        return bitmap
+
+    def free_slots(self, package_id, year, month, duration_hours=None, now=None):
+        """
+        Get bookable slot start times for every day of a month
+
+        A slot is offered when the package's full duration fits in free slots
+        and the start respects BOOKING_BUFFER_HOURS / BOOKING_ADVANCE_DAYS.
+
+        Returns:
+            Dict mapping ISO day -> list of 'HH:MM' start times
+        """
+        if duration_hours is None:
+            from app import db
+            from app.models.package import Package
+            duration_hours = db.session.query(Package.duration).filter(Package.id == package_id).scalar()
+
+        bitmap = self.month_bitmap(package_id, year, month, duration_hours)
+        needed = self._slots_needed(duration_hours)
+        window = (1 << needed) - 1
+
+        now = now or datetime.utcnow()
+        earliest = now + timedelta(hours=current_app.config.get('BOOKING_BUFFER_HOURS', 24))
+        latest = now + timedelta(days=current_app.config.get('BOOKING_ADVANCE_DAYS', 90))
+
+        result = {}
+        for day_number in range(1, monthrange(year, month)[1] + 1):
+            day = date(year, month, day_number)
+            taken = bitmap.get(day.isoformat(), 0)
+            slots = []
+            for index in range(self.slot_count - needed + 1):
+                if taken & (window << index):
+                    continue
+                start = self.slot_start(day, index)
+                if earliest <= start <= latest:
+                    slots.append(start.strftime('%H:%M'))
+            result[day.isoformat()] = slots
+
+        return result
+
+    @staticmethod
+    def invalidate(package_id, when):
+        """
+        Drop the cached month containing `when` for a package
+
+        Args:
+            package_id: Package ID
+            when: Booking datetime whose month changed
+        """
+        if package_id is None or when is None:
+            return
+        key = CACHE_KEY.format(package_id=package_id, year=when.year, month=when.month)
+
+        with _local_lock:
+            _local_cache.pop(key, None)
+
+        redis_client = _redis()
+        if redis_client is not None:
+            try:
+                redis_client.delete(key)
+            except Exception:
+                pass
+
+    @staticmethod
+    def clear_local_cache():
+        """Drop every locally cached month (used by tests)"""
+        with _local_lock:
+            _local_cache.clear()
@@ -0,0 +1,261 @@
+"""
+Batch caption generation for the video library
+
+Collects one (video, platform) job per missing caption as a `pending`
+VideoCaption row, then either submits the jobs through the Message Batches
+API (half price, no per-request round trips) or, when batches are
+unavailable, generates them with a bounded pool of concurrent calls. Rows
+are the checkpoint: a rerun collects results of batches submitted earlier
+and only submits what is still pending.
+"""
+import time
+
+import anthropic
+from flask import current_app
+
+from app.utils import metrics
+
+
+def _batches(client):
+    """Message Batches resource (GA `messages.batches`, or the beta one on older SDKs)"""
+    return getattr(client.messages, 'batches', None) or client.beta.messages.batches
+
+
+class CaptionPipeline:
+    """Generates VideoCaption rows for every video and platform"""
+
+    def __init__(self, mode=None, platforms=None):
+        """
+        Args:
+            mode: 'batch' (Message Batches API) or 'pool' (concurrent calls); default CAPTION_MODE
+            platforms: Platforms to caption (default CAPTION_PLATFORMS)
+        """
+        from app.services.ai_service import AIService
+
+        self.service = AIService()
+        self.mode = mode or current_app.config.get('CAPTION_MODE', 'batch')
+        self.platforms = tuple(platforms or current_app.config.get('CAPTION_PLATFORMS', ('instagram',)))
+        self.batch_size = current_app.config.get('CAPTION_BATCH_SIZE', 1000)
+        self.poll_interval = current_app.config.get('CAPTION_POLL_INTERVAL', 30)
+
+    def collect_jobs(self, regenerate=False):
+        """
+        Create pending rows for missing captions and requeue failed ones
+
+        Args:
+            regenerate: Also requeue captions that are already done
+
+        Returns:
+            Number of pending jobs
+        """
+        from app import db
+        from app.models.video import Video
+        from app.models.video_caption import VideoCaption
+
+        requeue = [VideoCaption.STATUS_FAILED]
+        if regenerate:
+            requeue.append(VideoCaption.STATUS_DONE)
+        VideoCaption.query.filter(
+            VideoCaption.platform.in_(self.platforms),
+            VideoCaption.status.in_(requeue)
+        ).update({'status': VideoCaption.STATUS_PENDING, 'batch_id': None, 'error': None}, synchronize_session=False)
+
+        existing = set(
+            db.session.query(VideoCaption.video_id, VideoCaption.platform)
+            .filter(VideoCaption.platform.in_(self.platforms))
+        )
+        video_ids = [video_id for (video_id,) in db.session.query(Video.id).order_by(Video.id)]
+        db.session.add_all([
+            VideoCaption(video_id=video_id, platform=platform, status=VideoCaption.STATUS_PENDING)
+            for video_id in video_ids
+            for platform in self.platforms
+            if (video_id, platform) not in existing
+        ])
+        db.session.commit()
+
+        return self._pending_query().count()
+
+    def _pending_query(self):
+        from app.models.video_caption import VideoCaption
+
+        return VideoCaption.query.filter(
+            VideoCaption.platform.in_(self.platforms),
+            VideoCaption.status == VideoCaption.STATUS_PENDING
+        ).order_by(VideoCaption.id)
+
+    def _prompt(self, job):
+        from app.services.ai_service import caption_prompt
+        return caption_prompt(job.video.title, job.video.description or "", job.platform)
+
+    def _finish(self, job, caption):
+        """Store a generated caption and seed the response cache with it"""
+        from app.models.video_caption import VideoCaption
+        from app.services.ai_cache import AIResponseCache, cache_key
+        from app.services.ai_service import CAPTION_MODEL, CAPTION_MAX_TOKENS
+
+        job.caption = caption.strip()
+        job.status = VideoCaption.STATUS_DONE
+        job.model = CAPTION_MODEL
+        job.error = None
+        AIResponseCache('generate_caption').set(cache_key(CAPTION_MODEL, self._prompt(job), CAPTION_MAX_TOKENS), caption)
+        metrics.incr('captions.done')
+
+    def _fail(self, job, error):
+        from app.models.video_caption import VideoCaption
+
+        job.status = VideoCaption.STATUS_FAILED
+        job.error = str(error)[:2000]
+        metrics.incr('captions.failed')
+
+    # ------------------------------------------------------------------
+    # Message Batches
+    # ------------------------------------------------------------------
+
+    def submit_batches(self):
+        """
+        Submit pending jobs, one Message Batch per CAPTION_BATCH_SIZE jobs
+
+        Returns:
+            List of submitted batch ids
+        """
+        from app import db
+        from app.models.video_caption import VideoCaption
+        from app.services.ai_service import CAPTION_MODEL, CAPTION_MAX_TOKENS
+
+        batch_ids = []
+        while True:
+            jobs = self._pending_query().limit(self.batch_size).all()
+            if not jobs:
+                return batch_ids
+
+            batch = _batches(self.service.client).create(requests=[{
+                'custom_id': job.custom_id,
+                'params': {
+                    'model': CAPTION_MODEL,
+                    'max_tokens': CAPTION_MAX_TOKENS,
+                    'messages': [{'role': 'user', 'content': self._prompt(job)}]
+                }
+            } for job in jobs])
+
+            for job in jobs:
+                job.status = VideoCaption.STATUS_SUBMITTED
+                job.batch_id = batch.id
+            db.session.commit()
+            batch_ids.append(batch.id)
+            metrics.incr('captions.submitted', len(jobs))
+            current_app.logger.info(f'Submitted {len(jobs)} caption jobs as batch {batch.id}')
+
+    def collect_results(self):
+        """
+        Store results of every submitted batch that has ended
+
+        Returns:
+            Number of batches still processing
+        """
+        from app import db
+        from app.models.video_caption import VideoCaption
+
+        batches = _batches(self.service.client)
+        batch_ids = [batch_id for (batch_id,) in db.session.query(VideoCaption.batch_id).filter(
+            VideoCaption.status == VideoCaption.STATUS_SUBMITTED
+        ).distinct()]
+
+        running = 0
+        for batch_id in batch_ids:
+            if batches.retrieve(batch_id).processing_status != 'ended':
+                running += 1
+                continue
+
+            jobs = {job.custom_id: job for job in VideoCaption.query.filter_by(
+                batch_id=batch_id, status=VideoCaption.STATUS_SUBMITTED
+            )}
+            for entry in batches.results(batch_id):
+                job = jobs.pop(entry.custom_id, None)
+                if job is None:
+                    continue
+                if entry.result.type == 'succeeded':
+                    text = ''.join(block.text for block in entry.result.message.content if block.type == 'text')
+                    self._finish(job, text)
+                else:
+                    error = getattr(entry.result, 'error', None) or entry.result.type
+                    self._fail(job, error)
+            for job in jobs.values():
+                self._fail(job, f'No result in batch {batch_id}')
+            db.session.commit()
+
+        return running
+
+    # ------------------------------------------------------------------
+    # Concurrent fallback
+    # ------------------------------------------------------------------
+
+    def run_pool(self):
+        """Generate pending captions with concurrent calls (AI_MAX_CONCURRENCY at a time)"""
+        from app import db
+        from app.services.ai_service import AsyncAIService
+
+        async_service = AsyncAIService(self.service)
+        page_size = current_app.config.get('AI_MAX_CONCURRENCY', 8) * 4
+        while True:
+            jobs = self._pending_query().limit(page_size).all()
+            if not jobs:
+                return
+            futures = [
+                async_service.generate_caption(job.video.title, job.video.description or "", job.platform)
+                for job in jobs
+            ]
+            for job, future in zip(jobs, futures):
+                try:
+                    caption = future.result()
+                except Exception as e:
+                    self._fail(job, e)
+                    continue
+                if caption:
+                    self._finish(job, caption)
+                else:
+                    self._fail(job, 'Caption generation failed')
+            db.session.commit()
+
+    def run(self, regenerate=False, wait=False, sleep=time.sleep):
+        """
+        Collect jobs and generate (or resume generating) their captions
+
+        Args:
+            regenerate: Also redo captions that are already done
+            wait: In batch mode, poll until every submitted batch has ended
+            sleep: Sleep function between polls
+
+        Returns:
+            Dict with caption counts by status
+        """
+        from app import db
+        from app.models.video_caption import VideoCaption
+
+        if self.mode != 'pool':
+            try:
+                # Collect earlier runs' batches first so their failures are requeued now
+                self.collect_results()
+                pending = self.collect_jobs(regenerate=regenerate)
+                current_app.logger.info(f'{pending} caption job(s) pending')
+                self.submit_batches()
+                while wait and self.collect_results():
+                    sleep(self.poll_interval)
+            except (anthropic.NotFoundError, anthropic.PermissionDeniedError) as e:
+                db.session.rollback()
+                current_app.logger.warning(f'Message Batches unavailable, using concurrent calls: {str(e)}')
+                self.mode = 'pool'
+
+        if self.mode == 'pool':
+            pending = self.collect_jobs(regenerate=regenerate)
+            current_app.logger.info(f'{pending} caption job(s) pending (concurrent calls)')
+            self.run_pool()
+
+        counts = dict(
+            db.session.query(VideoCaption.status, db.func.count(VideoCaption.id))
+            .filter(VideoCaption.platform.in_(self.platforms))
+            .group_by(VideoCaption.status)
+        )
+        return {status: counts.get(status, 0) for status in (
+            VideoCaption.STATUS_PENDING, VideoCaption.STATUS_SUBMITTED,
+            VideoCaption.STATUS_DONE, VideoCaption.STATUS_FAILED
+        )}
@@ -0,0 +1,233 @@
+"""
+Customer chat support for the /chat SocketIO namespace
+
+Conversation history is kept server-side per connection (a Redis list, or a
+local dict without Redis) so the browser only sends the new message. It is
+bounded by CHAT_HISTORY_TOKEN_BUDGET: older turns are rolled into a stored
+summary rather than dropped. Concurrent AI streams are capped per worker,
+and messages are budgeted per connection and per client IP.
+"""
+import json
+import threading
+import time
+
+from flask import current_app
+
+
+HISTORY_KEY = 'chat:history:{conversation_id}'
+SUMMARY_KEY = 'chat:summary:{conversation_id}'
+BUDGET_KEY = 'chat:budget:{scope}:{identity}'
+
+_local_histories = {}
+_local_summaries = {}
+_local_budgets = {}
+_local_lock = threading.Lock()
+
+
+def _redis():
+    """Get the shared Redis client (None when Redis is not configured)"""
+    import app as app_module
+    return app_module.redis_client
+
+
+def chat_enabled():
+    """Chat needs CHAT_ENABLED and an Anthropic API key"""
+    return bool(current_app.config.get('CHAT_ENABLED') and current_app.config.get('ANTHROPIC_API_KEY'))
+
+
+def spend_message_budget(sid, ip):
+    """
+    Count one message against the connection's and the client IP's budgets
+
+    Counters are shared by all workers through Redis (a fixed window per
+    key), or kept per worker without Redis.
+
+    Args:
+        sid: SocketIO session id
+        ip: Client address
+
+    Returns:
+        True if both are still within their CHAT_BUDGET_WINDOW limit
+    """
+    config = current_app.config
+    window = config.get('CHAT_BUDGET_WINDOW', 600)
+    limits = {
+        BUDGET_KEY.format(scope='sid', identity=sid): config.get('CHAT_MESSAGES_PER_CONNECTION', 20),
+        BUDGET_KEY.format(scope='ip', identity=ip): config.get('CHAT_MESSAGES_PER_IP', 60),
+    }
+
+    redis_client = _redis()
+    if redis_client is not None:
+        try:
+            pipe = redis_client.pipeline(transaction=True)
+            for key in limits:
+                pipe.set(key, 0, ex=window, nx=True)  # The first message starts the window
+                pipe.incr(key)
+            counts = pipe.execute()[1::2]
+            return all(count <= limit for count, limit in zip(counts, limits.values()))
+        except Exception as e:
+            current_app.logger.warning(f'Chat budget check failed, counting locally: {str(e)[:80]}')
+
+    now = time.time()
+    with _local_lock:
+        for key in [key for key, (expires, _) in _local_budgets.items() if expires <= now]:
+            del _local_budgets[key]
+        allowed = True
+        for key, limit in limits.items():
+            expires, count = _local_budgets.get(key, (now + window, 0))
+            _local_budgets[key] = (expires, count + 1)
+            allowed = allowed and count + 1 <= limit
+        return allowed
+
+
+def reset_message_budgets():
+    """Forget per-worker message budgets (used by tests)"""
+    with _local_lock:
+        _local_budgets.clear()
+
+
+def chat_system_context():
+    """
+    System prompt for the customer chat assistant
+
+    Two blocks, the static instructions and the knowledge block (packages,
+    contact), with one cache breakpoint after both: they are identical across
+    turns and conversations. The instructions alone are far below the
+    minimum cacheable prompt length, so they get no breakpoint of their own.
+    """
+    from app.routes.payment import PACKAGES
+
+    app_name = current_app.config.get('APP_NAME', 'Momentum Clips')
+    instructions = f"""You are the friendly booking assistant for {app_name}, a snowboard video production service in Bansko, Bulgaria.
+Answer questions about sessions, pricing, filming and booking. Keep answers short and point customers to the Packages page to book."""
+
+    packages = '\n'.join(
+        f"- {package['name']}: EUR {package['price'] / 100:.0f}, {package['duration']}"
+        for package in PACKAGES.values()
+    )
+    knowledge = f"""Packages:
+{packages}
+
+Contact: {current_app.config.get('SUPPORT_EMAIL', '')}"""
+
+    return [
+        {'type': 'text', 'text': instructions},
+        {'type': 'text', 'text': knowledge, 'cache_control': {'type': 'ephemeral'}}
+    ]
+
+
+class ChatHistory:
+    """Message history for one conversation"""
+
+    def __init__(self, conversation_id):
+        """
+        Args:
+            conversation_id: Conversation key (the SocketIO session id)
+        """
+        self.key = HISTORY_KEY.format(conversation_id=conversation_id)
+        self.summary_key = SUMMARY_KEY.format(conversation_id=conversation_id)
+        self.ttl = current_app.config.get('CHAT_HISTORY_TTL', 3600)
+
+    def load(self):
+        """
+        Get the stored messages, oldest first
+
+        Returns:
+            List of {'role': 'user/assistant', 'content': '...'}
+        """
+        redis_client = _redis()
+        if redis_client is not None:
+            try:
+                return [json.loads(item) for item in redis_client.lrange(self.key, 0, -1)]
+            except Exception as e:
+                current_app.logger.warning(f'Chat history read failed: {str(e)[:80]}')
+                return []
+        with _local_lock:
+            return list(_local_histories.get(self.key, ()))
+
+    def append(self, *messages):
+        """Add messages (roll_up_history keeps the stored history within its token budget)"""
+        redis_client = _redis()
+        if redis_client is not None:
+            try:
+                pipe = redis_client.pipeline(transaction=True)
+                pipe.rpush(self.key, *[json.dumps(message) for message in messages])
+                pipe.expire(self.key, self.ttl)
+                pipe.execute()
+            except Exception as e:
+                current_app.logger.warning(f'Chat history write failed: {str(e)[:80]}')
+            return
+        with _local_lock:
+            _local_histories.setdefault(self.key, []).extend(messages)
+
+    def load_summary(self):
+        """Summary of turns rolled out of the history, or None"""
+        redis_client = _redis()
+        if redis_client is not None:
+            try:
+                summary = redis_client.get(self.summary_key)
+                return summary.decode('utf-8') if isinstance(summary, bytes) else summary
+            except Exception as e:
+                current_app.logger.warning(f'Chat summary read failed: {str(e)[:80]}')
+                return None
+        with _local_lock:
+            return _local_summaries.get(self.summary_key)
+
+    def replace(self, messages, summary):
+        """Store a rolled-up history: the remaining messages plus the new summary"""
+        redis_client = _redis()
+        if redis_client is not None:
+            try:
+                pipe = redis_client.pipeline(transaction=True)
+                pipe.delete(self.key)
+                if messages:
+                    pipe.rpush(self.key, *[json.dumps(message) for message in messages])
+                    pipe.expire(self.key, self.ttl)
+                pipe.setex(self.summary_key, self.ttl, summary or '')
+                pipe.execute()
+            except Exception as e:
+                current_app.logger.warning(f'Chat history write failed: {str(e)[:80]}')
+            return
+        with _local_lock:
+            _local_histories[self.key] = list(messages)
+            _local_summaries[self.summary_key] = summary
+
+    def clear(self):
+        """Forget the conversation"""
+        redis_client = _redis()
+        if redis_client is not None:
+            try:
+                redis_client.delete(self.key, self.summary_key)
+            except Exception as e:
+                current_app.logger.warning(f'Chat history delete failed: {str(e)[:80]}')
+            return
+        with _local_lock:
+            _local_histories.pop(self.key, None)
+            _local_summaries.pop(self.summary_key, None)
+
+
+class StreamSlots:
+    """Per-worker cap on concurrent AI chat streams"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = 0
+
+    @property
+    def active(self):
+        return self._active
+
+    def try_acquire(self, limit):
+        """Take a slot if fewer than `limit` streams are running"""
+        with self._lock:
+            if self._active >= limit:
+                return False
+            self._active += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self._active = max(0, self._active - 1)
+
+
+stream_slots = StreamSlots()
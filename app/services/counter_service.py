@@ -0,0 +1,406 @@
+"""
+Write-behind buffer for video view/like counters
+
+Page views and likes only record a delta here; a background flusher applies
+the accumulated deltas for many videos in one UPDATE. Deltas live in Redis
+when it is configured (HINCRBY, survives a worker crash), otherwise in an
+in-process sharded counter (lost if the worker dies before a flush).
+
+A Redis flush claims the live hash by renaming it to a key of its own, so
+concurrent flushers never read the same deltas, and deletes the claim right
+after the UPDATE commits. Claims left by a crashed or failed flush are taken
+over by the next flusher once they are stale. Each claimed hash carries a
+claim id that keeps across take-overs; the UPDATE records it in
+video_counter_claims in the same transaction, so a claim whose flusher died
+after COMMIT but before deleting it is released, not applied twice.
+"""
+import threading
+import time
+import uuid
+
+from flask import current_app
+from sqlalchemy import case, func
+
+from app.utils import metrics
+
+
+FIELDS = ('views', 'likes')
+COLUMNS = {'views': 'view_count', 'likes': 'like_count'}
+
+REDIS_KEY = 'video_counters'
+REDIS_CLAIM_PREFIX = 'video_counters:flushing:'  # + '<claimed at>:<uuid>'
+REDIS_CLAIMS_KEY = 'video_counters:claims'  # Set of claim keys not yet applied
+REDIS_LEGACY_FLUSHING_KEY = 'video_counters:flushing'  # Single claim key of older workers
+CLAIM_ID_FIELD = 'claim_id'  # Hash field naming the claim; set on first claim, kept on take-over
+
+# Atomically rename KEYS[1] to KEYS[2] and move it in the KEYS[3] claim set.
+# Only one caller can win a key: the source is gone once it is renamed.
+CLAIM_SCRIPT = """
+redis.call('SREM', KEYS[3], KEYS[1])
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('RENAME', KEYS[1], KEYS[2])
+redis.call('HSETNX', KEYS[2], ARGV[1], KEYS[2])
+redis.call('SADD', KEYS[3], KEYS[2])
+return 1
+"""
+
+
+class VideoCounterBuffer:
+    """Aggregates video counter increments between flushes"""
+
+    def __init__(self, shards=16):
+        self._shards = [{} for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._flusher_started = False
+
+    # ------------------------------------------------------------------
+    # Backends
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _redis():
+        """Get the shared Redis client (None when Redis is not configured)"""
+        import app as app_module
+        return app_module.redis_client
+
+    def _shard(self, video_id):
+        index = video_id % len(self._shards)
+        return self._shards[index], self._locks[index]
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def increment(self, video_id, field, amount=1):
+        """
+        Record a counter increment
+
+        Args:
+            video_id: Video primary key
+            field: 'views' or 'likes'
+            amount: Delta to add (default: 1)
+        """
+        if field not in FIELDS:
+            raise ValueError(f"Unknown counter field: {field}")
+
+        redis_client = self._redis()
+        if redis_client is not None:
+            try:
+                redis_client.hincrby(REDIS_KEY, f'{video_id}:{field}', amount)
+                return
+            except Exception as e:
+                current_app.logger.warning(f'Redis counter increment failed, buffering locally: {str(e)[:80]}')
+
+        shard, lock = self._shard(video_id)
+        with lock:
+            key = (video_id, field)
+            shard[key] = shard.get(key, 0) + amount
+
+    def pending(self, video_id):
+        """
+        Get unflushed deltas for a video
+
+        Args:
+            video_id: Video primary key
+
+        Returns:
+            Dict {'views': int, 'likes': int}
+        """
+        return self.pending_many([video_id])[video_id]
+
+    def pending_many(self, video_ids):
+        """
+        Get unflushed deltas for many videos in one Redis round trip
+
+        Args:
+            video_ids: Video primary keys
+
+        Returns:
+            Dict {video_id: {'views': int, 'likes': int}}
+        """
+        video_ids = list(dict.fromkeys(video_ids))
+        result = {video_id: {field: 0 for field in FIELDS} for video_id in video_ids}
+        if not video_ids:
+            return result
+
+        for video_id in video_ids:
+            shard, lock = self._shard(video_id)
+            with lock:
+                for field in FIELDS:
+                    result[video_id][field] += shard.get((video_id, field), 0)
+
+        redis_client = self._redis()
+        if redis_client is not None:
+            try:
+                hash_fields = [(video_id, field, f'{video_id}:{field}') for video_id in video_ids for field in FIELDS]
+                names = [name for _, _, name in hash_fields]
+                pipe = redis_client.pipeline(transaction=False)
+                pipe.hmget(REDIS_KEY, names)
+                pipe.smembers(REDIS_CLAIMS_KEY)
+                live, claims = pipe.execute()
+                batches = [live]
+                if claims:
+                    # Deltas being flushed right now still count until their UPDATE commits
+                    pipe = redis_client.pipeline(transaction=False)
+                    for claim in claims:
+                        pipe.hmget(claim, names)
+                    batches.extend(pipe.execute())
+                for values in batches:
+                    for (video_id, field, _), value in zip(hash_fields, values):
+                        result[video_id][field] += int(value or 0)
+            except Exception as e:
+                current_app.logger.warning(f'Redis counter read failed: {str(e)[:80]}')
+
+        return result
+
+    def unflushed_count(self):
+        """Number of deltas buffered in this process (lost if it crashes)"""
+        total = 0
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                total += sum(shard.values())
+        return total
+
+    def reset(self):
+        """Discard all locally buffered deltas (used by tests)"""
+        self._drain_local()
+
+    def _drain_local(self):
+        """Swap out all local shards and return the merged deltas"""
+        deltas = {}
+        for index, lock in enumerate(self._locks):
+            with lock:
+                shard = self._shards[index]
+                self._shards[index] = {}
+            for (video_id, field), amount in shard.items():
+                deltas.setdefault(video_id, {f: 0 for f in FIELDS})[field] += amount
+        return deltas
+
+    def _restore_local(self, deltas):
+        """Put deltas back after a failed flush"""
+        for video_id, fields in deltas.items():
+            for field, amount in fields.items():
+                if amount:
+                    shard, lock = self._shard(video_id)
+                    with lock:
+                        shard[(video_id, field)] = shard.get((video_id, field), 0) + amount
+
+    @staticmethod
+    def _claim_key(claimed_at=None):
+        """New claim key; a claimed_at of 0 makes it stale (up for grabs) at once"""
+        claimed_at = int(time.time()) if claimed_at is None else claimed_at
+        return f'{REDIS_CLAIM_PREFIX}{claimed_at}:{uuid.uuid4().hex}'
+
+    @staticmethod
+    def _is_stale(claim, stale_seconds):
+        try:
+            claimed_at = int(claim[len(REDIS_CLAIM_PREFIX):].split(':', 1)[0])
+        except ValueError:
+            return True
+        return claimed_at <= time.time() - stale_seconds
+
+    def _claim_redis(self, redis_client):
+        """
+        Claim the live hash and any stale claims for this flush
+
+        Returns:
+            List of claim keys now owned by this flusher
+        """
+        claim = redis_client.register_script(CLAIM_SCRIPT)
+        stale_seconds = current_app.config.get('VIDEO_COUNTER_CLAIM_STALE_SECONDS', 300)
+
+        sources = [REDIS_KEY, REDIS_LEGACY_FLUSHING_KEY]
+        for raw in redis_client.smembers(REDIS_CLAIMS_KEY):
+            key = raw.decode() if isinstance(raw, bytes) else raw
+            if self._is_stale(key, stale_seconds):
+                sources.append(key)
+
+        claimed = []
+        for source in sources:
+            target = self._claim_key()
+            if claim(keys=[source, target, REDIS_CLAIMS_KEY], args=[CLAIM_ID_FIELD]):
+                claimed.append(target)
+        return claimed
+
+    @staticmethod
+    def _read_claims(redis_client, claimed):
+        """
+        Read the deltas in the claimed hashes
+
+        Returns:
+            Dict {claim id: {video_id: {'views': int, 'likes': int}}}
+        """
+        claims = {}
+        if not claimed:
+            return claims
+        pipe = redis_client.pipeline(transaction=False)
+        for key in claimed:
+            pipe.hgetall(key)
+        for claim_key, values in zip(claimed, pipe.execute()):
+            claim_id = claim_key
+            deltas = {}
+            for raw_key, raw_value in values.items():
+                key = raw_key.decode() if isinstance(raw_key, bytes) else raw_key
+                if key == CLAIM_ID_FIELD:
+                    claim_id = raw_value.decode() if isinstance(raw_value, bytes) else raw_value
+                    continue
+                video_id, field = key.split(':', 1)
+                if field in FIELDS:
+                    deltas.setdefault(int(video_id), {f: 0 for f in FIELDS})[field] += int(raw_value)
+            claims[claim_id] = deltas
+        return claims
+
+    @staticmethod
+    def _release_claims(redis_client, claimed):
+        """Drop applied claims (one MULTI: the hashes and their claim-set entries)"""
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.delete(*claimed)
+        pipe.srem(REDIS_CLAIMS_KEY, *claimed)
+        pipe.execute()
+
+    def _abandon_claims(self, redis_client, claimed):
+        """Hand claims back after a failed UPDATE: renamed stale, the next flush retries them"""
+        claim = redis_client.register_script(CLAIM_SCRIPT)
+        for key in claimed:
+            claim(keys=[key, self._claim_key(claimed_at=0), REDIS_CLAIMS_KEY], args=[CLAIM_ID_FIELD])
+
+    @staticmethod
+    def _apply(deltas, claim_ids=()):
+        """
+        Apply deltas for many videos with a single UPDATE
+
+        Args:
+            deltas: {video_id: {'views': int, 'likes': int}}
+            claim_ids: Redis claim ids the deltas came from, recorded in the same transaction
+        """
+        from app import db
+        from app.models.video import Video
+        from app.models.video_counter_claim import VideoCounterClaim
+
+        table = Video.__table__
+        values = {}
+        for field in FIELDS:
+            column = table.c[COLUMNS[field]]
+            per_video = {video_id: fields[field] for video_id, fields in deltas.items() if fields[field]}
+            if per_video:
+                values[COLUMNS[field]] = func.coalesce(column, 0) + case(per_video, value=table.c.id, else_=0)
+
+        if values:
+            db.session.execute(
+                table.update().where(table.c.id.in_(list(deltas.keys()))).values(**values)
+            )
+        if claim_ids:
+            retention = current_app.config.get('VIDEO_COUNTER_CLAIM_RETENTION_SECONDS', 86400)
+            VideoCounterClaim.record(claim_ids, retention)
+        db.session.commit()
+
+    def flush(self):
+        """
+        Write all buffered deltas to the database
+
+        Returns:
+            Number of videos updated
+        """
+        start = time.perf_counter()
+        merged = {}
+
+        local = self._drain_local()
+        for video_id, fields in local.items():
+            merged.setdefault(video_id, {f: 0 for f in FIELDS})
+            for field, amount in fields.items():
+                merged[video_id][field] += amount
+
+        redis_client = self._redis()
+        claimed = []
+        claim_ids = []
+        if redis_client is not None:
+            from app.models.video_counter_claim import VideoCounterClaim
+            try:
+                claimed = self._claim_redis(redis_client)
+                remote = self._read_claims(redis_client, claimed)
+                applied = VideoCounterClaim.applied_ids(remote.keys())
+            except Exception as e:
+                current_app.logger.warning(f'Redis counter drain failed: {str(e)[:80]}')
+                # Anything claimed stays in the claim set and is retried once stale
+                claimed, remote, applied = [], {}, set()
+            for claim_id, deltas in remote.items():
+                if claim_id in applied:
+                    # Its flusher committed but died before deleting it: release only
+                    metrics.incr('video_counters.replayed_claims')
+                    continue
+                claim_ids.append(claim_id)
+                for video_id, fields in deltas.items():
+                    merged.setdefault(video_id, {f: 0 for f in FIELDS})
+                    for field, amount in fields.items():
+                        merged[video_id][field] += amount
+
+        if merged or claim_ids:
+            from app import db
+            try:
+                self._apply(merged, claim_ids)
+            except Exception as e:
+                db.session.rollback()
+                self._restore_local(local)
+                if claimed:
+                    try:
+                        self._abandon_claims(redis_client, claimed)
+                    except Exception:
+                        pass  # Still in the claim set; retried once stale
+                current_app.logger.error(f'Video counter flush failed: {str(e)}')
+                metrics.incr('video_counters.flush_errors')
+                raise
+
+        if claimed:
+            # Straight after COMMIT: only a crash in between can replay these deltas
+            try:
+                self._release_claims(redis_client, claimed)
+            except Exception as e:
+                current_app.logger.error(f'Video counter claims not released: {str(e)[:80]}')
+
+        metrics.observe('video_counters.flush', (time.perf_counter() - start) * 1000.0)
+        metrics.incr('video_counters.flushed_deltas', sum(sum(f.values()) for f in merged.values()))
+        metrics.gauge('video_counters.last_flush_at', time.time())
+        metrics.gauge('video_counters.unflushed_local_deltas', self.unflushed_count())
+        return len(merged)
+
+    def start_flusher(self, app, socketio):
+        """
+        Start the periodic background flusher for this worker
+
+        Args:
+            app: Flask application
+            socketio: SocketIO instance (provides an eventlet/thread-safe task runner)
+        """
+        if self._flusher_started:
+            return
+        self._flusher_started = True
+
+        interval = app.config.get('VIDEO_COUNTER_FLUSH_INTERVAL', 10)
+        metrics.gauge('video_counters.flush_interval_seconds', interval)
+
+        def run():
+            while True:
+                socketio.sleep(interval)
+                with app.app_context():
+                    try:
+                        self.flush()
+                    except Exception:
+                        app.logger.exception('Video counter flusher error')
+
+        socketio.start_background_task(run)
+
+        import atexit
+
+        def flush_on_exit():
+            with app.app_context():
+                try:
+                    self.flush()
+                except Exception:
+                    pass
+
+        atexit.register(flush_on_exit)
+
+
+video_counters = VideoCounterBuffer()
@@ -1,9 +1,9 @@
 from flask import current_app, render_template, url_for
-from flask_mail import Mail, Message
+from flask_mail import Message
+import json
 import os
 
-
-mail = Mail()
+from app.services.mail import mail
 
 
 class EmailService:
@@ -14,6 +14,33 @@ class EmailService:
         self.sender = current_app.config.get('MAIL_DEFAULT_SENDER')
         self.app_name = current_app.config.get('APP_NAME', 'Momentum Clips')
 
+    def _render(self, to, subject, template=None, body=None, **kwargs):
+        """
+        Render an email into its final parts
+
+        Returns:
+            Tuple (recipients, subject, html, body)
+        """
+        recipients = [to] if isinstance(to, str) else list(to)
+        full_subject = f'[{self.app_name}] {subject}'
+        html = None
+
+        if template:
+            # Render HTML template
+            html = render_template(f'emails/{template}.html', **kwargs)
+            # Also render plain text version
+            try:
+                text = render_template(f'emails/{template}.txt', **kwargs)
+            except:
+                # If no .txt template, use basic body
+                text = f"Please view this email in an HTML-capable email client."
+        elif body:
+            text = body
+        else:
+            raise ValueError("Either template or body must be provided")
+
+        return recipients, full_subject, html, text
+
     def send_email(self, to, subject, template=None, body=None, **kwargs):
         """
         Send an email
@@ -29,25 +56,14 @@ class EmailService:
             True if sent successfully
         """
         try:
+            recipients, full_subject, html, text = self._render(to, subject, template, body, **kwargs)
             msg = Message(
-                subject=f'[{self.app_name}] {subject}',
-                recipients=[to] if isinstance(to, str) else to,
+                subject=full_subject,
+                recipients=recipients,
                 sender=self.sender
             )
-
-            if template:
-                # Render HTML template
-                msg.html = render_template(f'emails/{template}.html', **kwargs)
-                # Also render plain text version
-                try:
-                    msg.body = render_template(f'emails/{template}.txt', **kwargs)
-                except:
-                    # If no .txt template, use basic body
-                    msg.body = f"Please view this email in an HTML-capable email client."
-            elif body:
-                msg.body = body
-            else:
-                raise ValueError("Either template or body must be provided")
+            msg.html = html
+            msg.body = text
 
             mail.send(msg)
             current_app.logger.info(f'Email sent to {to}: {subject}')
@@ -57,6 +73,54 @@ class EmailService:
             current_app.logger.error(f'Email send error: {str(e)}')
             return False
 
+    def queue_email(self, to, subject, template=None, body=None, **kwargs):
+        """
+        Render an email and add it to the outbox
+
+        The row is added to the current session but not committed, so it is
+        written in the same transaction as the caller's changes. Delivery is
+        done by the outbox worker.
+
+        Args:
+            Same as send_email
+
+        Returns:
+            EmailOutbox instance
+        """
+        from app import db
+        from app.models.email_outbox import EmailOutbox
+
+        recipients, full_subject, html, text = self._render(to, subject, template, body, **kwargs)
+        message = EmailOutbox(
+            recipients=json.dumps(recipients),
+            sender=self.sender,
+            subject=full_subject,
+            html=html,
+            body=text,
+            template=template
+        )
+        db.session.add(message)
+        return message
+
+    def queue_booking_confirmation(self, booking):
+        """
+        Queue booking confirmation email (not committed)
+
+        Args:
+            booking: Booking model instance
+
+        Returns:
+            EmailOutbox instance
+        """
+        return self.queue_email(
+            to=booking.user.email,
+            subject='Booking Confirmation',
+            template='booking_confirmation',
+            booking=booking,
+            user=booking.user,
+            package=booking.package
+        )
+
     def send_booking_confirmation(self, booking):
         """
         Send booking confirmation email
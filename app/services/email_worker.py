@@ -0,0 +1,188 @@
+"""
+Email outbox delivery worker
+
+Drains EmailOutbox rows over a single authenticated SMTP connection,
+retrying failures with exponential backoff and dead-lettering messages
+that keep failing. Runs either as `flask email-worker` or as a background
+task inside the web worker.
+"""
+import random
+import smtplib
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from flask_mail import Message
+
+from app.utils import metrics
+
+
+class EmailOutboxWorker:
+    """Delivers queued emails from the outbox table"""
+
+    def __init__(self):
+        """Load worker settings from configuration"""
+        self.batch_size = current_app.config.get('EMAIL_OUTBOX_BATCH_SIZE', 50)
+        self.max_attempts = current_app.config.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 6)
+        self.backoff_base = current_app.config.get('EMAIL_OUTBOX_BACKOFF_SECONDS', 30)
+        self.backoff_max = current_app.config.get('EMAIL_OUTBOX_BACKOFF_MAX_SECONDS', 3600)
+        self.stale_after = current_app.config.get('EMAIL_OUTBOX_STALE_SECONDS', 600)
+
+    def _backoff(self, attempts):
+        """Delay before the next attempt: exponential with jitter, capped"""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.8, 1.2)
+
+    def _claim_batch(self):
+        """
+        Claim due messages by marking them as sending
+
+        Messages stuck in 'sending' (worker died mid-batch) are reclaimed
+        after EMAIL_OUTBOX_STALE_SECONDS.
+        """
+        from app import db
+        from app.models.email_outbox import EmailOutbox
+
+        now = datetime.utcnow()
+        stale_cutoff = now - timedelta(seconds=self.stale_after)
+
+        query = EmailOutbox.query.filter(
+            db.or_(
+                db.and_(EmailOutbox.status == EmailOutbox.STATUS_PENDING,
+                        EmailOutbox.next_attempt_at <= now),
+                db.and_(EmailOutbox.status == EmailOutbox.STATUS_SENDING,
+                        EmailOutbox.updated_at <= stale_cutoff)
+            )
+        ).order_by(EmailOutbox.id).limit(self.batch_size)
+
+        # Lets several workers drain the table without double-sending (PostgreSQL/MySQL)
+        if db.engine.dialect.name != 'sqlite':
+            query = query.with_for_update(skip_locked=True)
+
+        batch = query.all()
+        for message in batch:
+            message.status = EmailOutbox.STATUS_SENDING
+        db.session.commit()
+        return batch
+
+    def _record_failure(self, message, error):
+        """Schedule a retry, or dead-letter after max attempts"""
+        from app.models.email_outbox import EmailOutbox
+
+        message.attempts += 1
+        message.last_error = str(error)[:2000]
+        if message.attempts >= self.max_attempts:
+            message.status = EmailOutbox.STATUS_DEAD
+            metrics.incr('email_outbox.dead')
+            current_app.logger.error(f'Email {message.id} dead-lettered after {message.attempts} attempts: {str(error)}')
+        else:
+            message.status = EmailOutbox.STATUS_PENDING
+            message.next_attempt_at = datetime.utcnow() + timedelta(seconds=self._backoff(message.attempts))
+            metrics.incr('email_outbox.retried')
+            current_app.logger.warning(f'Email {message.id} failed (attempt {message.attempts}), retrying: {str(error)}')
+
+    def drain_once(self):
+        """
+        Deliver one batch of due messages over a single SMTP connection
+
+        Returns:
+            Number of messages sent
+        """
+        from app import db
+        from app.models.email_outbox import EmailOutbox
+        from app.services.email_service import mail
+
+        batch = self._claim_batch()
+        if not batch:
+            metrics.gauge('email_outbox.depth', EmailOutbox.pending_count())
+            return 0
+
+        sent = 0
+        connection = None
+        try:
+            for message in batch:
+                msg = Message(
+                    subject=message.subject,
+                    recipients=message.recipient_list,
+                    sender=message.sender,
+                    html=message.html,
+                    body=message.body
+                )
+                start = time.perf_counter()
+                try:
+                    if connection is None:
+                        # One authenticated SMTP session for the whole batch
+                        connection = mail.connect()
+                        connection.__enter__()
+                    connection.send(msg)
+                except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError) as e:
+                    # Connection-level failure: drop it so the next message reconnects
+                    self._close(connection)
+                    connection = None
+                    self._record_failure(message, e)
+                except Exception as e:
+                    self._record_failure(message, e)
+                else:
+                    message.status = EmailOutbox.STATUS_SENT
+                    message.sent_at = datetime.utcnow()
+                    message.last_error = None
+                    sent += 1
+                    metrics.incr('email_outbox.sent')
+                finally:
+                    metrics.observe('email_outbox.send', (time.perf_counter() - start) * 1000.0)
+                db.session.commit()
+        finally:
+            self._close(connection)
+
+        metrics.gauge('email_outbox.depth', EmailOutbox.pending_count())
+        return sent
+
+    @staticmethod
+    def _close(connection):
+        if connection is None:
+            return
+        try:
+            connection.__exit__(None, None, None)
+        except Exception:
+            pass
+
+    def run(self, poll_interval=None, sleep=time.sleep, should_stop=None):
+        """
+        Drain the outbox until stopped
+
+        Args:
+            poll_interval: Seconds to wait when the queue is empty
+            sleep: Sleep function (socketio.sleep when running as a green thread)
+            should_stop: Optional callable returning True to stop the loop
+        """
+        from app import db
+
+        if poll_interval is None:
+            poll_interval = current_app.config.get('EMAIL_OUTBOX_POLL_INTERVAL', 2)
+
+        while not (should_stop and should_stop()):
+            try:
+                sent = self.drain_once()
+            except Exception:
+                db.session.rollback()
+                current_app.logger.exception('Email outbox worker error')
+                sent = 0
+            finally:
+                db.session.remove()
+            if not sent:
+                sleep(poll_interval)
+
+
+def start_background_worker(app, socketio):
+    """
+    Run the outbox worker as a background task in this process
+
+    Args:
+        app: Flask application
+        socketio: SocketIO instance (eventlet/thread-safe task runner)
+    """
+    def run():
+        with app.app_context():
+            EmailOutboxWorker().run(sleep=socketio.sleep)
+
+    socketio.start_background_task(run)
@@ -0,0 +1,10 @@
+"""
+Flask-Mail extension instance
+
+Kept apart from email_service so `app/__init__.py` can init_app it without
+importing the service layer.
+"""
+from flask_mail import Mail
+
+
+mail = Mail()
@@ -0,0 +1,224 @@
+"""
+Newsletter campaign sender
+
+Streams active subscribers page by page, renders the campaign template once
+and substitutes the recipient per message, and sends over a small pool of
+persistent SMTP connections under a global rate cap. The campaign row is
+checkpointed after every page so an interrupted run resumes where it stopped
+(at most one page can be re-sent).
+"""
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import current_app, render_template
+from flask_mail import Message
+from markupsafe import escape
+
+from app.utils import metrics
+
+
+RECIPIENT_PLACEHOLDER = '__newsletter_recipient__'
+
+
+class RateLimiter:
+    """Thread-safe limiter spacing calls evenly at `rate` per second"""
+
+    def __init__(self, rate, sleep=time.sleep):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._next_at = time.monotonic()
+
+    def acquire(self):
+        """Block until the caller may proceed"""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+        if wait > 0:
+            self.sleep(wait)
+
+
+class NewsletterCampaignSender:
+    """Sends a NewsletterCampaign to every active subscriber"""
+
+    def __init__(self):
+        """Load sender settings from configuration"""
+        self.app = current_app._get_current_object()
+        self.pool_size = current_app.config.get('NEWSLETTER_SMTP_POOL_SIZE', 3)
+        self.rate = current_app.config.get('NEWSLETTER_RATE_PER_SECOND', 10)
+        self.page_size = current_app.config.get('NEWSLETTER_PAGE_SIZE', 200)
+        self.app_name = current_app.config.get('APP_NAME', 'Momentum Clips')
+        self.sender = current_app.config.get('MAIL_DEFAULT_SENDER')
+
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+    def create_campaign(self, subject, template):
+        """
+        Create a campaign ready to run
+
+        Args:
+            subject: Email subject
+            template: Template name under emails/ (without .html)
+
+        Returns:
+            NewsletterCampaign instance
+        """
+        from app import db
+        from app.models.newsletter_campaign import NewsletterCampaign
+
+        campaign = NewsletterCampaign(subject=subject, template=template)
+        db.session.add(campaign)
+        db.session.commit()
+        return campaign
+
+    def _render(self, campaign):
+        """Render the campaign once with a placeholder recipient"""
+        html = render_template(f'emails/{campaign.template}.html', email=RECIPIENT_PLACEHOLDER)
+        try:
+            text = render_template(f'emails/{campaign.template}.txt', email=RECIPIENT_PLACEHOLDER)
+        except Exception:
+            text = "Please view this email in an HTML-capable email client."
+        return html, text
+
+    # ------------------------------------------------------------------
+    # SMTP connection pool (one persistent connection per sending thread)
+    # ------------------------------------------------------------------
+
+    def _connection(self):
+        from app.services.email_service import mail
+
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = mail.connect()
+            connection.__enter__()
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    def _drop_connection(self):
+        connection = getattr(self._local, 'connection', None)
+        self._local.connection = None
+        if connection is not None:
+            with self._connections_lock:
+                if connection in self._connections:
+                    self._connections.remove(connection)
+            try:
+                connection.__exit__(None, None, None)
+            except Exception:
+                pass
+
+    def _close_all(self):
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            try:
+                connection.__exit__(None, None, None)
+            except Exception:
+                pass
+
+    def _send_one(self, recipient, subject, html, text, limiter):
+        """Send to one subscriber; returns None on success, else the error"""
+        subscriber_id, email = recipient
+        with self.app.app_context():
+            msg = Message(
+                subject=subject,
+                recipients=[email],
+                sender=self.sender,
+                html=html.replace(RECIPIENT_PLACEHOLDER, str(escape(email))),
+                body=text.replace(RECIPIENT_PLACEHOLDER, email)
+            )
+            limiter.acquire()
+            start = time.perf_counter()
+            for attempt in range(2):
+                try:
+                    self._connection().send(msg)
+                    metrics.incr('newsletter.sent')
+                    return None
+                except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError) as e:
+                    # Reconnect once on a dropped connection
+                    self._drop_connection()
+                    error = e
+                except Exception as e:
+                    error = e
+                    break
+                finally:
+                    metrics.observe('newsletter.send', (time.perf_counter() - start) * 1000.0)
+            metrics.incr('newsletter.failed')
+            current_app.logger.warning(f'Newsletter send to subscriber {subscriber_id} failed: {str(error)}')
+            return error
+
+    def run(self, campaign, sleep=time.sleep, should_stop=None):
+        """
+        Send (or resume) a campaign
+
+        Args:
+            campaign: NewsletterCampaign instance
+            sleep: Sleep function used by the rate limiter
+            should_stop: Optional callable checked between pages
+
+        Returns:
+            The campaign, with updated counts and status
+        """
+        from app import db
+        from app.models.newsletter import Newsletter
+        from app.models.newsletter_campaign import NewsletterCampaign
+
+        if campaign.status == NewsletterCampaign.STATUS_COMPLETED:
+            return campaign
+
+        campaign.status = NewsletterCampaign.STATUS_RUNNING
+        campaign.started_at = campaign.started_at or datetime.utcnow()
+        db.session.commit()
+
+        subject = f'[{self.app_name}] {campaign.subject}'
+        html, text = self._render(campaign)
+        limiter = RateLimiter(self.rate, sleep=sleep)
+
+        executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix='newsletter')
+        try:
+            for page in Newsletter.iter_active_pages(after_id=campaign.last_subscriber_id, page_size=self.page_size):
+                errors = list(executor.map(
+                    lambda recipient: self._send_one(recipient, subject, html, text, limiter),
+                    page
+                ))
+                failed = [e for e in errors if e is not None]
+
+                # Checkpoint: everything up to this page has been handled
+                campaign.last_subscriber_id = page[-1][0]
+                campaign.sent_count += len(page) - len(failed)
+                campaign.failed_count += len(failed)
+                if failed:
+                    campaign.last_error = str(failed[-1])[:2000]
+                db.session.commit()
+
+                if should_stop and should_stop():
+                    campaign.status = NewsletterCampaign.STATUS_INTERRUPTED
+                    db.session.commit()
+                    return campaign
+
+            campaign.status = NewsletterCampaign.STATUS_COMPLETED
+            campaign.completed_at = datetime.utcnow()
+            db.session.commit()
+            current_app.logger.info(
+                f'Newsletter campaign {campaign.id} completed: {campaign.sent_count} sent, {campaign.failed_count} failed'
+            )
+            return campaign
+
+        except BaseException as e:
+            db.session.rollback()
+            campaign.status = NewsletterCampaign.STATUS_INTERRUPTED
+            campaign.last_error = str(e)[:2000] or e.__class__.__name__
+            db.session.commit()
+            raise
+        finally:
+            executor.shutdown(wait=True)
+            self._close_all()
@@ -1,19 +1,16 @@
 import stripe
 from flask import current_app
-import os
 
 
 class PaymentService:
     """Service for handling Stripe payments"""
 
     def __init__(self):
-        """Initialize Stripe client"""
-        api_key = current_app.config.get('STRIPE_SECRET_KEY') or os.getenv('STRIPE_SECRET_KEY')
+        """Initialize Stripe client (shared, pooled gateway)"""
+        from app.services.stripe_gateway import get_stripe_gateway
 
-        if not api_key:
-            raise ValueError("STRIPE_SECRET_KEY not found in configuration")
-
-        stripe.api_key = api_key
+        # Raises ValueError when STRIPE_SECRET_KEY is not configured
+        self.gateway = get_stripe_gateway()
         self.publishable_key = current_app.config.get('STRIPE_PUBLISHABLE_KEY')
 
     def create_payment_intent(self, amount, currency='usd', metadata=None):
@@ -29,16 +26,16 @@ class PaymentService:
             Payment Intent object
         """
         try:
-            intent = stripe.PaymentIntent.create(
-                amount=int(amount),
-                currency=currency.lower(),
-                metadata=metadata or {},
-                automatic_payment_methods={'enabled': True}
-            )
+            intent = self.gateway.create_payment_intent({
+                'amount': int(amount),
+                'currency': currency.lower(),
+                'metadata': metadata or {},
+                'automatic_payment_methods': {'enabled': True}
+            })
 
             return intent
 
-        except stripe.error.StripeError as e:
+        except stripe.StripeError as e:
             current_app.logger.error(f'Stripe Payment Intent Error: {str(e)}')
             raise Exception(f'Payment error: {str(e)}')
 
@@ -53,10 +50,10 @@ class PaymentService:
             Payment Intent object
         """
         try:
-            intent = stripe.PaymentIntent.retrieve(payment_intent_id)
+            intent = self.gateway.retrieve_payment_intent(payment_intent_id)
             return intent
 
-        except stripe.error.StripeError as e:
+        except stripe.StripeError as e:
             current_app.logger.error(f'Stripe Retrieve Error: {str(e)}')
             raise Exception(f'Payment retrieval error: {str(e)}')
 
@@ -101,11 +98,11 @@ class PaymentService:
             if reason:
                 refund_params['reason'] = reason
 
-            refund = stripe.Refund.create(**refund_params)
+            refund = self.gateway.create_refund(refund_params)
 
             return refund
 
-        except stripe.error.StripeError as e:
+        except stripe.StripeError as e:
             current_app.logger.error(f'Stripe Refund Error: {str(e)}')
             raise Exception(f'Refund error: {str(e)}')
 
@@ -159,11 +156,11 @@ class PaymentService:
             if name:
                 customer_params['name'] = name
 
-            customer = stripe.Customer.create(**customer_params)
+            customer = self.gateway.create_customer(customer_params)
 
             return customer
 
-        except stripe.error.StripeError as e:
+        except stripe.StripeError as e:
             current_app.logger.error(f'Stripe Customer Creation Error: {str(e)}')
             raise Exception(f'Customer creation error: {str(e)}')
 
@@ -184,9 +181,7 @@ class PaymentService:
             raise ValueError("STRIPE_WEBHOOK_SECRET not configured")
 
         try:
-            event = stripe.Webhook.construct_event(
-                payload, sig_header, webhook_secret
-            )
+            event = self.gateway.construct_event(payload, sig_header, webhook_secret)
 
             return event
 
@@ -194,6 +189,6 @@ class PaymentService:
             current_app.logger.error(f'Invalid webhook payload: {str(e)}')
             raise Exception('Invalid payload')
 
-        except stripe.error.SignatureVerificationError as e:
+        except stripe.SignatureVerificationError as e:
             current_app.logger.error(f'Invalid webhook signature: {str(e)}')
             raise Exception('Invalid signature')
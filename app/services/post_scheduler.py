@@ -0,0 +1,316 @@
+"""
+Scheduled social posts
+
+Posts queued from /admin/social are ScheduledPost rows. An APScheduler
+BackgroundScheduler (SQLAlchemy job store, SOCIAL_MEDIA_TIMEZONE) holds one
+date job per SOCIAL_SCHEDULER_BATCH_SECONDS window, so posts due together
+fire as a single batch. A batch claims every due row and publishes them
+through SocialMediaService.fan_out. The scheduler's executor is bounded
+(SOCIAL_SCHEDULER_MAX_WORKERS) and never runs inside a request.
+
+Jobs persist across restarts and coalesce. The claim (pending -> sending
+in one UPDATE) is what prevents double posting when a job fires twice.
+A periodic sweep job picks up rows whose batch job was lost.
+"""
+import atexit
+import json
+import math
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+import pytz
+from flask import current_app
+
+from app.utils import metrics
+
+
+JOB_FUNC = 'app.services.post_scheduler:run_due_posts'
+SWEEP_JOB_ID = 'social-posts:sweep'
+
+_app = None
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def social_timezone():
+    """Timezone posts are scheduled in (SOCIAL_MEDIA_TIMEZONE)"""
+    return pytz.timezone(current_app.config.get('SOCIAL_MEDIA_TIMEZONE', 'UTC'))
+
+
+def to_utc(local_dt):
+    """
+    Naive wall-clock time in SOCIAL_MEDIA_TIMEZONE -> naive UTC
+
+    Args:
+        local_dt: datetime as entered in the admin form
+    """
+    if local_dt.tzinfo is None:
+        local_dt = social_timezone().localize(local_dt)
+    return local_dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def to_local(utc_dt):
+    """Naive UTC -> aware datetime in SOCIAL_MEDIA_TIMEZONE (for display)"""
+    return utc_dt.replace(tzinfo=timezone.utc).astimezone(social_timezone())
+
+
+def batch_run_time(scheduled_for):
+    """
+    Fire time of the batch a post belongs to: scheduled_for (UTC) rounded
+    up to the next SOCIAL_SCHEDULER_BATCH_SECONDS boundary
+
+    Returns:
+        Aware UTC datetime
+    """
+    window = current_app.config.get('SOCIAL_SCHEDULER_BATCH_SECONDS', 60)
+    epoch = scheduled_for.replace(tzinfo=timezone.utc).timestamp()
+    return datetime.fromtimestamp(math.ceil(epoch / window) * window, tz=timezone.utc)
+
+
+def batch_job_id(run_at):
+    return f'social-posts:{int(run_at.timestamp())}'
+
+
+def build_scheduler(app):
+    """
+    Create (not start) the scheduler with the app's job store and executor
+
+    Args:
+        app: Flask application
+    """
+    from apscheduler.executors.pool import ThreadPoolExecutor
+    from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+    from apscheduler.schedulers.background import BackgroundScheduler
+
+    config = app.config
+    url = config['SQLALCHEMY_DATABASE_URI']
+    # Own small engine: the job store disposes it on shutdown, which must not close the app's pool
+    engine_options = None if url.startswith('sqlite') else {'pool_pre_ping': True, 'pool_size': 2}
+    jobstore = SQLAlchemyJobStore(url=url, tablename='apscheduler_jobs', engine_options=engine_options)
+    return BackgroundScheduler(
+        jobstores={'default': jobstore},
+        executors={'default': ThreadPoolExecutor(max_workers=config.get('SOCIAL_SCHEDULER_MAX_WORKERS', 2))},
+        job_defaults={
+            'coalesce': True,  # Missed runs of one job collapse into one
+            'max_instances': 1,
+            'misfire_grace_time': config.get('SOCIAL_SCHEDULER_MISFIRE_GRACE_SECONDS', 3600)
+        },
+        timezone=config.get('SOCIAL_MEDIA_TIMEZONE', 'UTC')
+    )
+
+
+def start_scheduler(app):
+    """
+    Start this process's scheduler and its periodic sweep job
+
+    Args:
+        app: Flask application
+
+    Returns:
+        The running scheduler, or None without an AYRSHARE_API_KEY
+    """
+    global _app, _scheduler
+    if not app.config.get('AYRSHARE_API_KEY'):
+        app.logger.warning('[WARN] AYRSHARE_API_KEY is not set; social post scheduler not started')
+        return None
+    with _scheduler_lock:
+        if _scheduler is not None:
+            return _scheduler
+        _app = app
+        scheduler = build_scheduler(app)
+        scheduler.start()
+        scheduler.add_job(
+            JOB_FUNC, 'interval', id=SWEEP_JOB_ID, replace_existing=True,
+            seconds=app.config.get('SOCIAL_SCHEDULER_SWEEP_SECONDS', 300)
+        )
+        _scheduler = scheduler
+    atexit.register(shutdown_scheduler)
+    app.logger.info('[OK] Social post scheduler started')
+    return scheduler
+
+
+def shutdown_scheduler(wait=False):
+    """Stop this process's scheduler (jobs stay in the job store)"""
+    global _scheduler
+    with _scheduler_lock:
+        scheduler, _scheduler = _scheduler, None
+    if scheduler is not None and scheduler.running:
+        scheduler.shutdown(wait=wait)
+
+
+def reset_post_scheduler():
+    """Stop the scheduler and forget the app (used by tests)"""
+    global _app
+    shutdown_scheduler()
+    _app = None
+
+
+def get_scheduler():
+    """This process's running scheduler, or None"""
+    return _scheduler
+
+
+def queue_post(content, platforms, scheduled_for_local, media_urls=None, video_id=None, scheduler=None):
+    """
+    Queue a post and make sure its batch job exists
+
+    Args:
+        content: Post text
+        platforms: List of platforms
+        scheduled_for_local: Naive datetime in SOCIAL_MEDIA_TIMEZONE
+        media_urls: Optional list of media URLs
+        video_id: Optional Video the post is about
+        scheduler: Scheduler to add the job to (default: this process's)
+
+    Returns:
+        ScheduledPost
+    """
+    from app import db
+    from app.models.scheduled_post import ScheduledPost
+
+    post = ScheduledPost(
+        content=content,
+        platforms=','.join(platforms),
+        media_urls=json.dumps(media_urls) if media_urls else None,
+        video_id=video_id,
+        scheduled_for=to_utc(scheduled_for_local),
+        status=ScheduledPost.STATUS_PENDING
+    )
+    db.session.add(post)
+    db.session.commit()
+
+    scheduler = scheduler or get_scheduler()
+    if scheduler is not None:
+        run_at = batch_run_time(post.scheduled_for)
+        # Same id for every post in the window: one job, one batch
+        scheduler.add_job(JOB_FUNC, 'date', id=batch_job_id(run_at), run_date=run_at, replace_existing=True)
+    else:
+        current_app.logger.info(f'No scheduler in this process; post {post.id} is picked up by the sweep')
+    metrics.incr('social_scheduler.queued')
+    return post
+
+
+class PostDispatcher:
+    """Claims due ScheduledPost rows and publishes them as one batch"""
+
+    def __init__(self, service=None):
+        """
+        Args:
+            service: SocialMediaService (default: a new one)
+        """
+        self.service = service
+        self.batch_size = current_app.config.get('SOCIAL_SCHEDULER_BATCH_SIZE', 50)
+
+    def due_ids(self, now=None):
+        """
+        IDs of the next batch of due pending posts (read only)
+
+        Returns:
+            List of ScheduledPost ids, oldest first
+        """
+        from app import db
+        from app.models.scheduled_post import ScheduledPost
+
+        now = now or datetime.utcnow()
+        return [post_id for (post_id,) in db.session.query(ScheduledPost.id).filter(
+            ScheduledPost.status == ScheduledPost.STATUS_PENDING,
+            ScheduledPost.scheduled_for <= now
+        ).order_by(ScheduledPost.scheduled_for, ScheduledPost.id).limit(self.batch_size)]
+
+    def claim_due(self, now=None):
+        """
+        Move due pending posts to sending under a fresh claim token
+
+        Returns:
+            Claimed ScheduledPost rows
+        """
+        from app import db
+        from app.models.scheduled_post import ScheduledPost
+
+        due_ids = self.due_ids(now)
+        if not due_ids:
+            return []
+
+        token = str(uuid.uuid4())
+        # Conditional on status: a concurrent batch that got there first wins the row
+        ScheduledPost.query.filter(
+            ScheduledPost.id.in_(due_ids),
+            ScheduledPost.status == ScheduledPost.STATUS_PENDING
+        ).update({'status': ScheduledPost.STATUS_SENDING, 'claim_token': token}, synchronize_session=False)
+        db.session.commit()
+        return ScheduledPost.query.filter_by(claim_token=token).order_by(ScheduledPost.id).all()
+
+    def dispatch_once(self):
+        """
+        Publish one batch of due posts
+
+        Returns:
+            (posted, failed)
+        """
+        from app import db
+        from app.models.scheduled_post import ScheduledPost
+        from app.services.social_service import SocialMediaService
+
+        # Most sweeps find nothing: don't build a client (or need the API key) for them
+        if not self.due_ids():
+            return 0, 0
+
+        # Before claiming: a missing API key must not strand rows in 'sending'
+        service = self.service or SocialMediaService()
+        posts = self.claim_due()
+        if not posts:
+            return 0, 0
+
+        start = time.perf_counter()
+        results = service.fan_out([
+            (service.post, (post.content, post.platform_list, post.media_url_list or None))
+            for post in posts
+        ])
+
+        posted = failed = 0
+        for post, result in zip(posts, results):
+            if isinstance(result, Exception):
+                post.status = ScheduledPost.STATUS_FAILED
+                post.error = str(result)[:2000]
+                failed += 1
+                current_app.logger.error(f'Scheduled post {post.id} failed: {str(result)}')
+            else:
+                post.status = ScheduledPost.STATUS_POSTED
+                post.ayrshare_id = (result or {}).get('id')
+                post.posted_at = datetime.utcnow()
+                post.error = None
+                posted += 1
+        db.session.commit()
+
+        metrics.incr('social_scheduler.posted', posted)
+        metrics.incr('social_scheduler.failed', failed)
+        metrics.observe('social_scheduler.batch', (time.perf_counter() - start) * 1000.0)
+        current_app.logger.info(f'Scheduled posts batch: {posted} posted, {failed} failed')
+        return posted, failed
+
+    def run(self):
+        """Publish every due post, a batch at a time"""
+        total = [0, 0]
+        while True:
+            posted, failed = self.dispatch_once()
+            if not posted and not failed:
+                return tuple(total)
+            total[0] += posted
+            total[1] += failed
+
+
+def run_due_posts():
+    """Scheduler job entry point (batch and sweep jobs)"""
+    from app import db
+
+    app = _app or current_app._get_current_object()
+    with app.app_context():
+        try:
+            PostDispatcher().run()
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception('Scheduled post batch error')
+        finally:
+            db.session.remove()
@@ -1,25 +1,163 @@
 from flask import current_app
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 import requests
 import os
+import random
+import threading
+import time
 from datetime import datetime
 
+from app.utils import metrics
+
+
+# Statuses worth retrying. 429 is rejected before any work is done, so it is
+# retried for every method; 5xx and timeouts only for idempotent ones (a
+# retried POST could publish twice).
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = ('GET', 'DELETE')
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_ayrshare_session():
+    """
+    Get this process's keep-alive session for the Ayrshare API
+
+    Returns:
+        requests.Session with a pooled HTTPAdapter
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                pool_size = current_app.config.get('AYRSHARE_POOL_SIZE', 10)
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def reset_ayrshare_session():
+    """Close and drop the shared session (used by tests)"""
+    global _session
+    with _session_lock:
+        session, _session = _session, None
+    if session is not None:
+        session.close()
+
 
 class SocialMediaService:
     """Service for social media automation via Ayrshare API"""
 
-    def __init__(self):
-        """Initialize Ayrshare client"""
+    def __init__(self, sleep=time.sleep):
+        """
+        Initialize Ayrshare client
+
+        Args:
+            sleep: Sleep function used between retries
+        """
         api_key = current_app.config.get('AYRSHARE_API_KEY') or os.getenv('AYRSHARE_API_KEY')
 
         if not api_key:
             raise ValueError("AYRSHARE_API_KEY not found in configuration")
 
         self.api_key = api_key
-        self.base_url = 'https://app.ayrshare.com/api'
+        self.base_url = current_app.config.get('AYRSHARE_BASE_URL') or 'https://app.ayrshare.com/api'
         self.headers = {
             'Authorization': f'Bearer {self.api_key}',
             'Content-Type': 'application/json'
         }
+        self.session = get_ayrshare_session()
+        self.timeout = (
+            current_app.config.get('AYRSHARE_CONNECT_TIMEOUT', 5),
+            current_app.config.get('AYRSHARE_TIMEOUT', 30)
+        )
+        self.max_retries = current_app.config.get('AYRSHARE_MAX_RETRIES', 3)
+        self.backoff_base = current_app.config.get('AYRSHARE_BACKOFF_SECONDS', 0.5)
+        self.backoff_max = current_app.config.get('AYRSHARE_BACKOFF_MAX_SECONDS', 10)
+        self.max_concurrency = current_app.config.get('AYRSHARE_MAX_CONCURRENCY', 5)
+        self.sleep = sleep
+
+    def _backoff(self, attempt, response=None):
+        """Delay before retry `attempt` (1-based): Retry-After if given, else capped exponential with full jitter"""
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(self.backoff_max, int(retry_after))
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _request(self, method, path, **kwargs):
+        """
+        Call the Ayrshare API with timeouts and retries
+
+        Args:
+            method: HTTP method
+            path: Path under the API base URL (e.g. '/post')
+            **kwargs: Passed to requests (json, params)
+
+        Returns:
+            Decoded JSON response
+
+        Raises:
+            requests.exceptions.RequestException: Failed after retries
+        """
+        operation = path.strip('/').split('/')[0] or 'root'
+        idempotent = method in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = self.session.request(
+                    method, f'{self.base_url}{path}',
+                    headers=self.headers, timeout=self.timeout, **kwargs
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                # A connect failure never reached Ayrshare; a read timeout may have
+                retryable = idempotent or isinstance(e, requests.exceptions.ConnectTimeout)
+                if not retryable or attempt >= self.max_retries:
+                    metrics.incr(f'ayrshare.{operation}.errors')
+                    raise
+                response = None
+            else:
+                retryable = response.status_code == 429 or (idempotent and response.status_code in RETRY_STATUSES)
+                if not retryable or attempt >= self.max_retries:
+                    metrics.observe(f'ayrshare.{operation}', (time.perf_counter() - start) * 1000.0)
+                    if not response.ok:
+                        metrics.incr(f'ayrshare.{operation}.errors')
+                    response.raise_for_status()
+                    return response.json()
+
+            attempt += 1
+            metrics.incr(f'ayrshare.{operation}.retries')
+            self.sleep(self._backoff(attempt, response))
+
+    def fan_out(self, calls):
+        """
+        Run independent calls concurrently (at most AYRSHARE_MAX_CONCURRENCY at once)
+
+        Args:
+            calls: List of (method, args) tuples, e.g. [(self.get_analytics, ('id1',)), ...]
+
+        Returns:
+            List of results in the same order; a call that failed gives its exception
+        """
+        app = current_app._get_current_object()
+
+        def run(call):
+            method, args = call
+            with app.app_context():
+                try:
+                    return method(*args)
+                except Exception as e:
+                    return e
+
+        if len(calls) <= 1:
+            return [run(call) for call in calls]
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(calls)), thread_name_prefix='ayrshare') as executor:
+            return list(executor.map(run, calls))
 
     def post(self, content, platforms, media_urls=None, schedule_date=None):
         """
@@ -46,14 +184,7 @@ class SocialMediaService:
             if schedule_date:
                 payload['scheduleDate'] = schedule_date
 
-            response = requests.post(
-                f'{self.base_url}/post',
-                json=payload,
-                headers=self.headers
-            )
-
-            response.raise_for_status()
-            return response.json()
+            return self._request('POST', '/post', json=payload)
 
         except requests.exceptions.RequestException as e:
             current_app.logger.error(f'Ayrshare Post Error: {str(e)}')
@@ -70,25 +201,20 @@ class SocialMediaService:
             Response dict
         """
         try:
-            response = requests.delete(
-                f'{self.base_url}/post/{post_id}',
-                headers=self.headers
-            )
-
-            response.raise_for_status()
-            return response.json()
+            return self._request('DELETE', f'/post/{post_id}')
 
         except requests.exceptions.RequestException as e:
             current_app.logger.error(f'Ayrshare Delete Error: {str(e)}')
             raise Exception(f'Post deletion error: {str(e)}')
 
-    def get_history(self, platform=None, limit=10):
+    def get_history(self, platform=None, limit=10, last_days=None):
         """
         Get posting history
 
         Args:
             platform: Filter by platform (optional)
             limit: Number of posts to retrieve
+            last_days: Only posts from the last N days (optional)
 
         Returns:
             List of posts
@@ -97,15 +223,10 @@ class SocialMediaService:
             params = {'limit': limit}
             if platform:
                 params['platform'] = platform
+            if last_days:
+                params['lastDays'] = last_days
 
-            response = requests.get(
-                f'{self.base_url}/history',
-                params=params,
-                headers=self.headers
-            )
-
-            response.raise_for_status()
-            return response.json()
+            return self._request('GET', '/history', params=params)
 
         except requests.exceptions.RequestException as e:
             current_app.logger.error(f'Ayrshare History Error: {str(e)}')
@@ -122,18 +243,25 @@ class SocialMediaService:
             Analytics dict
         """
         try:
-            response = requests.get(
-                f'{self.base_url}/analytics/post/{post_id}',
-                headers=self.headers
-            )
-
-            response.raise_for_status()
-            return response.json()
+            return self._request('GET', f'/analytics/post/{post_id}')
 
         except requests.exceptions.RequestException as e:
             current_app.logger.error(f'Ayrshare Analytics Error: {str(e)}')
             raise Exception(f'Analytics retrieval error: {str(e)}')
 
+    def get_analytics_many(self, post_ids):
+        """
+        Get analytics for several posts concurrently
+
+        Args:
+            post_ids: Ayrshare post IDs
+
+        Returns:
+            Dict mapping post ID -> analytics dict (or the exception for a failed lookup)
+        """
+        results = self.fan_out([(self.get_analytics, (post_id,)) for post_id in post_ids])
+        return dict(zip(post_ids, results))
+
     def get_profiles(self):
         """
         Get connected social media profiles
@@ -142,13 +270,7 @@ class SocialMediaService:
             List of connected profiles
         """
         try:
-            response = requests.get(
-                f'{self.base_url}/profiles',
-                headers=self.headers
-            )
-
-            response.raise_for_status()
-            return response.json()
+            return self._request('GET', '/profiles')
 
         except requests.exceptions.RequestException as e:
             current_app.logger.error(f'Ayrshare Profiles Error: {str(e)}')
@@ -193,6 +315,18 @@ class SocialMediaService:
             current_app.logger.error(f'Schedule video post error: {str(e)}')
             raise
 
+    def schedule_video_posts(self, scheduled):
+        """
+        Schedule several video posts concurrently
+
+        Args:
+            scheduled: List of (video_data, schedule_date) tuples
+
+        Returns:
+            List of response dicts (or the exception for a failed post), in order
+        """
+        return self.fan_out([(self.schedule_video_post, item) for item in scheduled])
+
     def auto_post_new_video(self, video):
         """
         Automatically post a new video to social media
@@ -205,15 +339,17 @@ class SocialMediaService:
         """
         try:
             from app.services.ai_service import AIService
-
-            # Generate platform-specific captions using AI
-            ai_service = AIService()
-
-            caption_instagram = ai_service.generate_caption(
-                video.title,
-                video.description or "",
-                platform='instagram'
-            )
+            from app.models.video_caption import VideoCaption
+
+            # Use the caption from `flask captions-generate` if there is one,
+            # otherwise generate it now
+            caption_instagram = VideoCaption.for_video(video.id, 'instagram')
+            if not caption_instagram:
+                caption_instagram = AIService().generate_caption(
+                    video.title,
+                    video.description or "",
+                    platform='instagram'
+                )
 
             # Post to Instagram (and link to other platforms)
             result = self.post(
@@ -0,0 +1,216 @@
+"""
+Ayrshare history and analytics sync
+
+Copies posting history into SocialPost and snapshots engagement into
+SocialPostMetrics so the admin social dashboard reads local tables only.
+Ayrshare's /history has no cursor, so a run fetches everything since the
+last run (`lastDays` from a sync_state high-water mark) and upserts it in
+pages, one IN query and one commit per page. Analytics for recent posts are
+then pulled a page at a time, AYRSHARE_MAX_CONCURRENCY calls in parallel,
+and stored as time-series snapshots.
+"""
+import json
+import math
+import time
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+
+from app.utils import metrics
+
+
+HIGH_WATER_MARK_KEY = 'social_sync:history'
+
+# Analytics field names differ per network; first match wins
+COUNT_FIELDS = {
+    'likes': ('likeCount', 'likesCount', 'likes', 'reactionsCount', 'favoriteCount'),
+    'comments': ('commentsCount', 'commentCount', 'comments', 'replyCount'),
+    'shares': ('sharesCount', 'shareCount', 'shares', 'retweetCount'),
+    'impressions': ('impressionsCount', 'impressions', 'viewsCount', 'videoViews', 'views', 'playCount'),
+}
+
+
+def _parse_date(value):
+    """Ayrshare ISO timestamp -> naive UTC datetime (None if missing/invalid)"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _count(analytics, names):
+    for name in names:
+        value = analytics.get(name)
+        if isinstance(value, dict):
+            value = value.get('total', value.get('count'))
+        if isinstance(value, (int, float)):
+            return int(value)
+    return 0
+
+
+def extract_counts(analytics):
+    """
+    Per-platform engagement counts from an /analytics/post response
+
+    Returns:
+        Dict platform -> {'likes', 'comments', 'shares', 'impressions'}
+    """
+    counts = {}
+    for platform, data in (analytics or {}).items():
+        if not isinstance(data, dict) or not isinstance(data.get('analytics'), dict):
+            continue
+        counts[platform] = {field: _count(data['analytics'], names) for field, names in COUNT_FIELDS.items()}
+    return counts
+
+
+class SocialSync:
+    """Syncs Ayrshare history and analytics into SocialPost/SocialPostMetrics"""
+
+    def __init__(self, service=None, page_size=None):
+        """
+        Args:
+            service: SocialMediaService (default: a new one)
+            page_size: Posts per commit / analytics fan-out
+        """
+        from app.services.social_service import SocialMediaService
+
+        self.service = service or SocialMediaService()
+        self.page_size = page_size or current_app.config.get('SOCIAL_SYNC_PAGE_SIZE', 50)
+        self.max_records = current_app.config.get('SOCIAL_SYNC_MAX_RECORDS', 1000)
+        self.metrics_days = current_app.config.get('SOCIAL_METRICS_WINDOW_DAYS', 30)
+
+    def fetch_history(self, last_days=None):
+        """All history entries from the last `last_days` days (everything if None)"""
+        history = self.service.get_history(limit=self.max_records, last_days=last_days)
+        if isinstance(history, dict):
+            history = history.get('history') or []
+        return [entry for entry in history if isinstance(entry, dict) and entry.get('id')]
+
+    def _upsert_page(self, entries):
+        """
+        Insert/update one page of history entries
+
+        Returns:
+            Number of posts inserted
+        """
+        from app import db
+        from app.models.social_post import SocialPost
+
+        existing = {
+            post.ayrshare_id: post
+            for post in SocialPost.query.filter(SocialPost.ayrshare_id.in_([entry['id'] for entry in entries]))
+        }
+        new_posts = []
+        for entry in entries:
+            post = existing.get(entry['id'])
+            if post is None:
+                post = existing[entry['id']] = SocialPost(ayrshare_id=entry['id'])
+                new_posts.append(post)
+            platforms = entry.get('platforms') or []
+            post.content = entry.get('post')
+            post.platforms = ','.join(platforms) if isinstance(platforms, list) else str(platforms)
+            post.status = entry.get('status')
+            post.published_at = _parse_date(entry.get('created')) or post.published_at
+            urls = {
+                item.get('platform'): item.get('postUrl')
+                for item in entry.get('postIds') or []
+                if isinstance(item, dict) and item.get('platform') and item.get('postUrl')
+            }
+            post.post_urls = json.dumps(urls) if urls else None
+
+        db.session.add_all(new_posts)
+        db.session.flush()
+        return len(new_posts)
+
+    def _snapshot(self, posts, captured_at):
+        """
+        Pull analytics for posts concurrently and store one snapshot per platform
+
+        Returns:
+            Number of snapshot rows written
+        """
+        from app import db
+        from app.models.social_post import SocialPostMetrics
+
+        results = self.service.get_analytics_many([post.ayrshare_id for post in posts])
+        snapshots = []
+        for post in posts:
+            result = results.get(post.ayrshare_id)
+            if isinstance(result, Exception):
+                current_app.logger.warning(f'Analytics for {post.ayrshare_id} failed: {str(result)[:120]}')
+                metrics.incr('social_sync.analytics_errors')
+                continue
+            counts = extract_counts(result)
+            if not counts:
+                continue
+            for platform, values in counts.items():
+                snapshots.append(SocialPostMetrics(post_id=post.id, platform=platform, captured_at=captured_at, **values))
+            for field in COUNT_FIELDS:
+                setattr(post, field, sum(values[field] for values in counts.values()))
+            post.metrics_updated_at = captured_at
+
+        db.session.add_all(snapshots)
+        return len(snapshots)
+
+    def run(self, full=False, with_metrics=True):
+        """
+        Sync history since the last run (or all of it) and snapshot recent posts' metrics
+
+        Args:
+            full: Ignore the high-water mark and fetch all history
+            with_metrics: Also pull analytics
+
+        Returns:
+            Dict with fetched, inserted, pages and snapshots counts
+        """
+        from app import db
+        from app.models.social_post import SocialPost
+        from app.models.sync_state import SyncState
+
+        started = time.time()
+        last_days = None
+        if not full:
+            high_water_mark = SyncState.get_value(HIGH_WATER_MARK_KEY)
+            if high_water_mark is not None:
+                # Whole days, plus one so posts published mid-run are not missed
+                last_days = max(1, math.ceil((started - float(high_water_mark)) / 86400)) + 1
+
+        entries = self.fetch_history(last_days=last_days)
+        captured_at = datetime.utcnow()
+        recent_since = captured_at - timedelta(days=self.metrics_days)
+        result = {'fetched': len(entries), 'inserted': 0, 'pages': 0, 'snapshots': 0}
+
+        for offset in range(0, len(entries), self.page_size):
+            inserted = self._upsert_page(entries[offset:offset + self.page_size])
+            result['inserted'] += inserted
+            result['pages'] += 1
+            db.session.commit()
+
+        if with_metrics:
+            # Engagement on older posts has settled; only snapshot recent ones
+            query = SocialPost.query.filter(SocialPost.published_at >= recent_since).order_by(SocialPost.id)
+            last_id = 0
+            while True:
+                posts = query.filter(SocialPost.id > last_id).limit(self.page_size).all()
+                if not posts:
+                    break
+                result['snapshots'] += self._snapshot(posts, captured_at)
+                db.session.commit()
+                last_id = posts[-1].id
+
+        SyncState.set_value(HIGH_WATER_MARK_KEY, int(started))
+        db.session.commit()
+
+        metrics.incr('social_sync.inserted', result['inserted'])
+        metrics.incr('social_sync.snapshots', result['snapshots'])
+        metrics.observe('social_sync.run', (time.time() - started) * 1000.0)
+        current_app.logger.info(
+            f"Social sync: {result['fetched']} posts fetched, {result['inserted']} new, "
+            f"{result['snapshots']} metric snapshots"
+        )
+        return result
@@ -0,0 +1,280 @@
+"""
+Stripe webhook intake and event processor
+
+The webhook endpoints only verify the signature, store the event in
+stripe_events (deduplicated by Stripe event id) and acknowledge. The
+processor applies stored events in Stripe creation order, retrying failures
+with exponential backoff and dead-lettering events that keep failing. Runs
+either as `flask stripe-events` or as a background task in the web worker.
+"""
+import random
+import time
+from datetime import datetime, timedelta
+
+import stripe
+from flask import current_app, jsonify, request
+
+from app.utils import metrics
+
+
+def receive_webhook():
+    """
+    Verify, store and acknowledge the Stripe event in the current request
+
+    Returns:
+        Flask response tuple
+    """
+    from app.models.stripe_event import StripeEvent
+    from app.services.stripe_gateway import StripeGateway
+
+    start = time.perf_counter()
+    payload = request.get_data(as_text=True)
+    sig_header = request.headers.get('Stripe-Signature')
+    webhook_secret = current_app.config.get('STRIPE_WEBHOOK_SECRET')
+
+    if not webhook_secret:
+        current_app.logger.warning('Stripe webhook called but STRIPE_WEBHOOK_SECRET not configured')
+        return jsonify({'error': 'Webhook not configured'}), 400
+
+    try:
+        event = StripeGateway.construct_event(payload, sig_header, webhook_secret)
+    except ValueError as e:
+        current_app.logger.error(f'Invalid webhook payload: {str(e)}')
+        return jsonify({'error': 'Invalid payload'}), 400
+    except stripe.SignatureVerificationError as e:
+        current_app.logger.error(f'Invalid webhook signature: {str(e)}')
+        return jsonify({'error': 'Invalid signature'}), 400
+
+    stored = StripeEvent.record(event.get('id'), event.get('type'), payload, created=event.get('created'))
+    metrics.incr('stripe_events.received' if stored else 'stripe_events.duplicates')
+    metrics.observe('stripe_events.ack', (time.perf_counter() - start) * 1000.0)
+
+    if not stored:
+        current_app.logger.info(f'Stripe event {event.get("id")} already received (duplicate delivery)')
+        return jsonify({'status': 'duplicate'}), 200
+    return jsonify({'status': 'queued'}), 200
+
+
+# ----------------------------------------------------------------------
+# Event handlers (must be idempotent: an event can be applied again if the
+# processor dies between applying it and marking it processed)
+# ----------------------------------------------------------------------
+
+def _checkout_paid(obj):
+    """checkout.session.completed / async_payment_succeeded"""
+    from app import db
+    from app.models.booking import Booking, BookingStatus
+    from app.models.public_booking import PublicBooking
+    from app.routes.payment import PACKAGES
+
+    package = (obj.get('metadata') or {}).get('package')
+    if package in PACKAGES:
+        # Public flow (Packages -> Stripe -> Waiver -> Calendly)
+        if obj.get('payment_status') != 'paid':
+            return
+        booking = PublicBooking.upsert_from_checkout_session(
+            obj, package_key=package, package_name=PACKAGES[package]['name']
+        )
+        current_app.logger.info(f'PublicBooking {booking.id} recorded from Checkout Session {obj.get("id")}')
+        return
+
+    # Logged-in booking flow
+    booking_id = obj.get('client_reference_id') or (obj.get('metadata') or {}).get('booking_id')
+    if not booking_id:
+        return
+    booking = Booking.query.get(int(booking_id))
+    if booking and booking.status == BookingStatus.PENDING.value:
+        booking.confirm_payment(
+            payment_intent_id=obj.get('payment_intent'),
+            charge_id=obj.get('payment_intent'),
+            commit=False
+        )
+
+        # Queue confirmation email to customer in the same transaction
+        from app.services.email_service import EmailService
+        EmailService().queue_booking_confirmation(booking)
+        db.session.commit()
+        current_app.logger.info(f'Booking {booking_id} confirmed via webhook (Checkout Session)')
+
+
+def _checkout_failed(obj):
+    """checkout.session.expired / async_payment_failed"""
+    booking_id = obj.get('client_reference_id') or (obj.get('metadata') or {}).get('booking_id')
+    current_app.logger.warning(f'Checkout session {obj.get("id")} expired or failed (booking {booking_id})')
+
+
+HANDLERS = {
+    'checkout.session.completed': _checkout_paid,
+    'checkout.session.async_payment_succeeded': _checkout_paid,
+    'checkout.session.expired': _checkout_failed,
+    'checkout.session.async_payment_failed': _checkout_failed,
+}
+
+
+class StripeEventProcessor:
+    """Applies stored Stripe events"""
+
+    def __init__(self):
+        """Load processor settings from configuration"""
+        self.batch_size = current_app.config.get('STRIPE_EVENTS_BATCH_SIZE', 50)
+        self.max_attempts = current_app.config.get('STRIPE_EVENTS_MAX_ATTEMPTS', 8)
+        self.backoff_base = current_app.config.get('STRIPE_EVENTS_BACKOFF_SECONDS', 10)
+        self.backoff_max = current_app.config.get('STRIPE_EVENTS_BACKOFF_MAX_SECONDS', 1800)
+        self.stale_after = current_app.config.get('STRIPE_EVENTS_STALE_SECONDS', 300)
+
+    def _backoff(self, attempts):
+        """Delay before the next attempt: exponential with jitter, capped"""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.8, 1.2)
+
+    def _claim_batch(self):
+        """
+        Claim due events, oldest Stripe event first
+
+        Events stuck in 'processing' (processor died mid-batch) are reclaimed
+        after STRIPE_EVENTS_STALE_SECONDS. An event is only claimed once every
+        earlier event for the same object has been applied (or dead-lettered),
+        so a failed event waiting out its backoff holds back the later events
+        for its object across batches, not just within one.
+        """
+        from sqlalchemy.orm import aliased
+
+        from app import db
+        from app.models.stripe_event import StripeEvent
+
+        now = datetime.utcnow()
+        stale_cutoff = now - timedelta(seconds=self.stale_after)
+
+        earlier = aliased(StripeEvent)
+        has_earlier_unapplied = db.session.query(earlier.id).filter(
+            earlier.object_id == StripeEvent.object_id,
+            earlier.status.in_([StripeEvent.STATUS_PENDING, StripeEvent.STATUS_PROCESSING]),
+            db.or_(
+                earlier.stripe_created < StripeEvent.stripe_created,
+                db.and_(earlier.stripe_created == StripeEvent.stripe_created,
+                        earlier.received_at < StripeEvent.received_at)
+            )
+        ).exists()
+
+        query = StripeEvent.query.filter(
+            db.or_(
+                db.and_(StripeEvent.status == StripeEvent.STATUS_PENDING,
+                        StripeEvent.next_attempt_at <= now),
+                db.and_(StripeEvent.status == StripeEvent.STATUS_PROCESSING,
+                        StripeEvent.updated_at <= stale_cutoff)
+            ),
+            db.or_(StripeEvent.object_id.is_(None), ~has_earlier_unapplied)
+        ).order_by(StripeEvent.stripe_created, StripeEvent.received_at).limit(self.batch_size)
+
+        if db.engine.dialect.name != 'sqlite':
+            query = query.with_for_update(skip_locked=True)
+
+        batch = query.all()
+        for event in batch:
+            event.status = StripeEvent.STATUS_PROCESSING
+        db.session.commit()
+        return batch
+
+    def _record_failure(self, event, error):
+        """Schedule a retry, or dead-letter after max attempts"""
+        from app.models.stripe_event import StripeEvent
+
+        event.attempts += 1
+        event.last_error = str(error)[:2000]
+        if event.attempts >= self.max_attempts:
+            event.status = StripeEvent.STATUS_DEAD
+            metrics.incr('stripe_events.dead')
+            current_app.logger.error(f'Stripe event {event.id} dead-lettered after {event.attempts} attempts: {str(error)}')
+        else:
+            event.status = StripeEvent.STATUS_PENDING
+            event.next_attempt_at = datetime.utcnow() + timedelta(seconds=self._backoff(event.attempts))
+            metrics.incr('stripe_events.retried')
+            current_app.logger.warning(f'Stripe event {event.id} failed (attempt {event.attempts}), retrying: {str(error)}')
+
+    def apply(self, event_type, obj):
+        """Run the handler for one event (unhandled types are no-ops)"""
+        handler = HANDLERS.get(event_type)
+        if handler is not None:
+            handler(obj)
+
+    def drain_once(self):
+        """
+        Apply one batch of due events in order
+
+        The claim holds at most one event per object (e.g. Checkout Session),
+        so a failure never lets a later event for that object run ahead of it.
+
+        Returns:
+            Number of events applied
+        """
+        from app import db
+        from app.models.stripe_event import StripeEvent
+
+        batch = self._claim_batch()
+        if not batch:
+            metrics.gauge('stripe_events.depth', StripeEvent.pending_count())
+            return 0
+
+        applied = 0
+        for event in batch:
+            obj = (event.data.get('data') or {}).get('object') or {}
+
+            start = time.perf_counter()
+            try:
+                self.apply(event.type, obj)
+            except Exception as e:
+                db.session.rollback()
+                self._record_failure(event, e)
+            else:
+                event.status = StripeEvent.STATUS_PROCESSED
+                event.processed_at = datetime.utcnow()
+                event.last_error = None
+                applied += 1
+                metrics.incr('stripe_events.processed')
+            finally:
+                metrics.observe('stripe_events.apply', (time.perf_counter() - start) * 1000.0)
+            db.session.commit()
+
+        metrics.gauge('stripe_events.depth', StripeEvent.pending_count())
+        return applied
+
+    def run(self, poll_interval=None, sleep=time.sleep, should_stop=None):
+        """
+        Apply events until stopped
+
+        Args:
+            poll_interval: Seconds to wait when the queue is empty
+            sleep: Sleep function (socketio.sleep when running as a green thread)
+            should_stop: Optional callable returning True to stop the loop
+        """
+        from app import db
+
+        if poll_interval is None:
+            poll_interval = current_app.config.get('STRIPE_EVENTS_POLL_INTERVAL', 1)
+
+        while not (should_stop and should_stop()):
+            try:
+                applied = self.drain_once()
+            except Exception:
+                db.session.rollback()
+                current_app.logger.exception('Stripe event processor error')
+                applied = 0
+            finally:
+                db.session.remove()
+            if not applied:
+                sleep(poll_interval)
+
+
+def start_background_processor(app, socketio):
+    """
+    Run the Stripe event processor as a background task in this process
+
+    Args:
+        app: Flask application
+        socketio: SocketIO instance (eventlet/thread-safe task runner)
+    """
+    def run():
+        with app.app_context():
+            StripeEventProcessor().run(sleep=socketio.sleep)
+
+    socketio.start_background_task(run)
@@ -0,0 +1,286 @@
+"""
+Process-wide Stripe gateway
+
+One StripeClient per process (per secret key) on a pooled keep-alive
+requests.Session, with explicit connect/read timeouts and network retries.
+Calls go through a circuit breaker that fails fast while Stripe is degraded,
+and every call records its latency under `stripe.<operation>`.
+"""
+import threading
+import time
+
+import requests
+import stripe
+from flask import current_app
+from requests.adapters import HTTPAdapter
+
+from app.utils import metrics
+
+
+class StripeUnavailableError(stripe.APIConnectionError):
+    """Raised without calling Stripe while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    After `failure_threshold` consecutive upstream failures the breaker opens
+    and calls fail immediately for `reset_timeout` seconds. The first call
+    after that is let through as a probe: success closes the breaker, failure
+    opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if self.clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        """Whether a call may go out now"""
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = self.clock()
+            self._probing = False
+
+
+def _is_upstream_failure(error):
+    """Errors that say Stripe (or the network to it) is degraded, not that the request was bad"""
+    if isinstance(error, (stripe.APIConnectionError, stripe.RateLimitError)):
+        return True
+    if isinstance(error, stripe.APIError):
+        return True
+    return isinstance(error, stripe.StripeError) and (error.http_status or 0) >= 500
+
+
+class StripeGateway:
+    """Pooled, instrumented access to the Stripe API"""
+
+    def __init__(self, api_key, timeout=15.0, connect_timeout=5.0, max_retries=2,
+                 pool_size=10, breaker=None, http_client=None, fast_timeout=3.0, fast_http_client=None,
+                 api_base=None):
+        """
+        Build the client and its HTTP pool
+
+        Args:
+            api_key: Stripe secret key
+            timeout: Read timeout in seconds
+            connect_timeout: Connect timeout in seconds
+            max_retries: Network retries (Stripe adds idempotency keys to retried POSTs)
+            pool_size: Keep-alive connections kept to api.stripe.com
+            breaker: CircuitBreaker (default: a new one)
+            http_client: Override the HTTP client (tests)
+            fast_timeout: Total budget for lookups on the customer's request path
+            fast_http_client: Override the fast-path HTTP client (tests)
+            api_base: Override the API host (e.g. a local stripe-mock server)
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        if http_client is None:
+            http_client = stripe.RequestsClient(timeout=(connect_timeout, timeout), session=session)
+            fast_http_client = fast_http_client or stripe.RequestsClient(
+                timeout=(min(connect_timeout, fast_timeout), fast_timeout), session=session
+            )
+        fast_http_client = fast_http_client or http_client
+
+        base_addresses = {'api': api_base} if api_base else None
+
+        self.api_key = api_key
+        self.breaker = breaker or CircuitBreaker()
+        self.client = stripe.StripeClient(
+            api_key,
+            http_client=http_client,
+            max_network_retries=max_retries,
+            base_addresses=base_addresses
+        )
+        # Same connection pool, short timeout and no retries: for lookups a customer waits on
+        self.fast_client = stripe.StripeClient(
+            api_key,
+            http_client=fast_http_client,
+            max_network_retries=0,
+            base_addresses=base_addresses
+        )
+
+    def call(self, operation, fn, *args, **kwargs):
+        """
+        Run one Stripe API call through the breaker and record its latency
+
+        Args:
+            operation: Metric name suffix (e.g. 'checkout_session.create')
+            fn: Bound StripeClient service method
+
+        Returns:
+            The Stripe object returned by fn
+        """
+        if not self.breaker.allow():
+            metrics.incr(f'stripe.{operation}.rejected')
+            raise StripeUnavailableError('Stripe is temporarily unavailable (circuit open)')
+
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except stripe.StripeError as e:
+            if _is_upstream_failure(e):
+                self.breaker.record_failure()
+                metrics.incr(f'stripe.{operation}.upstream_errors')
+            else:
+                self.breaker.record_success()
+                metrics.incr(f'stripe.{operation}.errors')
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            metrics.incr(f'stripe.{operation}.upstream_errors')
+            raise
+        else:
+            self.breaker.record_success()
+            return result
+        finally:
+            metrics.observe(f'stripe.{operation}', (time.perf_counter() - start) * 1000.0)
+            metrics.gauge('stripe.circuit_open', int(self.breaker.state == CircuitBreaker.OPEN))
+
+    # ------------------------------------------------------------------
+    # Operations used by the app
+    # ------------------------------------------------------------------
+
+    def create_checkout_session(self, params, idempotency_key=None):
+        """Create a Checkout Session"""
+        options = {'idempotency_key': idempotency_key} if idempotency_key else None
+        return self.call('checkout_session.create', self.client.v1.checkout.sessions.create, params, options)
+
+    def retrieve_checkout_session(self, session_id, fast=False):
+        """
+        Retrieve a Checkout Session
+
+        Args:
+            session_id: Checkout Session ID
+            fast: Use the short-timeout, no-retry client (STRIPE_FAST_TIMEOUT)
+        """
+        client = self.fast_client if fast else self.client
+        operation = 'checkout_session.retrieve_fast' if fast else 'checkout_session.retrieve'
+        return self.call(operation, client.v1.checkout.sessions.retrieve, session_id)
+
+    def list_checkout_sessions(self, params):
+        """List Checkout Sessions (one page; newest first, paginate with starting_after)"""
+        return self.call('checkout_session.list', self.client.v1.checkout.sessions.list, params)
+
+    def create_refund(self, params, idempotency_key=None):
+        """Create a Refund"""
+        options = {'idempotency_key': idempotency_key} if idempotency_key else None
+        return self.call('refund.create', self.client.v1.refunds.create, params, options)
+
+    def create_payment_intent(self, params, idempotency_key=None):
+        """Create a PaymentIntent"""
+        options = {'idempotency_key': idempotency_key} if idempotency_key else None
+        return self.call('payment_intent.create', self.client.v1.payment_intents.create, params, options)
+
+    def retrieve_payment_intent(self, payment_intent_id):
+        """Retrieve a PaymentIntent"""
+        return self.call('payment_intent.retrieve', self.client.v1.payment_intents.retrieve, payment_intent_id)
+
+    def create_customer(self, params, idempotency_key=None):
+        """Create a Customer"""
+        options = {'idempotency_key': idempotency_key} if idempotency_key else None
+        return self.call('customer.create', self.client.v1.customers.create, params, options)
+
+    @staticmethod
+    def construct_event(payload, sig_header, secret):
+        """
+        Verify a webhook signature and parse the event (no network call)
+
+        Raises:
+            ValueError: Invalid payload
+            stripe.SignatureVerificationError: Invalid signature
+        """
+        start = time.perf_counter()
+        try:
+            return stripe.Webhook.construct_event(payload, sig_header, secret)
+        finally:
+            metrics.observe('stripe.webhook.verify', (time.perf_counter() - start) * 1000.0)
+
+
+_gateways = {}
+_gateways_lock = threading.Lock()
+
+
+def get_stripe_gateway():
+    """
+    Get this process's gateway for the configured STRIPE_SECRET_KEY
+
+    Returns:
+        StripeGateway
+
+    Raises:
+        ValueError: STRIPE_SECRET_KEY is not configured
+    """
+    api_key = current_app.config.get('STRIPE_SECRET_KEY')
+    if not api_key:
+        raise ValueError('STRIPE_SECRET_KEY not found in configuration')
+
+    gateway = _gateways.get(api_key)
+    if gateway is not None:
+        return gateway
+
+    config = current_app.config
+    with _gateways_lock:
+        gateway = _gateways.get(api_key)
+        if gateway is None:
+            gateway = StripeGateway(
+                api_key,
+                timeout=config.get('STRIPE_REQUEST_TIMEOUT', 15.0),
+                connect_timeout=config.get('STRIPE_CONNECT_TIMEOUT', 5.0),
+                max_retries=config.get('STRIPE_MAX_NETWORK_RETRIES', 2),
+                pool_size=config.get('STRIPE_HTTP_POOL_SIZE', 10),
+                fast_timeout=config.get('STRIPE_FAST_TIMEOUT', 3.0),
+                api_base=config.get('STRIPE_API_BASE'),
+                breaker=CircuitBreaker(
+                    failure_threshold=config.get('STRIPE_BREAKER_FAILURES', 5),
+                    reset_timeout=config.get('STRIPE_BREAKER_RESET_SECONDS', 30)
+                )
+            )
+            _gateways[api_key] = gateway
+    return gateway
+
+
+def reset_stripe_gateways():
+    """Drop cached gateways (used by tests)"""
+    with _gateways_lock:
+        _gateways.clear()
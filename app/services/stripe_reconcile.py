@@ -0,0 +1,182 @@
+"""
+Stripe Checkout Session reconciliation
+
+Backfills PublicBooking rows the webhook never delivered (or the success
+page only recorded as an unverified placeholder). Pages through completed
+Checkout Sessions with `starting_after` cursors, diffs each page against
+PublicBooking by stripe_checkout_session_id with one query, and writes the
+missing/stale rows with one commit per page. A high-water mark in
+sync_state makes later runs incremental.
+"""
+import time
+
+from flask import current_app
+
+from app.utils import metrics
+
+
+HIGH_WATER_MARK_KEY = 'stripe_reconcile:checkout_sessions'
+
+
+def _is_stale(booking, checkout_session):
+    """Whether the stored booking is missing payment details the session has"""
+    return (
+        booking.paid_at is None
+        or booking.stripe_payment_intent_id != (checkout_session.get('payment_intent') or booking.stripe_payment_intent_id)
+        or booking.amount_cents != int(checkout_session.get('amount_total') or booking.amount_cents or 0)
+    )
+
+
+class StripeReconciler:
+    """Reconciles paid Checkout Sessions into PublicBooking"""
+
+    def __init__(self, gateway=None, page_size=None):
+        """
+        Args:
+            gateway: StripeGateway (default: this process's gateway)
+            page_size: Sessions per list call and per commit (max 100)
+        """
+        from app.services.stripe_gateway import get_stripe_gateway
+
+        self.gateway = gateway or get_stripe_gateway()
+        self.page_size = min(100, page_size or current_app.config.get('STRIPE_RECONCILE_PAGE_SIZE', 100))
+        self.overlap = current_app.config.get('STRIPE_RECONCILE_OVERLAP_SECONDS', 86400)
+
+    def iter_pages(self, created_gte=None):
+        """
+        Yield pages of completed Checkout Sessions, newest first
+
+        Args:
+            created_gte: Only sessions created at or after this epoch second
+        """
+        params = {'limit': self.page_size, 'status': 'complete'}
+        if created_gte is not None:
+            params['created'] = {'gte': int(created_gte)}
+
+        while True:
+            page = self.gateway.list_checkout_sessions(params)
+            sessions = list(page.data)
+            if sessions:
+                yield sessions
+            if not page.has_more or not sessions:
+                return
+            params = dict(params, starting_after=sessions[-1].id)
+
+    def _reconcile_page(self, sessions, dry_run=False):
+        """
+        Insert/update the bookings for one page of sessions
+
+        Returns:
+            (inserted, updated)
+        """
+        from app import db
+        from app.models.public_booking import PublicBooking
+        from app.routes.payment import PACKAGES
+
+        paid = {}
+        for cs in sessions:
+            package = (cs.get('metadata') or {}).get('package')
+            if cs.get('payment_status') == 'paid' and package in PACKAGES:
+                paid[cs.get('id')] = (cs, package)
+        if not paid:
+            return 0, 0
+
+        existing = {
+            booking.stripe_checkout_session_id: booking
+            for booking in PublicBooking.query.filter(PublicBooking.stripe_checkout_session_id.in_(list(paid)))
+        }
+
+        inserted = updated = 0
+        for session_id, (cs, package) in paid.items():
+            booking = existing.get(session_id)
+            if booking is None:
+                if dry_run:
+                    inserted += 1
+                    continue
+                booking = self._insert(session_id, cs, package)
+                if booking is None:
+                    inserted += 1
+                    continue
+            if _is_stale(booking, cs):
+                booking.apply_checkout_session(cs)
+                updated += 1
+
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+        return inserted, updated
+
+    @staticmethod
+    def _insert(session_id, cs, package):
+        """
+        Insert one booking inside a savepoint
+
+        The webhook or the success page can record the same session between
+        the page's IN query and this insert; the unique constraint then only
+        rolls back the savepoint.
+
+        Returns:
+            None if inserted, else the booking the other path wrote (to merge into)
+        """
+        from sqlalchemy.exc import IntegrityError
+        from app import db
+        from app.models.public_booking import PublicBooking
+        from app.routes.payment import PACKAGES
+
+        booking = PublicBooking(
+            package_key=package,
+            package_name=PACKAGES[package]['name'],
+            stripe_checkout_session_id=session_id,
+            status='paid'
+        )
+        booking.apply_checkout_session(cs)
+        try:
+            with db.session.begin_nested():
+                db.session.add(booking)
+            return None
+        except IntegrityError:
+            return PublicBooking.query.filter_by(stripe_checkout_session_id=session_id).one()
+
+    def run(self, full=False, dry_run=False):
+        """
+        Reconcile Checkout Sessions since the last run (or all of them)
+
+        Args:
+            full: Ignore the high-water mark and scan every session
+            dry_run: Report what would change without writing
+
+        Returns:
+            Dict with pages, scanned, inserted and updated counts
+        """
+        from app import db
+        from app.models.sync_state import SyncState
+
+        started = int(time.time())
+        created_gte = None
+        if not full:
+            high_water_mark = SyncState.get_value(HIGH_WATER_MARK_KEY)
+            if high_water_mark is not None:
+                # Sessions stay open for up to 24h, so one created just before
+                # the last run can have completed since
+                created_gte = max(0, int(high_water_mark) - self.overlap)
+
+        result = {'pages': 0, 'scanned': 0, 'inserted': 0, 'updated': 0}
+        for sessions in self.iter_pages(created_gte=created_gte):
+            inserted, updated = self._reconcile_page(sessions, dry_run=dry_run)
+            result['pages'] += 1
+            result['scanned'] += len(sessions)
+            result['inserted'] += inserted
+            result['updated'] += updated
+
+        if not dry_run:
+            SyncState.set_value(HIGH_WATER_MARK_KEY, started)
+            db.session.commit()
+
+        metrics.incr('stripe_reconcile.inserted', result['inserted'])
+        metrics.incr('stripe_reconcile.updated', result['updated'])
+        current_app.logger.info(
+            f"Stripe reconcile: {result['scanned']} sessions in {result['pages']} pages, "
+            f"{result['inserted']} inserted, {result['updated']} updated"
+        )
+        return result
@@ -0,0 +1,87 @@
+/**
+ * Customer Chat JavaScript
+ * Streams assistant replies over the /chat SocketIO namespace.
+ * History is kept on the server, so only the new message is sent.
+ */
+
+document.addEventListener('DOMContentLoaded', function() {
+    const widget = document.getElementById('chat-widget');
+    if (!widget || typeof io === 'undefined') {
+        return;
+    }
+
+    const panel = document.getElementById('chat-panel');
+    const log = document.getElementById('chat-log');
+    const form = document.getElementById('chat-form');
+    const input = document.getElementById('chat-input');
+    const sendButton = form.querySelector('button[type="submit"]');
+
+    let socket = null;
+    let reply = null;
+
+    function addMessage(role, text) {
+        const bubble = document.createElement('div');
+        bubble.className = role === 'user'
+            ? 'ml-auto max-w-[85%] bg-[#00D4FF] text-[#0F172A] rounded-lg px-3 py-2 mb-2 whitespace-pre-wrap'
+            : 'mr-auto max-w-[85%] bg-gray-100 text-[#0F172A] rounded-lg px-3 py-2 mb-2 whitespace-pre-wrap';
+        bubble.textContent = text;
+        log.appendChild(bubble);
+        log.scrollTop = log.scrollHeight;
+        return bubble;
+    }
+
+    function setBusy(busy) {
+        input.disabled = busy;
+        sendButton.disabled = busy;
+    }
+
+    function connect() {
+        socket = io('/chat');
+
+        socket.on('chunk', (data) => {
+            if (!reply) {
+                reply = addMessage('assistant', '');
+            }
+            reply.textContent += data.text;
+            log.scrollTop = log.scrollHeight;
+        });
+
+        socket.on('done', () => {
+            reply = null;
+            setBusy(false);
+            input.focus();
+        });
+
+        socket.on('chat_error', (data) => {
+            reply = null;
+            addMessage('assistant', data.error);
+            setBusy(false);
+        });
+    }
+
+    // Replace the contact-page fallback from utils.js
+    window.toggleChat = function() {
+        panel.classList.toggle('hidden');
+        if (!panel.classList.contains('hidden')) {
+            if (!socket) {
+                connect();
+            }
+            input.focus();
+        }
+    };
+
+    document.getElementById('chat-toggle').addEventListener('click', window.toggleChat);
+    document.getElementById('chat-close').addEventListener('click', window.toggleChat);
+
+    form.addEventListener('submit', (event) => {
+        event.preventDefault();
+        const message = input.value.trim();
+        if (!message) {
+            return;
+        }
+        addMessage('user', message);
+        input.value = '';
+        setBusy(true);
+        socket.emit('message', { message: message });
+    });
+});
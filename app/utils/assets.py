@@ -0,0 +1,320 @@
+"""
+Fingerprinted static assets
+
+`flask assets-build` copies every static file (minus uploads) into
+static/build/ under a content-hashed name, concatenates and minifies the
+BUNDLES, writes precompressed .gz and .br siblings for text assets, and
+records it all in static/build/manifest.json.
+
+With ASSETS_USE_MANIFEST on, each worker loads the manifest once at boot.
+url_for('static', filename='css/style.css') then returns the hashed URL,
+and the static view serves build/ files with a one-year immutable
+Cache-Control, picking the .br or .gz sibling the client accepts. Without a
+manifest (development) URLs and the static view are unchanged, and
+bundle_urls() returns the bundle's source files.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+import brotli
+from flask import current_app, request, send_from_directory, url_for
+
+
+BUILD_DIR = 'build'
+MANIFEST_NAME = 'manifest.json'
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Bundle name -> source files, concatenated in order
+BUNDLES = {
+    'js/site.js': ['js/utils.js', 'js/main.js', 'js/navbar.js'],
+}
+
+# Output of `npm run build:css` (Tailwind + style.css); see tailwind.config.js
+TAILWIND_STYLESHEET = 'css/site.css'
+
+EXCLUDED_DIRS = ('uploads', BUILD_DIR)
+EXCLUDED_FILES = {'css/tailwind.input.css'}
+COMPRESSIBLE = {'.css', '.js', '.json', '.svg', '.txt', '.xml'}
+
+# Preferred first; the header value is what Accept-Encoding names them
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+_CSS_TOKEN = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|/\*.*?\*/''', re.S)
+
+
+def _squeeze_css(text):
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{};,])\s*', r'\1', text)
+    return re.sub(r':\s+', ':', text.replace(';}', '}'))
+
+
+def minify_css(source):
+    """Strip comments and collapse whitespace outside strings (selectors keep their descendant spaces)"""
+    parts, position = [], 0
+    for match in _CSS_TOKEN.finditer(source):
+        parts.append(_squeeze_css(source[position:match.start()]))
+        if match.group(1):
+            parts.append(match.group(1))
+        position = match.end()
+    parts.append(_squeeze_css(source[position:]))
+    return ''.join(parts).strip() + '\n'
+
+
+def minify_js(source):
+    """
+    Conservative JS minification
+
+    Drops indentation, blank lines, whole-line // comments and block comments
+    that stand on their own lines. Line breaks are kept so automatic semicolon
+    insertion behaves exactly as in the source; gzip/brotli take care of the
+    rest.
+    """
+    lines, in_comment = [], False
+    for line in source.splitlines():
+        text = line.strip()
+        if in_comment:
+            end = text.find('*/')
+            if end == -1:
+                continue
+            in_comment = False
+            text = text[end + 2:].strip()
+        elif text.startswith('/*'):
+            end = text.find('*/', 2)
+            if end == -1:
+                in_comment = True
+                continue
+            if end == len(text) - 2:
+                continue
+        if text and not text.startswith('//'):
+            lines.append(text)
+    return '\n'.join(lines) + '\n'
+
+
+def _minify(path, data):
+    minifier = {'.css': minify_css, '.js': minify_js}.get(os.path.splitext(path)[1])
+    if minifier is None:
+        return data
+    try:
+        text = data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data  # Not UTF-8 (e.g. a UTF-16 file): ship it untouched
+    return minifier(text).encode('utf-8')
+
+
+def hashed_name(path, data):
+    """css/style.css + content -> css/style.<hash>.css"""
+    root, ext = os.path.splitext(path)
+    return f'{root}.{hashlib.sha256(data).hexdigest()[:12]}{ext}'
+
+
+def _source_files(static_folder):
+    for directory, subdirs, files in os.walk(static_folder):
+        relative_dir = os.path.relpath(directory, static_folder)
+        if relative_dir == '.':
+            subdirs[:] = [d for d in subdirs if d not in EXCLUDED_DIRS]
+        for name in files:
+            path = os.path.normpath(os.path.join(relative_dir, name)).replace(os.sep, '/')
+            if not name.startswith('.') and path not in EXCLUDED_FILES:
+                yield path
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def build_assets(static_folder, bundles=None, minify=True):
+    """
+    Build fingerprinted (and precompressed) assets into static/build/
+
+    Args:
+        static_folder: App static folder
+        bundles: {bundle name: [source paths]} (default: BUNDLES)
+        minify: Minify CSS and JS
+
+    Returns:
+        Manifest dict ({'assets': {logical: built}, 'encodings': {built: [...]},
+        'sizes': {logical: {'source', 'built', 'gzip', 'br'}}})
+    """
+    bundles = BUNDLES if bundles is None else bundles
+    build_root = os.path.join(static_folder, BUILD_DIR)
+    manifest = {'assets': {}, 'encodings': {}, 'sizes': {}}
+
+    contents = {}
+    for path in sorted(_source_files(static_folder)):
+        with open(os.path.join(static_folder, path), 'rb') as f:
+            contents[path] = f.read()
+    for name, sources in bundles.items():
+        missing = [source for source in sources if source not in contents]
+        if missing:
+            raise ValueError(f'Bundle {name} is missing {", ".join(missing)}')
+        # Separator guards against a file without a trailing newline or semicolon
+        contents[name] = b'\n;\n'.join(contents[source].rstrip() for source in sources) + b'\n'
+
+    for path, data in contents.items():
+        source_size = len(data)
+        if minify:
+            data = _minify(path, data)
+        built = f'{BUILD_DIR}/{hashed_name(path, data)}'
+        target = os.path.join(static_folder, built)
+        _write(target, data)
+        manifest['assets'][path] = built
+        sizes = {'source': source_size, 'built': len(data)}
+
+        if os.path.splitext(path)[1] in COMPRESSIBLE:
+            variants = {
+                'br': brotli.compress(data, quality=11),
+                'gzip': gzip.compress(data, compresslevel=9, mtime=0),
+            }
+            for encoding, suffix in ENCODINGS:
+                if len(variants[encoding]) < len(data):
+                    _write(target + suffix, variants[encoding])
+                    manifest['encodings'].setdefault(built, []).append(encoding)
+                    sizes[encoding] = len(variants[encoding])
+        manifest['sizes'][path] = sizes
+
+    _write(os.path.join(build_root, MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+
+def prune_build(static_folder, manifest):
+    """
+    Delete built files the manifest no longer references
+
+    Returns:
+        Number of files removed
+    """
+    keep = {MANIFEST_NAME}
+    for built in manifest['assets'].values():
+        relative = built[len(BUILD_DIR) + 1:]
+        keep.add(relative)
+        keep.update(relative + suffix for _, suffix in ENCODINGS)
+
+    build_root = os.path.join(static_folder, BUILD_DIR)
+    removed = 0
+    for path in list(_walk(build_root)):
+        if os.path.relpath(path, build_root).replace(os.sep, '/') not in keep:
+            os.remove(path)
+            removed += 1
+    return removed
+
+
+def _walk(root):
+    for directory, _, files in os.walk(root):
+        for name in files:
+            yield os.path.join(directory, name)
+
+
+def load_manifest(app):
+    """
+    Load static/build/manifest.json into app.extensions (once per worker)
+
+    Returns:
+        Manifest dict, or None when ASSETS_USE_MANIFEST is off or it is missing
+    """
+    manifest = None
+    if app.config.get('ASSETS_USE_MANIFEST'):
+        path = os.path.join(app.static_folder, BUILD_DIR, MANIFEST_NAME)
+        try:
+            with open(path) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            app.logger.warning(f'[WARN] No asset manifest at {path}; run `flask assets-build`. Serving unversioned files')
+    app.extensions['assets'] = manifest
+    return manifest
+
+
+def _manifest():
+    return current_app.extensions.get('assets')
+
+
+def hashed_static_url(endpoint, values):
+    """url_defaults hook: swap a static filename for its fingerprinted build"""
+    if endpoint != 'static':
+        return
+    manifest = _manifest()
+    if manifest and values.get('filename') in manifest['assets']:
+        values['filename'] = manifest['assets'][values['filename']]
+
+
+def bundle_urls(name):
+    """
+    URLs to include for a bundle
+
+    Returns:
+        The built bundle's URL when the manifest has it, otherwise the URL of
+        each source file
+    """
+    manifest = _manifest()
+    if manifest and name in manifest['assets']:
+        return [url_for('static', filename=name)]
+    return [url_for('static', filename=source) for source in BUNDLES[name]]
+
+
+def send_static(filename):
+    """Static view: fingerprinted files are immutable and served precompressed"""
+    app = current_app
+    if not filename.startswith(BUILD_DIR + '/'):
+        return app.send_static_file(filename)
+
+    manifest = _manifest() or {}
+    available = manifest.get('encodings', {}).get(filename, [])
+    mimetype = mimetypes.guess_type(filename)[0]
+    for encoding, suffix in ENCODINGS:
+        if encoding in available and request.accept_encodings[encoding]:
+            response = send_from_directory(app.static_folder, filename + suffix, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(app.static_folder, filename, max_age=IMMUTABLE_MAX_AGE)
+
+    if available:
+        response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def detect_stylesheet(app):
+    """
+    Check for the compiled Tailwind stylesheet (once per worker)
+
+    base.html links it when present. Only a DEBUG app falls back to the
+    cdn.tailwindcss.com runtime plus style.css (development without npm);
+    the production CSP blocks that script.
+
+    Returns:
+        True if static/css/site.css exists
+    """
+    compiled = bool(app.has_static_folder and os.path.exists(os.path.join(app.static_folder, TAILWIND_STYLESHEET)))
+    app.extensions['tailwind_css'] = compiled
+    app.extensions['tailwind_cdn'] = not compiled and bool(app.config.get('DEBUG'))
+    return compiled
+
+
+def init_assets(app):
+    """
+    Load the manifest and install the hashed-URL hook, bundle helper and static view
+
+    Args:
+        app: Flask application
+
+    Returns:
+        Number of fingerprinted assets (0 without a manifest)
+
+    Raises:
+        RuntimeError: site.css is missing outside DEBUG (pages would be unstyled)
+    """
+    manifest = load_manifest(app)
+    if not detect_stylesheet(app) and not app.config.get('DEBUG'):
+        raise RuntimeError(f'{TAILWIND_STYLESHEET} is missing; run `npm run build:css` (the Tailwind CDN is not allowed by the CSP)')
+    app.url_defaults(hashed_static_url)
+    app.add_template_global(bundle_urls)
+    if app.has_static_folder:
+        app.view_functions['static'] = send_static
+    return len(manifest['assets']) if manifest else 0
@@ -0,0 +1,93 @@
+"""
+Import-time profiling
+
+Runs a snippet in a fresh interpreter with `python -X importtime` and parses
+the per-module timings it writes to stderr. Used by `flask import-profile`
+to keep worker cold-start regressions (a heavy SDK imported at module load)
+visible.
+"""
+import os
+import re
+import subprocess
+import sys
+
+
+TARGETS = {
+    'package': 'import app',
+    'app': 'from app import create_app; create_app({config!r})',
+}
+
+_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+def parse_importtime(text):
+    """
+    Parse `-X importtime` output
+
+    Args:
+        text: stderr of the profiled interpreter
+
+    Returns:
+        List of dicts with module, self_us, cumulative_us and depth, in the
+        order Python reported them (children before their parent)
+    """
+    entries = []
+    for line in text.splitlines():
+        match = _LINE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        entries.append({
+            'module': module,
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+            'depth': (len(indent) - 1) // 2
+        })
+    return entries
+
+
+def by_package(entries):
+    """
+    Self time summed per top-level package
+
+    Returns:
+        List of (package, self_us) tuples, slowest first
+    """
+    totals = {}
+    for entry in entries:
+        package = entry['module'].split('.')[0]
+        totals[package] = totals.get(package, 0) + entry['self_us']
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def total_us(entries):
+    """Total import time (sum of the top-level imports' cumulative times)"""
+    return sum(entry['cumulative_us'] for entry in entries if entry['depth'] == 0)
+
+
+def profile_imports(code, cwd=None, env=None, python=sys.executable, timeout=120):
+    """
+    Run code in a fresh interpreter under -X importtime
+
+    Args:
+        code: Python source passed to -c
+        cwd: Working directory (default: current)
+        env: Extra environment variables
+        python: Interpreter to profile with
+        timeout: Seconds before giving up
+
+    Returns:
+        Parsed entries (see parse_importtime)
+
+    Raises:
+        RuntimeError: The snippet failed
+    """
+    result = subprocess.run(
+        [python, '-X', 'importtime', '-c', code],
+        cwd=cwd, env=dict(os.environ, **(env or {})),
+        capture_output=True, text=True, timeout=timeout
+    )
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+        raise RuntimeError('\n'.join(errors[-10:]) or f'exit status {result.returncode}')
+    return parse_importtime(result.stderr)
@@ -0,0 +1,93 @@
+"""
+Lightweight in-process metrics registry
+
+Counters, gauges and timings are kept per worker process and exposed as
+JSON by the /health/metrics endpoint (admins, or a bearer METRICS_TOKEN).
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_timings = {}
+
+
+def incr(name, value=1):
+    """
+    Increment a counter
+
+    Args:
+        name: Metric name (dotted, e.g. 'email.sent')
+        value: Amount to add (default: 1)
+    """
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def gauge(name, value):
+    """
+    Set a gauge to its current value
+
+    Args:
+        name: Metric name
+        value: Current value
+    """
+    with _lock:
+        _gauges[name] = value
+
+
+def observe(name, duration_ms):
+    """
+    Record a timing observation
+
+    Args:
+        name: Metric name
+        duration_ms: Observed duration in milliseconds
+    """
+    with _lock:
+        timing = _timings.setdefault(name, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'last_ms': 0.0})
+        timing['count'] += 1
+        timing['total_ms'] += duration_ms
+        timing['last_ms'] = duration_ms
+        if duration_ms > timing['max_ms']:
+            timing['max_ms'] = duration_ms
+
+
+@contextmanager
+def timer(name):
+    """Time the wrapped block and record it under `name`"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, (time.perf_counter() - start) * 1000.0)
+
+
+def snapshot():
+    """
+    Get a copy of all metrics
+
+    Returns:
+        Dict with counters, gauges and timings (timings include avg_ms)
+    """
+    with _lock:
+        timings = {}
+        for name, timing in _timings.items():
+            timings[name] = dict(timing)
+            timings[name]['avg_ms'] = timing['total_ms'] / timing['count'] if timing['count'] else 0.0
+        return {
+            'counters': dict(_counters),
+            'gauges': dict(_gauges),
+            'timings': timings
+        }
+
+
+def reset():
+    """Clear all metrics (used by tests)"""
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _timings.clear()
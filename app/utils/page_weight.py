@@ -0,0 +1,146 @@
+"""
+Page-weight report
+
+Renders pages through the test client and totals what a first visit
+downloads before the page can paint: the HTML document plus every
+stylesheet and script in it. Local files are sized from disk (raw and
+gzipped) and external ones are fetched (transfer size as served). Used by
+`flask page-weight` to compare the Tailwind CDN runtime ("cdn") with the
+compiled site.css ("compiled").
+"""
+import gzip
+import os
+from html.parser import HTMLParser
+
+import brotli
+import requests
+from werkzeug.exceptions import HTTPException
+
+
+MODES = ('cdn', 'compiled')
+
+
+class _AssetParser(HTMLParser):
+    """Collects <script src> and <link rel="stylesheet" href> URLs in document order"""
+
+    def __init__(self):
+        super().__init__()
+        self.assets = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'script' and attrs.get('src'):
+            self.assets.append(('script', attrs['src']))
+        elif tag == 'link' and 'stylesheet' in (attrs.get('rel') or '').split() and attrs.get('href'):
+            self.assets.append(('stylesheet', attrs['href']))
+
+
+def page_assets(html):
+    """
+    Scripts and stylesheets referenced by a page
+
+    Returns:
+        List of (kind, url) tuples
+    """
+    parser = _AssetParser()
+    parser.feed(html)
+    return parser.assets
+
+
+def _local_size(app, url):
+    """(raw, gzip) bytes of a /static URL, or None if it is not a static file"""
+    if not url.startswith('/') or url.startswith('//'):
+        return None
+    try:
+        endpoint, values = app.url_map.bind('localhost').match(url.split('?', 1)[0])
+    except HTTPException:
+        return None
+    if endpoint != 'static':
+        return None
+    filename = os.path.join(app.static_folder, values['filename'])
+    if not os.path.isfile(filename):
+        return None
+    with open(filename, 'rb') as f:
+        data = f.read()
+    return len(data), len(gzip.compress(data))
+
+
+def _remote_size(url, timeout):
+    """(raw, transfer) bytes of an external URL, or None if it could not be fetched"""
+    if url.startswith('//'):
+        url = 'https:' + url
+    try:
+        response = requests.get(url, headers={'Accept-Encoding': 'gzip, br'}, stream=True, timeout=timeout)
+        response.raise_for_status()
+        transfer = response.raw.read(decode_content=False)
+    except requests.exceptions.RequestException:
+        return None
+    encoding = response.headers.get('Content-Encoding', '')
+    if encoding == 'br':
+        raw = len(brotli.decompress(transfer))
+    elif encoding == 'gzip':
+        raw = len(gzip.decompress(transfer))
+    else:
+        raw = len(transfer)
+    return raw, len(transfer)
+
+
+def measure_page(app, path, fetch=True, timeout=10):
+    """
+    Weigh one page as the app renders it now
+
+    Args:
+        app: Flask application
+        path: URL path to render
+        fetch: Fetch external assets (otherwise they are listed unsized)
+        timeout: Seconds per external fetch
+
+    Returns:
+        Dict with document bytes, assets (kind, url, raw, transfer, local)
+        and totals (requests, raw and transfer bytes, unsized count)
+    """
+    response = app.test_client().get(path)
+    if response.status_code != 200:
+        raise RuntimeError(f'{path} returned {response.status_code}')
+    html = response.get_data(as_text=True)
+
+    assets = []
+    for kind, url in page_assets(html):
+        local = _local_size(app, url)
+        if local is not None:
+            raw, transfer = local
+        elif fetch and url.startswith(('http://', 'https://', '//')):
+            raw, transfer = _remote_size(url, timeout) or (None, None)
+        else:
+            raw = transfer = None
+        assets.append({'kind': kind, 'url': url, 'raw': raw, 'transfer': transfer, 'local': local is not None})
+
+    return {
+        'document': len(response.data),
+        'assets': assets,
+        'requests': 1 + len(assets),
+        'raw': len(response.data) + sum(asset['raw'] or 0 for asset in assets),
+        'transfer': len(gzip.compress(response.data)) + sum(asset['transfer'] or 0 for asset in assets),
+        'unsized': sum(1 for asset in assets if asset['transfer'] is None),
+    }
+
+
+def compare_modes(app, paths, fetch=True, timeout=10):
+    """
+    Weigh pages with the Tailwind CDN runtime and with the compiled stylesheet
+
+    Returns:
+        {path: {mode: measure_page result}}
+    """
+    saved = {key: app.extensions.get(key, False) for key in ('tailwind_css', 'tailwind_cdn')}
+    results = {}
+    try:
+        for path in paths:
+            results[path] = {}
+            for mode in MODES:
+                app.extensions['tailwind_css'] = mode == 'compiled'
+                app.extensions['tailwind_cdn'] = mode == 'cdn'
+                results[path][mode] = measure_page(app, path, fetch=fetch, timeout=timeout)
+    finally:
+        app.extensions.update(saved)
+    return results
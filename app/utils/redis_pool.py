@@ -0,0 +1,95 @@
+"""
+Shared Redis connection pool
+
+create_app builds one BlockingConnectionPool per process and probes it once.
+The rate limiter, the SocketIO message queue and `app.redis_client` (caches,
+counters, chat history) all draw connections from it, instead of each
+opening its own client with its own connect-and-ping at boot. Under eventlet
+the sockets are green, so a slow probe or a caller waiting for a free
+connection yields to other greenlets instead of blocking the worker.
+
+The one exception is the SocketIO queue's pubsub listener. It sits idle on
+its socket between messages, so under REDIS_SOCKET_TIMEOUT it would time
+out, reconnect and miss whatever was published in the gap. It gets its own
+small pool without a read timeout, kept honest by TCP keepalive and health
+checks; the command pool keeps the timeout for everything else.
+"""
+import time
+
+import redis
+import socketio
+
+
+def create_pool(url, config):
+    """
+    Build the process's Redis pool (connects lazily)
+
+    Args:
+        url: Redis URL
+        config: App config (REDIS_* settings)
+
+    Returns:
+        redis.BlockingConnectionPool
+    """
+    return redis.BlockingConnectionPool.from_url(
+        url,
+        max_connections=config.get('REDIS_MAX_CONNECTIONS', 50),
+        timeout=config.get('REDIS_POOL_TIMEOUT', 5),
+        socket_connect_timeout=config.get('REDIS_CONNECT_TIMEOUT', 1),
+        socket_timeout=config.get('REDIS_SOCKET_TIMEOUT', 5),
+        health_check_interval=30
+    )
+
+
+def create_pubsub_pool(url, config):
+    """
+    Build the pool for long-lived pubsub listeners (no read timeout)
+
+    Args:
+        url: Redis URL
+        config: App config (REDIS_* settings)
+
+    Returns:
+        redis.ConnectionPool
+    """
+    return redis.ConnectionPool.from_url(
+        url,
+        max_connections=config.get('REDIS_PUBSUB_MAX_CONNECTIONS', 2),
+        socket_connect_timeout=config.get('REDIS_CONNECT_TIMEOUT', 1),
+        socket_timeout=None,  # An idle listener must block until the next message
+        socket_keepalive=True,
+        health_check_interval=config.get('REDIS_PUBSUB_HEALTH_CHECK_INTERVAL', 30)
+    )
+
+
+def probe(client):
+    """
+    Ping Redis once
+
+    Returns:
+        (ok, latency_ms, error message or None)
+    """
+    start = time.perf_counter()
+    try:
+        client.ping()
+    except Exception as e:
+        return False, (time.perf_counter() - start) * 1000.0, str(e)[:120]
+    return True, (time.perf_counter() - start) * 1000.0, None
+
+
+class PooledRedisManager(socketio.RedisManager):
+    """
+    SocketIO Redis message queue on the process's pools instead of its own client
+
+    Publishes go through the shared command pool; the listener subscribes on
+    the pubsub pool, which has no read timeout.
+    """
+
+    def __init__(self, url, connection_pool, pubsub_pool, **kwargs):
+        self.connection_pool = connection_pool
+        self.pubsub_pool = pubsub_pool
+        super().__init__(url, **kwargs)
+
+    def _redis_connect(self):
+        self.redis = redis.Redis(connection_pool=self.connection_pool)
+        self.pubsub = redis.Redis(connection_pool=self.pubsub_pool).pubsub(ignore_subscribe_messages=True)
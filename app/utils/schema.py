@@ -0,0 +1,38 @@
+"""
+Database schema checks
+
+Production does not run db.create_all() at boot; migrations are applied by
+`flask db upgrade` at deploy. create_app instead compares the database's
+Alembic revision with the migration scripts' head and logs if they differ.
+"""
+import os
+
+
+def schema_status(app, db):
+    """
+    Compare the database's Alembic revision with the migrations head
+
+    Args:
+        app: Flask application (with Flask-Migrate initialized)
+        db: SQLAlchemy extension
+
+    Returns:
+        (status, detail): status is 'current', 'behind' or 'unknown'
+    """
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    directory = app.extensions['migrate'].directory
+    if not os.path.isabs(directory):
+        directory = os.path.join(os.path.dirname(app.root_path), directory)
+
+    try:
+        heads = set(ScriptDirectory(directory).get_heads())
+        with app.app_context(), db.engine.connect() as connection:
+            current = set(MigrationContext.configure(connection).get_current_heads())
+    except Exception as e:
+        return 'unknown', str(e)[:120]
+
+    if current == heads:
+        return 'current', ','.join(sorted(heads))
+    return 'behind', f"database at {','.join(sorted(current)) or 'none'}, head {','.join(sorted(heads))}"
@@ -0,0 +1,145 @@
+"""
+Template and static-file profile
+
+Development reloads templates when they change and serves static files
+uncached. Production (TEMPLATES_AUTO_RELOAD off, JINJA_BYTECODE_CACHE on)
+never stats a template once it is loaded, and keeps compiled templates in a
+Jinja FileSystemBytecodeCache. `flask templates-compile` fills that cache at
+deploy, so a fresh worker loads bytecode instead of parsing and compiling
+every template on its first requests. `flask templates-benchmark` measures
+the difference.
+"""
+import os
+import statistics
+import tempfile
+import time
+
+from jinja2 import FileSystemBytecodeCache
+
+
+BENCHMARK_PAGES = {
+    'index.html': '/',
+    'gallery/index.html': '/gallery',
+}
+
+
+def bytecode_cache_dir(app):
+    """Directory of the Jinja bytecode cache (default: instance/jinja_cache)"""
+    return app.config.get('JINJA_BYTECODE_CACHE_DIR') or os.path.join(app.instance_path, 'jinja_cache')
+
+
+def configure_templates(app):
+    """
+    Apply the configured template profile to the app's Jinja environment
+
+    Args:
+        app: Flask application
+
+    Returns:
+        Bytecode cache directory, or None when the cache is off
+    """
+    app.jinja_env.auto_reload = bool(app.config.get('TEMPLATES_AUTO_RELOAD'))
+    if not app.config.get('JINJA_BYTECODE_CACHE'):
+        return None
+
+    directory = bytecode_cache_dir(app)
+    os.makedirs(directory, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+    return directory
+
+
+def compile_templates(app, env=None):
+    """
+    Load every template once so its bytecode is cached
+
+    Args:
+        app: Flask application
+        env: Jinja environment (default: the app's)
+
+    Returns:
+        (compiled count, {template name: error})
+    """
+    env = env or app.jinja_env
+    compiled, errors = 0, {}
+    for name in env.list_templates():
+        try:
+            env.get_template(name)
+        except Exception as e:
+            errors[name] = str(e)[:200]
+        else:
+            compiled += 1
+    return compiled, errors
+
+
+def _environment(app, auto_reload, bytecode_cache):
+    """Fresh Jinja environment with the app's globals and filters (a new worker's view)"""
+    env = app.create_jinja_environment()
+    env.globals.update(app.jinja_env.globals)
+    env.filters.update(app.jinja_env.filters)
+    env.tests.update(app.jinja_env.tests)
+    env.auto_reload = auto_reload
+    env.bytecode_cache = bytecode_cache
+    return env
+
+
+def _capture_context(app, name, path):
+    """Render path through the app once and return the context name was rendered with"""
+    from flask import template_rendered
+
+    captured = {}
+
+    def record(sender, template, context, **extra):
+        if template.name == name:
+            captured.setdefault('context', dict(context))
+
+    with template_rendered.connected_to(record, app):
+        response = app.test_client().get(path)
+    if 'context' not in captured:
+        raise RuntimeError(f'{path} did not render {name} (status {response.status_code})')
+    return captured['context']
+
+
+def benchmark_templates(app, pages=None, iterations=200):
+    """
+    Time templates under the development and production profiles
+
+    For each profile a fresh environment stands in for a new worker: `cold`
+    is its first load and render (parse and compile, or read bytecode that
+    `templates-compile` wrote), `warm` the median of later renders (which
+    stat every template in the inheritance chain when auto-reload is on).
+
+    Args:
+        app: Flask application
+        pages: {template name: URL that renders it} (default: BENCHMARK_PAGES)
+        iterations: Warm renders per template and profile
+
+    Returns:
+        {template name: {profile: {'cold_ms': float, 'warm_ms': float}}}
+    """
+    pages = pages or BENCHMARK_PAGES
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        production_cache = FileSystemBytecodeCache(directory)
+        compile_templates(app, _environment(app, False, production_cache))
+        profiles = {
+            'development': lambda: _environment(app, True, None),
+            'production': lambda: _environment(app, False, production_cache),
+        }
+
+        for name, path in pages.items():
+            context = _capture_context(app, name, path)
+            results[name] = {}
+            with app.test_request_context(path):
+                for profile, make_env in profiles.items():
+                    env = make_env()
+                    start = time.perf_counter()
+                    env.get_template(name).render(context)
+                    cold_ms = (time.perf_counter() - start) * 1000.0
+
+                    timings = []
+                    for _ in range(iterations):
+                        start = time.perf_counter()
+                        env.get_template(name).render(context)
+                        timings.append((time.perf_counter() - start) * 1000.0)
+                    results[name][profile] = {'cold_ms': cold_ms, 'warm_ms': statistics.median(timings)}
+    return results
@@ -82,6 +82,7 @@ class Config:
         'pool_pre_ping': True,
         'pool_recycle': 300,
     }
+    DB_CREATE_ALL = True  # Create missing tables at boot (dev/test)
 
     # Session
     SESSION_TYPE = 'redis'
@@ -92,6 +93,12 @@ class Config:
 
     # Redis
     REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+    REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 50))  # Shared by limiter, SocketIO and caches
+    REDIS_POOL_TIMEOUT = 5  # Seconds to wait for a free pooled connection
+    REDIS_CONNECT_TIMEOUT = 1  # Also bounds the boot probe against a missing Redis
+    REDIS_SOCKET_TIMEOUT = 5  # Command reads; the SocketIO pubsub listener has no read timeout
+    REDIS_PUBSUB_MAX_CONNECTIONS = 2  # Own pool for the SocketIO pubsub listener
+    REDIS_PUBSUB_HEALTH_CHECK_INTERVAL = 30  # Seconds; PING before reuse of an idle listener connection
 
     # Flask-Login
     REMEMBER_COOKIE_DURATION = timedelta(days=7)
@@ -111,6 +118,40 @@ class Config:
     AYRSHARE_API_KEY = os.getenv('AYRSHARE_API_KEY')
     VIMEO_ACCESS_TOKEN = os.getenv('VIMEO_ACCESS_TOKEN')
 
+    # Stripe networking (see app/services/stripe_gateway.py)
+    STRIPE_REQUEST_TIMEOUT = float(os.getenv('STRIPE_REQUEST_TIMEOUT', 15))  # Read timeout, seconds
+    STRIPE_CONNECT_TIMEOUT = float(os.getenv('STRIPE_CONNECT_TIMEOUT', 5))
+    STRIPE_MAX_NETWORK_RETRIES = int(os.getenv('STRIPE_MAX_NETWORK_RETRIES', 2))
+    STRIPE_HTTP_POOL_SIZE = 10  # Keep-alive connections per worker
+    STRIPE_FAST_TIMEOUT = float(os.getenv('STRIPE_FAST_TIMEOUT', 3))  # Success-page fallback lookup
+    STRIPE_BREAKER_FAILURES = 5  # Consecutive upstream failures before failing fast
+    STRIPE_BREAKER_RESET_SECONDS = 30  # Then one probe call is let through
+    STRIPE_API_BASE = os.getenv('STRIPE_API_BASE')  # e.g. http://localhost:12111 for stripe-mock
+    STRIPE_RECONCILE_PAGE_SIZE = 100  # Checkout Sessions per list call / commit
+    STRIPE_RECONCILE_OVERLAP_SECONDS = 60 * 60 * 24  # Sessions can complete up to 24h after creation
+
+    # Ayrshare networking (see app/services/social_service.py)
+    AYRSHARE_BASE_URL = os.getenv('AYRSHARE_BASE_URL', 'https://app.ayrshare.com/api')  # Override for a local fake server
+    AYRSHARE_TIMEOUT = float(os.getenv('AYRSHARE_TIMEOUT', 30))  # Read timeout, seconds
+    AYRSHARE_CONNECT_TIMEOUT = float(os.getenv('AYRSHARE_CONNECT_TIMEOUT', 5))
+    AYRSHARE_MAX_RETRIES = int(os.getenv('AYRSHARE_MAX_RETRIES', 3))  # On 429 (any call) and 5xx (GET/DELETE)
+    AYRSHARE_BACKOFF_SECONDS = 0.5  # Base of the jittered exponential backoff
+    AYRSHARE_BACKOFF_MAX_SECONDS = 10
+    AYRSHARE_POOL_SIZE = 10  # Keep-alive connections per worker
+    AYRSHARE_MAX_CONCURRENCY = 5  # Parallel calls in fan_out (multi-post, analytics)
+    SOCIAL_SYNC_PAGE_SIZE = 50  # Posts per commit / analytics fan-out in `flask social-sync`
+    SOCIAL_SYNC_MAX_RECORDS = 1000  # History entries requested per run
+    SOCIAL_METRICS_WINDOW_DAYS = 30  # Only posts newer than this get metric snapshots
+
+    # Stripe webhook events (stored by the webhook, applied by a processor)
+    STRIPE_EVENTS_IN_PROCESS = os.getenv('STRIPE_EVENTS_IN_PROCESS', 'True').lower() == 'true'
+    STRIPE_EVENTS_POLL_INTERVAL = 1  # Seconds between polls when the queue is empty
+    STRIPE_EVENTS_BATCH_SIZE = 50
+    STRIPE_EVENTS_MAX_ATTEMPTS = 8  # Then the event is dead-lettered
+    STRIPE_EVENTS_BACKOFF_SECONDS = 10  # Doubles on every failed attempt
+    STRIPE_EVENTS_BACKOFF_MAX_SECONDS = 1800
+    STRIPE_EVENTS_STALE_SECONDS = 300  # Reclaim events left 'processing' by a dead processor
+
     # Email Configuration
     MAIL_SERVER = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
     MAIL_PORT = int(os.getenv('MAIL_PORT', 587))
@@ -119,10 +160,31 @@ class Config:
     MAIL_PASSWORD = os.getenv('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.getenv('MAIL_USERNAME')
 
+    # Email outbox (transactional emails are queued and delivered by a worker)
+    EMAIL_WORKER_IN_PROCESS = os.getenv('EMAIL_WORKER_IN_PROCESS', 'True').lower() == 'true'
+    EMAIL_OUTBOX_POLL_INTERVAL = 2  # Seconds between polls when the queue is empty
+    EMAIL_OUTBOX_BATCH_SIZE = 50  # Messages sent per SMTP connection
+    EMAIL_OUTBOX_MAX_ATTEMPTS = 6  # Then the message is dead-lettered
+    EMAIL_OUTBOX_BACKOFF_SECONDS = 30  # Doubles on every failed attempt
+    EMAIL_OUTBOX_BACKOFF_MAX_SECONDS = 3600
+    EMAIL_OUTBOX_STALE_SECONDS = 600  # Reclaim messages left 'sending' by a dead worker
+
+    # Newsletter campaigns (flask newsletter-send)
+    NEWSLETTER_PAGE_SIZE = 200  # Subscribers per page / checkpoint
+    NEWSLETTER_SMTP_POOL_SIZE = int(os.getenv('NEWSLETTER_SMTP_POOL_SIZE', 3))  # Persistent SMTP connections
+    NEWSLETTER_RATE_PER_SECOND = float(os.getenv('NEWSLETTER_RATE_PER_SECOND', 10))  # Across all connections
+
     # Application Settings
     APP_NAME = os.getenv('APP_NAME', 'Momentum Clips')
     ADMIN_EMAIL = os.getenv('ADMIN_EMAIL', 'admin@momentumclips.com')
     SUPPORT_EMAIL = os.getenv('SUPPORT_EMAIL', 'support@momentumclips.com')
+
+    # Templates and static files (see app/utils/template_cache.py); ProductionConfig overrides
+    TEMPLATES_AUTO_RELOAD = True  # Stat templates on every render and reload edits
+    SEND_FILE_MAX_AGE_DEFAULT = 0  # Static files uncached
+    JINJA_BYTECODE_CACHE = False  # Compiled templates kept in memory only
+    JINJA_BYTECODE_CACHE_DIR = os.getenv('JINJA_BYTECODE_CACHE_DIR')  # Default: instance/jinja_cache
+    ASSETS_USE_MANIFEST = False  # Serve fingerprinted files from `flask assets-build` (app/utils/assets.py)
     
     # Retell AI Chat Widget Configuration
     RETELL_PUBLIC_KEY = os.getenv('RETELL_PUBLIC_KEY', '')
@@ -133,20 +195,62 @@ class Config:
     WTF_CSRF_TIME_LIMIT = None
     WTF_CSRF_CHECK_DEFAULT = True
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:5000').split(',')
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')  # Bearer token for /health/metrics scrapers (admins need none)
 
     # SocketIO
     SOCKETIO_MESSAGE_QUEUE = REDIS_URL
     SOCKETIO_ASYNC_MODE = 'eventlet'
 
+    # Customer chat (/chat SocketIO namespace)
+    CHAT_ENABLED = os.getenv('CHAT_ENABLED', 'true').lower() == 'true'  # Also needs ANTHROPIC_API_KEY
+    CHAT_HISTORY_TOKEN_BUDGET = 2000  # History sent per turn (estimated tokens); older turns are summarized
+    CHAT_SUMMARY_MODEL = os.getenv('CHAT_SUMMARY_MODEL')  # Default: CLAUDE_MODEL
+    CHAT_SUMMARY_MAX_TOKENS = 300
+    CHAT_HISTORY_TTL = 3600  # Seconds an idle conversation is kept in Redis
+    CHAT_MAX_CONCURRENT_STREAMS = 20  # Per worker; more are told to retry
+    CHAT_MAX_MESSAGE_CHARS = 1000
+    CHAT_BUDGET_WINDOW = 600  # Seconds per message budget window
+    CHAT_MESSAGES_PER_CONNECTION = 20  # Per window; more are refused
+    CHAT_MESSAGES_PER_IP = 60  # Per window, across connections and workers
+
     # Claude AI Configuration
     CLAUDE_MODEL = 'claude-sonnet-4-5-20250929'
     CLAUDE_MAX_TOKENS = 1024
     CLAUDE_TEMPERATURE = 0.7
+    ANTHROPIC_BASE_URL = os.getenv('ANTHROPIC_BASE_URL')  # Override the API host (local stub server)
+    ANTHROPIC_TIMEOUT = 60.0  # Read timeout in seconds (streams can run long)
+    ANTHROPIC_CONNECT_TIMEOUT = 5.0
+    ANTHROPIC_MAX_RETRIES = 2  # SDK retries 408/409/429/5xx with backoff
+    ANTHROPIC_MAX_CONNECTIONS = 20  # Per process, shared by every AIService
+    ANTHROPIC_MAX_KEEPALIVE = 10
+    AI_MAX_CONCURRENCY = 8  # Concurrent AsyncAIService calls per process
+    AI_CACHE_ENABLED = os.getenv('AI_CACHE_ENABLED', 'true').lower() == 'true'
+    AI_CACHE_TTLS = {  # Seconds a response is reused, per AIService method (0 = never cached)
+        'generate_caption': 60 * 60 * 24 * 7,
+        'analyze_customer_inquiry': 60 * 60 * 24,
+        'generate_booking_summary': 60 * 60 * 24,
+    }
+    CAPTION_PLATFORMS = ('instagram', 'tiktok', 'facebook', 'linkedin')
+    CAPTION_BATCH_SIZE = 1000  # Caption requests per Message Batch
+    CAPTION_POLL_INTERVAL = 30  # Seconds between batch status checks
+    CAPTION_MODE = os.getenv('CAPTION_MODE', 'batch')  # batch (Message Batches API) or pool (concurrent calls)
+    AI_CACHE_SQLITE_PATH = os.getenv('AI_CACHE_SQLITE_PATH')  # Fallback store without Redis (default: instance/ai_cache.sqlite3)
 
     # Booking System
     BOOKING_ADVANCE_DAYS = 90  # How far in advance users can book
     BOOKING_BUFFER_HOURS = 24  # Minimum hours before booking date
     DEFAULT_BOOKING_DURATION = 4  # Default session duration in hours
+    BOOKING_SLOT_START_HOUR = 9  # First bookable slot of the day
+    BOOKING_SLOT_END_HOUR = 17  # Slots end by this hour
+    BOOKING_SLOT_MINUTES = 60  # Slot grid size
+    AVAILABILITY_CACHE_TTL = 3600  # Seconds a cached month bitmap is kept in Redis
+    AVAILABILITY_LOCAL_CACHE_TTL = 30  # Without Redis: per-worker cache that other workers can't invalidate
+    WAIVER_TOKEN_MAX_AGE = 60 * 60 * 24 * 120  # Waiver links outlive the booking window
+
+    # Video view/like counters are buffered and written in batches
+    VIDEO_COUNTER_FLUSH_INTERVAL = int(os.getenv('VIDEO_COUNTER_FLUSH_INTERVAL', 10))  # Seconds
+    VIDEO_COUNTER_CLAIM_STALE_SECONDS = 300  # Then a crashed flusher's Redis claim is taken over
+    VIDEO_COUNTER_CLAIM_RETENTION_SECONDS = 86400  # Applied claim ids kept to skip replayed claims
 
     # Pagination
     ITEMS_PER_PAGE = 12
@@ -154,6 +258,12 @@ class Config:
 
     # Social Media Posting Schedule
     SOCIAL_MEDIA_TIMEZONE = 'Europe/Sofia'  # Eastern European Time for Bansko, Bulgaria
+    SOCIAL_SCHEDULER_IN_PROCESS = os.getenv('SOCIAL_SCHEDULER_IN_PROCESS', 'True').lower() == 'true'
+    SOCIAL_SCHEDULER_MAX_WORKERS = 2  # Batches running at once
+    SOCIAL_SCHEDULER_BATCH_SECONDS = 60  # Posts due within one window fire as one batch
+    SOCIAL_SCHEDULER_BATCH_SIZE = 50  # Posts claimed per batch
+    SOCIAL_SCHEDULER_SWEEP_SECONDS = 300  # Catch-all run for posts whose job was lost
+    SOCIAL_SCHEDULER_MISFIRE_GRACE_SECONDS = 3600  # Still run jobs missed by this much (e.g. during a deploy)
 
 
 class DevelopmentConfig(Config):
@@ -204,6 +314,15 @@ class ProductionConfig(Config):
         'max_overflow': 20,
     }
 
+    # Schema is migrated at deploy (`flask db upgrade`); boot only checks the Alembic head
+    DB_CREATE_ALL = False
+
+    # Templates compiled once (`flask templates-compile` at deploy), static files cached by browsers
+    TEMPLATES_AUTO_RELOAD = False
+    JINJA_BYTECODE_CACHE = True
+    SEND_FILE_MAX_AGE_DEFAULT = int(os.getenv('STATIC_MAX_AGE', 7 * 24 * 3600))  # Unversioned files; build/ is immutable
+    ASSETS_USE_MANIFEST = True
+
     # Production logging
     LOG_TO_STDOUT = True
     LOG_LEVEL = 'INFO'
@@ -226,6 +345,12 @@ class TestingConfig(Config):
     # Disable rate limiting in tests
     RATELIMIT_ENABLED = False
 
+    # Emails are suppressed in tests but still need a sender
+    MAIL_DEFAULT_SENDER = 'test@momentumclips.com'
+
+    # Keep the AI response cache out of the instance folder
+    AI_CACHE_SQLITE_PATH = ':memory:'
+
 
 # Configuration dictionary
 config_dict = {
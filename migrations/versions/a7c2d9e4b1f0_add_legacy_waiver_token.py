@@ -0,0 +1,48 @@
+"""add_legacy_waiver_token
+
+Revision ID: a7c2d9e4b1f0
+Revises: f3e1734ababa
+Create Date: 2026-10-17 09:12:40.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import hashlib
+from flask import current_app
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c2d9e4b1f0'
+down_revision = 'f3e1734ababa'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Waiver links are now signed tokens carrying the booking id.
+    # Links already sent out used sha256(id-secret)[:32], so store that digest
+    # for every existing booking and let decode resolve it with one indexed lookup.
+    op.add_column('bookings', sa.Column('legacy_waiver_token', sa.String(length=32), nullable=True))
+    op.create_index('ix_bookings_legacy_waiver_token', 'bookings', ['legacy_waiver_token'], unique=True)
+
+    secret = current_app.config.get('SECRET_KEY', 'default-secret')
+    bookings = sa.table(
+        'bookings',
+        sa.column('id', sa.Integer),
+        sa.column('legacy_waiver_token', sa.String),
+    )
+
+    conn = op.get_bind()
+    booking_ids = [row[0] for row in conn.execute(sa.select(bookings.c.id))]
+    for booking_id in booking_ids:
+        token = hashlib.sha256(f"{booking_id}-{secret}".encode()).hexdigest()[:32]
+        conn.execute(
+            bookings.update()
+            .where(bookings.c.id == booking_id)
+            .values(legacy_waiver_token=token)
+        )
+
+
+def downgrade():
+    op.drop_index('ix_bookings_legacy_waiver_token', table_name='bookings')
+    op.drop_column('bookings', 'legacy_waiver_token')
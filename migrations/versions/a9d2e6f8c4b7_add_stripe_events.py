@@ -0,0 +1,40 @@
+"""add_stripe_events
+
+Revision ID: a9d2e6f8c4b7
+Revises: f4c8e1a7b3d5
+Create Date: 2026-10-17 17:12:36.240917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d2e6f8c4b7'
+down_revision = 'f4c8e1a7b3d5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'stripe_events',
+        sa.Column('id', sa.String(length=255), nullable=False),
+        sa.Column('type', sa.String(length=100), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('stripe_created', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+        sa.Column('received_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_stripe_events_status_next_attempt', 'stripe_events', ['status', 'next_attempt_at'])
+
+
+def downgrade():
+    op.drop_index('ix_stripe_events_status_next_attempt', table_name='stripe_events')
+    op.drop_table('stripe_events')
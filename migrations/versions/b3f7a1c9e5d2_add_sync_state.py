@@ -0,0 +1,30 @@
+"""add_sync_state
+
+Revision ID: b3f7a1c9e5d2
+Revises: a9d2e6f8c4b7
+Create Date: 2026-10-17 18:04:11.582306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f7a1c9e5d2'
+down_revision = 'a9d2e6f8c4b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'sync_state',
+        sa.Column('key', sa.String(length=100), nullable=False),
+        sa.Column('value', sa.String(length=255), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade():
+    op.drop_table('sync_state')
@@ -0,0 +1,29 @@
+"""add_booking_availability_index
+
+Revision ID: b5e8f1c3d7a2
+Revises: a7c2d9e4b1f0
+Create Date: 2026-10-17 11:03:15.527718
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e8f1c3d7a2'
+down_revision = 'a7c2d9e4b1f0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Availability is read as: one package, active statuses, a date range
+    op.create_index(
+        'ix_bookings_package_status_date',
+        'bookings',
+        ['package_id', 'status', 'booking_date']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_bookings_package_status_date', table_name='bookings')
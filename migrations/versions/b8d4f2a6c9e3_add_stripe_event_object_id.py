@@ -0,0 +1,45 @@
+"""add_stripe_event_object_id
+
+Revision ID: b8d4f2a6c9e3
+Revises: e5b1c8f4a7d3
+Create Date: 2026-10-17 23:58:02.417365
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8d4f2a6c9e3'
+down_revision = 'e5b1c8f4a7d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('stripe_events', sa.Column('object_id', sa.String(length=255), nullable=True))
+    op.create_index('ix_stripe_events_object_created', 'stripe_events', ['object_id', 'stripe_created'])
+
+    # Backfill events that have not been applied yet; processed ones never block
+    connection = op.get_bind()
+    events = sa.table('stripe_events', sa.column('id'), sa.column('payload'),
+                      sa.column('status'), sa.column('object_id'))
+    rows = connection.execute(
+        sa.select(events.c.id, events.c.payload).where(events.c.status.in_(['pending', 'processing']))
+    ).fetchall()
+    for event_id, payload in rows:
+        try:
+            obj = (json.loads(payload).get('data') or {}).get('object') or {}
+        except (ValueError, AttributeError):
+            continue
+        if isinstance(obj, dict) and obj.get('id'):
+            connection.execute(
+                events.update().where(events.c.id == event_id).values(object_id=obj['id'])
+            )
+
+
+def downgrade():
+    op.drop_index('ix_stripe_events_object_created', table_name='stripe_events')
+    op.drop_column('stripe_events', 'object_id')
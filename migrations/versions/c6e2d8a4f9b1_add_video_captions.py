@@ -0,0 +1,43 @@
+"""add_video_captions
+
+Revision ID: c6e2d8a4f9b1
+Revises: b3f7a1c9e5d2
+Create Date: 2026-10-17 18:41:52.117430
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6e2d8a4f9b1'
+down_revision = 'b3f7a1c9e5d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'video_captions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('video_id', sa.Integer(), nullable=False),
+        sa.Column('platform', sa.String(length=20), nullable=False),
+        sa.Column('caption', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('batch_id', sa.String(length=100), nullable=True),
+        sa.Column('model', sa.String(length=100), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['video_id'], ['videos.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('video_id', 'platform', name='uq_video_captions_video_platform')
+    )
+    op.create_index('ix_video_captions_status', 'video_captions', ['status'])
+    op.create_index('ix_video_captions_batch_id', 'video_captions', ['batch_id'])
+
+
+def downgrade():
+    op.drop_index('ix_video_captions_batch_id', table_name='video_captions')
+    op.drop_index('ix_video_captions_status', table_name='video_captions')
+    op.drop_table('video_captions')
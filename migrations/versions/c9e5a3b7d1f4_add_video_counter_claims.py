@@ -0,0 +1,31 @@
+"""add_video_counter_claims
+
+Revision ID: c9e5a3b7d1f4
+Revises: b8d4f2a6c9e3
+Create Date: 2026-10-18 00:21:47.903518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9e5a3b7d1f4'
+down_revision = 'b8d4f2a6c9e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'video_counter_claims',
+        sa.Column('id', sa.String(length=120), nullable=False),
+        sa.Column('applied_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_video_counter_claims_applied_at', 'video_counter_claims', ['applied_at'])
+
+
+def downgrade():
+    op.drop_index('ix_video_counter_claims_applied_at', table_name='video_counter_claims')
+    op.drop_table('video_counter_claims')
@@ -0,0 +1,63 @@
+"""add_social_posts
+
+Revision ID: d2f9a6c3e8b4
+Revises: c6e2d8a4f9b1
+Create Date: 2026-10-17 21:06:14.502981
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f9a6c3e8b4'
+down_revision = 'c6e2d8a4f9b1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'social_posts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('ayrshare_id', sa.String(length=100), nullable=False),
+        sa.Column('content', sa.Text(), nullable=True),
+        sa.Column('platforms', sa.String(length=200), nullable=True),
+        sa.Column('post_urls', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('published_at', sa.DateTime(), nullable=True),
+        sa.Column('likes', sa.Integer(), nullable=False),
+        sa.Column('comments', sa.Integer(), nullable=False),
+        sa.Column('shares', sa.Integer(), nullable=False),
+        sa.Column('impressions', sa.Integer(), nullable=False),
+        sa.Column('metrics_updated_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('ayrshare_id')
+    )
+    op.create_index('ix_social_posts_published_at', 'social_posts', ['published_at'])
+
+    op.create_table(
+        'social_post_metrics',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('post_id', sa.Integer(), nullable=False),
+        sa.Column('platform', sa.String(length=20), nullable=False),
+        sa.Column('captured_at', sa.DateTime(), nullable=False),
+        sa.Column('likes', sa.Integer(), nullable=False),
+        sa.Column('comments', sa.Integer(), nullable=False),
+        sa.Column('shares', sa.Integer(), nullable=False),
+        sa.Column('impressions', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['post_id'], ['social_posts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_social_post_metrics_captured_at', 'social_post_metrics', ['captured_at'])
+    op.create_index('ix_social_post_metrics_post_captured', 'social_post_metrics', ['post_id', 'captured_at'])
+
+
+def downgrade():
+    op.drop_index('ix_social_post_metrics_post_captured', table_name='social_post_metrics')
+    op.drop_index('ix_social_post_metrics_captured_at', table_name='social_post_metrics')
+    op.drop_table('social_post_metrics')
+    op.drop_index('ix_social_posts_published_at', table_name='social_posts')
+    op.drop_table('social_posts')
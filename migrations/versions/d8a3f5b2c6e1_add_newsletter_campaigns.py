@@ -0,0 +1,41 @@
+"""add_newsletter_campaigns
+
+Revision ID: d8a3f5b2c6e1
+Revises: c1d4a6e9f203
+Create Date: 2026-10-17 15:02:18.316540
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8a3f5b2c6e1'
+down_revision = 'c1d4a6e9f203'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'newsletter_campaigns',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('subject', sa.String(length=300), nullable=False),
+        sa.Column('template', sa.String(length=100), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('last_subscriber_id', sa.Integer(), nullable=False),
+        sa.Column('sent_count', sa.Integer(), nullable=False),
+        sa.Column('failed_count', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_newsletter_campaigns_status'), 'newsletter_campaigns', ['status'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_newsletter_campaigns_status'), table_name='newsletter_campaigns')
+    op.drop_table('newsletter_campaigns')
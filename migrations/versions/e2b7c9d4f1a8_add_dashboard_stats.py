@@ -0,0 +1,58 @@
+"""add_dashboard_stats
+
+Revision ID: e2b7c9d4f1a8
+Revises: d8a3f5b2c6e1
+Create Date: 2026-10-17 15:48:03.772914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from datetime import datetime
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b7c9d4f1a8'
+down_revision = 'd8a3f5b2c6e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'dashboard_stats',
+        sa.Column('key', sa.String(length=80), nullable=False),
+        sa.Column('value', sa.BigInteger(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+
+    # Seed the rollup from existing rows; mapper events keep it current from here on.
+    # Counts are read with plain GROUP BYs and written through bulk_insert so the
+    # `key` column is quoted per dialect (it is reserved on MySQL).
+    connection = op.get_bind()
+    now = datetime.utcnow()
+    rows = []
+    for table in ('users', 'videos', 'testimonials', 'public_bookings'):
+        count = connection.execute(sa.select(sa.func.count()).select_from(sa.table(table))).scalar()
+        rows.append({'key': f'total:{table}', 'value': count or 0, 'updated_at': now})
+
+    bookings = sa.table('public_bookings', sa.column('status'), sa.column('amount_cents'))
+    grouped = connection.execute(
+        sa.select(bookings.c.status, sa.func.count(), sa.func.coalesce(sa.func.sum(bookings.c.amount_cents), 0))
+        .group_by(bookings.c.status)
+    )
+    for status, count, revenue in grouped:
+        rows.append({'key': f'bookings:{status}', 'value': count, 'updated_at': now})
+        rows.append({'key': f'revenue_cents:{status}', 'value': int(revenue), 'updated_at': now})
+
+    dashboard_stats = sa.table(
+        'dashboard_stats',
+        sa.column('key', sa.String),
+        sa.column('value', sa.BigInteger),
+        sa.column('updated_at', sa.DateTime)
+    )
+    op.bulk_insert(dashboard_stats, rows)
+
+
+def downgrade():
+    op.drop_table('dashboard_stats')
@@ -0,0 +1,57 @@
+"""add_scheduled_posts
+
+Revision ID: e5b1c8f4a7d3
+Revises: d2f9a6c3e8b4
+Create Date: 2026-10-17 23:12:40.318274
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b1c8f4a7d3'
+down_revision = 'd2f9a6c3e8b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'scheduled_posts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('platforms', sa.String(length=200), nullable=False),
+        sa.Column('media_urls', sa.Text(), nullable=True),
+        sa.Column('video_id', sa.Integer(), nullable=True),
+        sa.Column('scheduled_for', sa.DateTime(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('claim_token', sa.String(length=36), nullable=True),
+        sa.Column('ayrshare_id', sa.String(length=100), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('posted_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['video_id'], ['videos.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_scheduled_posts_claim_token', 'scheduled_posts', ['claim_token'])
+    op.create_index('ix_scheduled_posts_status_scheduled_for', 'scheduled_posts', ['status', 'scheduled_for'])
+
+    # APScheduler's SQLAlchemy job store (it would also create this itself on start)
+    op.create_table(
+        'apscheduler_jobs',
+        sa.Column('id', sa.Unicode(length=191), nullable=False),
+        sa.Column('next_run_time', sa.Float(precision=25), nullable=True),
+        sa.Column('job_state', sa.LargeBinary(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_apscheduler_jobs_next_run_time', 'apscheduler_jobs', ['next_run_time'])
+
+
+def downgrade():
+    op.drop_index('ix_apscheduler_jobs_next_run_time', table_name='apscheduler_jobs')
+    op.drop_table('apscheduler_jobs')
+    op.drop_index('ix_scheduled_posts_status_scheduled_for', table_name='scheduled_posts')
+    op.drop_index('ix_scheduled_posts_claim_token', table_name='scheduled_posts')
+    op.drop_table('scheduled_posts')
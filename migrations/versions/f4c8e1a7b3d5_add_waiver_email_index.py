@@ -0,0 +1,31 @@
+"""add_waiver_email_index
+
+Revision ID: f4c8e1a7b3d5
+Revises: e2b7c9d4f1a8
+Create Date: 2026-10-17 16:21:44.508113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4c8e1a7b3d5'
+down_revision = 'e2b7c9d4f1a8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_waivers_email_lower_signed_at',
+        'waivers',
+        # Expression objects (not sa.text) so MySQL gets its required ((...)) wrapping;
+        # must match Waiver's email_key(): lower(trim(client_email))
+        [sa.func.lower(sa.func.trim(sa.column('client_email'))), 'signed_at'],
+        unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_waivers_email_lower_signed_at', table_name='waivers')
@@ -0,0 +1,17 @@
+/**
+ * Tailwind build for app/static/css/site.css (`npm run build:css`).
+ *
+ * Replaces the cdn.tailwindcss.com runtime: only classes that appear in the
+ * templates or the static scripts are generated. Default theme, as the CDN
+ * script used; colours like bg-[#00D4FF] are arbitrary values.
+ */
+module.exports = {
+  content: [
+    './app/templates/**/*.{html,xml}',
+    './app/static/js/**/*.js',
+  ],
+  theme: {
+    extend: {},
+  },
+  plugins: [],
+};
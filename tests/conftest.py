@@ -1,5 +1,15 @@
 """Pytest configuration and fixtures"""
+import hashlib
+import hmac
+import json
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qsl
+
 import pytest
+import stripe
 from app import create_app, db
 from app.models.user import User
 from app.models.package import Package
@@ -18,6 +28,239 @@ def app():
         db.session.remove()
         db.drop_all()
 
+    from app.services.counter_service import video_counters
+    from app.services.availability_service import AvailabilityService
+    from app.services.stripe_gateway import reset_stripe_gateways
+    from app.services.ai_service import reset_anthropic_clients
+    from app.services.ai_cache import reset_ai_cache
+    from app.services.social_service import reset_ayrshare_session
+    from app.services.post_scheduler import reset_post_scheduler
+    from app.services.chat_service import reset_message_budgets
+    video_counters.reset()
+    AvailabilityService.clear_local_cache()
+    reset_stripe_gateways()
+    reset_anthropic_clients()
+    reset_ai_cache()
+    reset_ayrshare_session()
+    reset_post_scheduler()
+    reset_message_budgets()
+
+
+class FakeStripeHTTPClient(stripe.HTTPClient):
+    """In-process stand-in for api.stripe.com
+
+    `routes` maps (METHOD, path) to a (status, body) tuple or a callable
+    taking (params, headers) and returning one. Requests are recorded.
+    """
+
+    name = 'fake'
+
+    def __init__(self):
+        super().__init__()
+        self.routes = {}
+        self.requests = []
+
+    def request(self, method, url, headers, post_data=None):
+        parsed = urlparse(url)
+        params = dict(parse_qsl(post_data or parsed.query))
+        self.requests.append({'method': method.upper(), 'path': parsed.path, 'params': params, 'headers': headers})
+
+        route = self.routes.get((method.upper(), parsed.path))
+        if route is None:
+            return json.dumps({'error': {'message': f'No route for {method} {parsed.path}'}}), 404, {}
+        status, body = route(params, headers) if callable(route) else route
+        return json.dumps(body), status, {}
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_stripe(app):
+    """Route all Stripe calls to an in-process fake"""
+    from app.services.stripe_gateway import StripeGateway, _gateways
+
+    app.config['STRIPE_SECRET_KEY'] = 'sk_test_fake'
+    http_client = FakeStripeHTTPClient()
+    _gateways['sk_test_fake'] = StripeGateway('sk_test_fake', max_retries=0, http_client=http_client)
+    return http_client
+
+
+class StubAPIServer(ThreadingHTTPServer):
+    """Local HTTP server standing in for a third-party API over real sockets
+
+    `routes` works like FakeStripeHTTPClient's; a str body is sent as-is
+    (e.g. JSONL), anything else as JSON. Requests are recorded.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _StubAPIHandler)
+        self.routes = {}
+        self.requests = []
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+
+class _StubAPIHandler(BaseHTTPRequestHandler):
+
+    def _handle(self):
+        parsed = urlparse(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length).decode() if length else ''
+        if body and 'json' in (self.headers.get('Content-Type') or ''):
+            params = json.loads(body)
+        else:
+            params = dict(parse_qsl(body or parsed.query))
+        self.server.requests.append({'method': self.command, 'path': parsed.path, 'params': params})
+
+        route = self.server.routes.get((self.command, parsed.path))
+        if route is None:
+            status, data = 404, {'error': {'type': 'not_found_error', 'message': f'No route for {self.command} {parsed.path}'}}
+        else:
+            status, data = route(params, dict(self.headers)) if callable(route) else route
+
+        payload = (data if isinstance(data, str) else json.dumps(data)).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_DELETE = _handle
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubRedisServer(socketserver.ThreadingTCPServer):
+    """Local TCP server speaking just enough RESP for pubsub tests
+
+    SUBSCRIBE is confirmed, PING answered, and anything else gets +OK.
+    publish() pushes a message to every subscribed connection.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _StubRedisHandler)
+        self.subscribers = []
+
+    @property
+    def url(self):
+        return f'redis://127.0.0.1:{self.server_address[1]}/0'
+
+    def publish(self, channel, data):
+        for wfile in list(self.subscribers):
+            wfile.write(_resp([b'message', channel.encode(), data]))
+            wfile.flush()
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+
+def _resp(items):
+    out = b'*%d\r\n' % len(items)
+    for item in items:
+        out += b':%d\r\n' % item if isinstance(item, int) else b'$%d\r\n%s\r\n' % (len(item), item)
+    return out
+
+
+class _StubRedisHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        subscribed = False
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                break
+            args = []
+            for _ in range(int(line[1:])):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2])
+            command = args[0].upper()
+            if command == b'SUBSCRIBE':
+                subscribed = True
+                self.server.subscribers.append(self.wfile)
+                for number, channel in enumerate(args[1:], 1):
+                    self.wfile.write(_resp([b'subscribe', channel, number]))
+            elif command == b'PING':
+                reply = args[1] if len(args) > 1 else b''
+                self.wfile.write(_resp([b'pong', reply]) if subscribed else b'+PONG\r\n')
+            else:
+                self.wfile.write(b'+OK\r\n')
+            self.wfile.flush()
+        if subscribed:
+            self.server.subscribers.remove(self.wfile)
+
+
+@pytest.fixture
+def redis_stub_server():
+    """Local stand-in for a Redis server (pubsub only)"""
+    with StubRedisServer() as server:
+        yield server
+
+
+@pytest.fixture
+def stripe_mock_server(app):
+    """Point the app's Stripe gateway at a local mock server"""
+    with StubAPIServer() as server:
+        app.config['STRIPE_SECRET_KEY'] = 'sk_test_mock'
+        app.config['STRIPE_API_BASE'] = server.url
+        app.config['STRIPE_MAX_NETWORK_RETRIES'] = 0
+        yield server
+
+
+@pytest.fixture
+def anthropic_stub_server(app):
+    """Point the app's Anthropic client at a local stub server"""
+    with StubAPIServer() as server:
+        app.config['ANTHROPIC_API_KEY'] = 'sk-ant-stub'
+        app.config['ANTHROPIC_BASE_URL'] = server.url
+        app.config['ANTHROPIC_MAX_RETRIES'] = 0
+        yield server
+
+
+@pytest.fixture
+def ayrshare_stub_server(app):
+    """Point SocialMediaService at a local fake Ayrshare server"""
+    with StubAPIServer() as server:
+        app.config['AYRSHARE_API_KEY'] = 'ayr-stub'
+        app.config['AYRSHARE_BASE_URL'] = f'{server.url}/api'
+        yield server
+
+
+@pytest.fixture
+def post_stripe_event(app, client):
+    """Post a correctly signed Stripe event to a webhook endpoint"""
+    secret = 'whsec_test'
+    app.config['STRIPE_WEBHOOK_SECRET'] = secret
+
+    def post(event, path='/payment/webhook'):
+        payload = json.dumps(event)
+        timestamp = int(time.time())
+        signature = hmac.new(secret.encode(), f'{timestamp}.{payload}'.encode(), hashlib.sha256).hexdigest()
+        return client.post(path, data=payload, content_type='application/json',
+                           headers={'Stripe-Signature': f't={timestamp},v1={signature}'})
+    return post
+
 
 @pytest.fixture
 def client(app):
@@ -106,3 +349,21 @@ def sample_testimonial(app):
     db.session.commit()
     return testimonial
 
+
+
+@pytest.fixture
+def sample_booking(app, sample_user, sample_package):
+    """Create a sample booking"""
+    from datetime import datetime, timedelta
+    from app.models.booking import Booking
+    booking = Booking(
+        user_id=sample_user.id,
+        package_id=sample_package.id,
+        booking_date=datetime.utcnow() + timedelta(days=7),
+        location='Test Resort',
+        amount=sample_package.price,
+        currency='USD'
+    )
+    db.session.add(booking)
+    db.session.commit()
+    return booking
@@ -1,9 +1,11 @@
 """Tests for database models"""
+import json
 import pytest
 from app.models.user import User
 from app.models.package import Package
 from app.models.video import Video
 from app.models.testimonial import Testimonial
+from app.models.booking import Booking
 
 
 class TestUserModel:
@@ -42,6 +44,23 @@ class TestPackageModel:
         assert len(packages) > 0
         assert sample_package in packages
 
+    def test_with_stats(self, app, sample_package, sample_booking):
+        """Test package aggregates come from the locked booking amounts"""
+        from decimal import Decimal
+        from app import db
+
+        sample_booking.amount = Decimal('250.00')
+        sample_booking.status = 'completed'
+        sample_package.price = Decimal('999.00')
+        db.session.commit()
+
+        packages = Package.with_stats()
+        assert packages == [sample_package]
+        assert packages[0].booking_count == 1
+        assert packages[0].completed_count == 1
+        assert packages[0].total_revenue == 250.0
+        assert Package.get_featured_packages() == [sample_package]
+
 
 class TestVideoModel:
     """Tests for Video model"""
@@ -67,6 +86,726 @@ class TestVideoModel:
         sample_video.increment_views()
         assert sample_video.view_count == initial_views + 1
 
+    def test_counter_flush_batches_updates(self, app, sample_video):
+        """Test buffered view/like deltas are written by a flush"""
+        from app import db
+        from app.services.counter_service import video_counters
+        sample_video.increment_views()
+        sample_video.increment_views()
+        sample_video.increment_likes()
+        assert sample_video.stored_view_count == 0
+        assert video_counters.flush() == 1
+        db.session.refresh(sample_video)
+        assert sample_video.stored_view_count == 2
+        assert sample_video.stored_like_count == 1
+        assert sample_video.view_count == 2
+
+    def test_replayed_counter_claim_is_not_applied_twice(self, app, sample_video, monkeypatch):
+        """Test a Redis claim seen again after its flush committed is released, not re-applied"""
+        from app import db
+        from app.services.counter_service import VideoCounterBuffer, video_counters
+
+        released = []
+        claim = {'video_counters:flushing:1:abc': {sample_video.id: {'views': 3, 'likes': 1}}}
+        monkeypatch.setattr(VideoCounterBuffer, '_redis', staticmethod(lambda: object()))
+        monkeypatch.setattr(video_counters, '_claim_redis', lambda redis_client: list(claim))
+        monkeypatch.setattr(VideoCounterBuffer, '_read_claims', staticmethod(lambda redis_client, claimed: claim))
+        # First flusher commits, then dies before deleting the claim
+        monkeypatch.setattr(VideoCounterBuffer, '_release_claims',
+                            staticmethod(lambda redis_client, claimed: released.append(list(claimed))))
+
+        video_counters.flush()
+        video_counters.flush()
+        db.session.refresh(sample_video)
+        assert (sample_video.stored_view_count, sample_video.stored_like_count) == (3, 1)
+        assert released == [list(claim), list(claim)]
+
+    def test_pending_counts_prefetched_per_page(self, app, sample_video, monkeypatch):
+        """Test a list of videos reads its buffered deltas once, not per attribute"""
+        from app import db
+        from app.services.counter_service import video_counters
+
+        other = Video(title='Second run', youtube_id='abcdefghijk', is_published=True)
+        db.session.add(other)
+        db.session.commit()
+        sample_video.increment_views()
+        other.increment_likes()
+
+        Video.load_pending_counts([sample_video, other])
+        monkeypatch.setattr(video_counters, 'pending', lambda video_id: pytest.fail('per-video counter read'))
+        other.increment_views()
+        assert (sample_video.view_count, sample_video.like_count) == (1, 0)
+        assert (other.view_count, other.like_count) == (1, 1)
+
+
+class TestBookingModel:
+    """Tests for Booking model"""
+
+    def test_waiver_token_roundtrip(self, app, sample_booking):
+        """Test signed waiver token resolves to its booking"""
+        token = sample_booking.generate_waiver_token()
+        assert Booking.verify_waiver_token(token) == sample_booking.id
+
+    def test_waiver_token_tampered(self, app, sample_booking):
+        """Test tampered or expired waiver tokens are rejected"""
+        token = sample_booking.generate_waiver_token()
+        assert Booking.verify_waiver_token(token[:-2] + 'xx') is None
+        assert Booking.verify_waiver_token(token, expires_in=-1) is None
+
+    def test_legacy_waiver_token(self, app, sample_booking):
+        """Test legacy 32-character tokens resolve through the indexed column"""
+        import hashlib
+        from app import db
+        legacy = hashlib.sha256(f"{sample_booking.id}-secret".encode()).hexdigest()[:32]
+        sample_booking.legacy_waiver_token = legacy
+        db.session.commit()
+        assert Booking.verify_waiver_token(legacy) == sample_booking.id
+        assert Booking.verify_waiver_token('0' * 32) is None
+
+    def test_month_availability(self, app, sample_booking, sample_package):
+        """Test month bitmap marks the booking's slots and is invalidated on cancel"""
+        from datetime import datetime
+        from app import db
+        from app.services.availability_service import AvailabilityService
+        sample_booking.booking_date = datetime(2030, 1, 15, 10, 0)
+        sample_package.duration = 2
+        db.session.commit()
+
+        service = AvailabilityService()
+        now = datetime(2030, 1, 1)
+        slots = service.free_slots(sample_package.id, 2030, 1, duration_hours=2, now=now)
+        # 10:00-12:00 is taken, so 2-hour starts at 09:00, 10:00 and 11:00 are not offered
+        assert slots['2030-01-15'] == ['12:00', '13:00', '14:00', '15:00']
+        assert slots['2030-01-16'][0] == '09:00'
+
+        sample_booking.cancel()
+        slots = service.free_slots(sample_package.id, 2030, 1, duration_hours=2, now=now)
+        assert slots['2030-01-15'][0] == '09:00'
+
+    def test_availability_invalidated_after_commit(self, app, sample_booking, sample_package):
+        """Test the cached month is only dropped once a booking change commits"""
+        from datetime import datetime
+        from app import db
+        from app.services.availability_service import AvailabilityService
+        sample_booking.booking_date = datetime(2030, 1, 15, 10, 0)
+        db.session.commit()
+
+        service = AvailabilityService()
+        now = datetime(2030, 1, 1)
+
+        def offered():
+            return '10:00' in service.free_slots(sample_package.id, 2030, 1, duration_hours=1, now=now)['2030-01-15']
+
+        assert not offered()
+        sample_booking.status = 'cancelled'
+        db.session.flush()
+        assert not offered()  # Flushed but uncommitted: the cached month stands
+        db.session.rollback()
+        assert not offered()
+
+        sample_booking.status = 'cancelled'
+        db.session.commit()
+        assert offered()
+
+
+class TestEmailOutbox:
+    """Tests for the email outbox and its worker"""
+
+    def test_queue_and_drain(self, app):
+        """Test queued emails are delivered and marked sent"""
+        from app import db
+        from app.models.email_outbox import EmailOutbox
+        from app.services.email_service import EmailService, mail
+        from app.services.email_worker import EmailOutboxWorker
+
+        EmailService().queue_email(to='rider@example.com', subject='Hello', body='Hi there')
+        db.session.commit()
+        assert EmailOutbox.pending_count() == 1
+
+        with mail.record_messages() as outbox:
+            assert EmailOutboxWorker().drain_once() == 1
+
+        assert len(outbox) == 1
+        assert outbox[0].recipients == ['rider@example.com']
+        assert EmailOutbox.query.one().status == EmailOutbox.STATUS_SENT
+        assert EmailOutbox.pending_count() == 0
+
+    def test_failures_retry_then_dead_letter(self, app, monkeypatch):
+        """Test failed sends back off and are dead-lettered after max attempts"""
+        from datetime import datetime
+        from app import db
+        from app.models.email_outbox import EmailOutbox
+        from app.services.email_service import EmailService
+        from app.services.email_worker import EmailOutboxWorker
+        from flask_mail import Connection
+
+        def fail(self, message, envelope_from=None):
+            raise RuntimeError('SMTP rejected')
+        monkeypatch.setattr(Connection, 'send', fail)
+        app.config['EMAIL_OUTBOX_MAX_ATTEMPTS'] = 2
+
+        message = EmailService().queue_email(to='rider@example.com', subject='Hello', body='Hi')
+        db.session.commit()
+
+        worker = EmailOutboxWorker()
+        assert worker.drain_once() == 0
+        assert message.status == EmailOutbox.STATUS_PENDING
+        assert message.attempts == 1
+        assert message.next_attempt_at > datetime.utcnow()
+
+        message.next_attempt_at = datetime.utcnow()
+        db.session.commit()
+        worker.drain_once()
+        assert message.status == EmailOutbox.STATUS_DEAD
+        assert 'SMTP rejected' in message.last_error
+
+
+class TestNewsletterCampaign:
+    """Tests for the newsletter campaign sender"""
+
+    def test_campaign_sends_and_resumes(self, app):
+        """Test a campaign checkpoints per page and resumes where it stopped"""
+        from app import db
+        from app.models.newsletter import Newsletter
+        from app.models.newsletter_campaign import NewsletterCampaign
+        from app.services.email_service import mail
+        from app.services.newsletter_service import NewsletterCampaignSender
+
+        for i in range(5):
+            db.session.add(Newsletter(email=f'rider{i}@example.com'))
+        db.session.add(Newsletter(email='gone@example.com', is_active=False))
+        db.session.commit()
+        app.config['NEWSLETTER_PAGE_SIZE'] = 2
+        app.config['NEWSLETTER_RATE_PER_SECOND'] = 0
+
+        sender = NewsletterCampaignSender()
+        campaign = sender.create_campaign('Spring update', 'newsletter_welcome')
+
+        with mail.record_messages() as outbox:
+            sender.run(campaign, should_stop=lambda: True)
+        assert campaign.status == NewsletterCampaign.STATUS_INTERRUPTED
+        assert campaign.sent_count == 2
+        assert sorted(m.recipients[0] for m in outbox) == ['rider0@example.com', 'rider1@example.com']
+
+        with mail.record_messages() as outbox:
+            NewsletterCampaignSender().run(campaign)
+        assert campaign.status == NewsletterCampaign.STATUS_COMPLETED
+        assert campaign.sent_count == 5
+        assert sorted(m.recipients[0] for m in outbox) == [f'rider{i}@example.com' for i in range(2, 5)]
+
+
+
+class TestDashboardStats:
+    """Tests for the incrementally maintained dashboard rollup"""
+
+    def test_rollup_tracks_bookings(self, app, sample_user):
+        """Test inserts and status changes keep the rollup in sync"""
+        from app import db
+        from app.models.dashboard_stat import DashboardStat
+        from app.models.public_booking import PublicBooking
+
+        paid = PublicBooking(package_key='basic', package_name='Basic', amount_cents=5000, status='paid')
+        other = PublicBooking(package_key='pro', package_name='Pro', amount_cents=9000, status='paid')
+        db.session.add_all([paid, other])
+        db.session.commit()
+
+        other.status = 'cancelled'
+        db.session.commit()
+
+        stats = DashboardStat.snapshot()
+        assert stats['total_users'] == 1
+        assert stats['total_bookings'] == 2
+        assert stats['booking_stats'] == {'paid': 1, 'cancelled': 1}
+        assert stats['revenue_cents'] == 5000
+        assert DashboardStat.rebuild(dry_run=True) == {}
+
+    def test_rebuild_reports_drift(self, app):
+        """Test bulk updates that bypass events are detected and repaired"""
+        from app import db
+        from app.models.dashboard_stat import DashboardStat
+        from app.models.public_booking import PublicBooking
+
+        db.session.add(PublicBooking(package_key='basic', package_name='Basic', amount_cents=5000))
+        db.session.commit()
+        PublicBooking.query.update({'status': 'completed'})
+        db.session.commit()
+
+        drift = DashboardStat.rebuild()
+        assert drift['bookings:paid'] == (1, 0)
+        assert drift['bookings:completed'] == (0, 1)
+        assert DashboardStat.snapshot()['booking_stats'] == {'completed': 1}
+        assert DashboardStat.rebuild(dry_run=True) == {}
+
+    def test_apply_upserts_in_one_statement(self, app):
+        """Test a new key is created and incremented by a dialect upsert, never UPDATE-then-INSERT"""
+        from datetime import datetime
+        from sqlalchemy.dialects import mysql
+        from app import db
+        from app.models.dashboard_stat import DashboardStat, _upsert
+
+        with db.engine.begin() as connection:
+            DashboardStat.apply(connection, {'bookings:new': 1})
+            DashboardStat.apply(connection, {'bookings:new': 2})
+        assert db.session.get(DashboardStat, 'bookings:new').value == 3
+
+        sql = str(_upsert('mysql', 'bookings:new', 1, datetime.utcnow()).compile(dialect=mysql.dialect()))
+        assert '`key`' in sql and 'ON DUPLICATE KEY UPDATE value = (dashboard_stats.value + %s)' in sql
+
+    def test_apply_falls_back_without_dialect_upsert(self, app, monkeypatch):
+        """Test other dialects get UPDATE, then INSERT in a savepoint, instead of failing the flush"""
+        from app import db
+        from app.models import dashboard_stat
+        from app.models.dashboard_stat import DashboardStat
+
+        monkeypatch.setattr(dashboard_stat, '_upsert', lambda *args: None)
+        with db.engine.begin() as connection:
+            DashboardStat.apply(connection, {'bookings:new': 1})
+            DashboardStat.apply(connection, {'bookings:new': 2, 'bookings:other': -1})
+        assert db.session.get(DashboardStat, 'bookings:new').value == 3
+        assert db.session.get(DashboardStat, 'bookings:other').value == -1
+
+    def test_rebuild_stats_command(self, runner):
+        """Test the CLI commands are registered on the app by create_app"""
+        result = runner.invoke(args=['rebuild-stats', '--dry-run'])
+        assert result.exit_code == 0
+        assert 'Dashboard stats are in sync.' in result.output
+
+
+class TestAIService:
+    """Tests for the shared Anthropic client and AsyncAIService"""
+
+    def test_client_is_shared_per_key(self, app):
+        """Test services reuse one pooled client per API key"""
+        from app.services.ai_service import AIService
+
+        app.config['ANTHROPIC_API_KEY'] = 'sk-ant-test'
+        assert AIService().client is AIService().client
+
+    def test_async_calls_run_concurrently(self, app):
+        """Test AsyncAIService calls are in flight at the same time"""
+        import threading
+        from types import SimpleNamespace
+        from app.services.ai_service import AIService, AsyncAIService, _clients
+
+        barrier = threading.Barrier(2, timeout=5)
+
+        def create(**params):
+            barrier.wait()  # Deadlocks (times out) unless both calls overlap
+            return SimpleNamespace(content=[SimpleNamespace(type='text', text=f"{params['max_tokens']}")])
+
+        app.config['ANTHROPIC_API_KEY'] = 'sk-ant-test'
+        _clients['sk-ant-test'] = SimpleNamespace(messages=SimpleNamespace(create=create), close=lambda: None)
+
+        service = AsyncAIService(AIService())
+        caption = service.generate_caption('Backflip', 'Big air', platform='tiktok')
+        summary = service.generate_booking_summary({'package_name': 'Pro'})
+        assert caption.result(timeout=5) == '300'
+        assert summary.result(timeout=5) == '200'
+
+    def test_identical_prompts_are_cached(self, app):
+        """Test repeat calls are served from the cache unless bypassed"""
+        from types import SimpleNamespace
+        from app.services.ai_service import AIService, _clients
+        from app.utils import metrics
+
+        calls = []
+
+        def create(**params):
+            calls.append(params)
+            return SimpleNamespace(content=[SimpleNamespace(type='text', text=f' Caption {len(calls)} ')])
+
+        app.config['ANTHROPIC_API_KEY'] = 'sk-ant-test'
+        _clients['sk-ant-test'] = SimpleNamespace(messages=SimpleNamespace(create=create), close=lambda: None)
+        hits = metrics.snapshot()['counters'].get('ai_cache.generate_caption.hits', 0)
+
+        service = AIService()
+        assert service.generate_caption('Backflip', 'Big air') == 'Caption 1'
+        assert service.generate_caption('Backflip', 'Big  air') == 'Caption 1'  # whitespace-only difference
+        assert len(calls) == 1
+        assert metrics.snapshot()['counters']['ai_cache.generate_caption.hits'] == hits + 1
+
+        assert service.generate_caption('Backflip', 'Big air', bypass_cache=True) == 'Caption 2'
+        assert service.generate_caption('Backflip', 'Big air') == 'Caption 2'
+        assert service.generate_caption('Backflip', 'Big air', platform='tiktok') == 'Caption 3'
+
+
+class TestCaptionPipeline:
+    """Tests for batch caption generation against a local Anthropic stub"""
+
+    def test_batch_run_resumes_and_requeues_failures(self, app, sample_video, anthropic_stub_server):
+        """Test jobs are submitted once, collected on a later run, and failures retried"""
+        from app import db
+        from app.models.video import Video
+        from app.models.video_caption import VideoCaption
+        from app.services.ai_service import AIService
+        from app.services.caption_batch import CaptionPipeline
+
+        db.session.add(Video(title='Second', youtube_id='abc123'))
+        db.session.commit()
+
+        server = anthropic_stub_server
+        state = {'status': 'in_progress', 'requests': {}}
+
+        def create(params, headers):
+            batch_id = f'msgbatch_{len(state["requests"]) + 1}'
+            state['requests'][batch_id] = params['requests']
+            return 200, {'id': batch_id, 'type': 'message_batch', 'processing_status': 'in_progress'}
+
+        def retrieve(batch_id):
+            def route(params, headers):
+                return 200, {'id': batch_id, 'type': 'message_batch', 'processing_status': state['status'],
+                             'results_url': f'{server.url}/v1/messages/batches/{batch_id}/results'}
+            return route
+
+        def results(batch_id):
+            def route(params, headers):
+                lines = []
+                for i, request in enumerate(state['requests'][batch_id]):
+                    if batch_id == 'msgbatch_1' and i == 0:
+                        result = {'type': 'errored', 'error': {'type': 'error', 'error': {'type': 'overloaded_error', 'message': 'Overloaded'}}}
+                    else:
+                        result = {'type': 'succeeded', 'message': {
+                            'id': 'msg', 'type': 'message', 'role': 'assistant', 'model': 'm',
+                            'content': [{'type': 'text', 'text': f'Caption for {request["custom_id"]}'}],
+                            'stop_reason': 'end_turn', 'usage': {'input_tokens': 1, 'output_tokens': 1}
+                        }}
+                    lines.append(json.dumps({'custom_id': request['custom_id'], 'result': result}))
+                return 200, '\n'.join(lines)
+            return route
+
+        server.routes[('POST', '/v1/messages/batches')] = create
+        for batch_id in ('msgbatch_1', 'msgbatch_2'):
+            server.routes[('GET', f'/v1/messages/batches/{batch_id}')] = retrieve(batch_id)
+            server.routes[('GET', f'/v1/messages/batches/{batch_id}/results')] = results(batch_id)
+
+        pipeline = CaptionPipeline(platforms=('instagram', 'tiktok'))
+        assert pipeline.run()['submitted'] == 4
+        assert len(state['requests']['msgbatch_1']) == 4
+
+        # Rerun while the batch is still processing: nothing is submitted again
+        assert CaptionPipeline(platforms=('instagram', 'tiktok')).run()['submitted'] == 4
+        assert len(state['requests']) == 1
+
+        state['status'] = 'ended'
+        counts = CaptionPipeline(platforms=('instagram', 'tiktok')).run()
+        assert counts['done'] == 3
+        # The failed job was requeued and submitted in a new batch
+        assert counts['submitted'] == 1
+        assert len(state['requests']['msgbatch_2']) == 1
+
+        counts = CaptionPipeline(platforms=('instagram', 'tiktok')).run()
+        assert counts == {'pending': 0, 'submitted': 0, 'done': 4, 'failed': 0}
+
+        # Stored captions also seed the response cache
+        caption = VideoCaption.query.filter_by(video_id=sample_video.id, platform='tiktok').one()
+        calls = len(server.requests)
+        assert AIService().generate_caption(sample_video.title, sample_video.description, 'tiktok') == caption.caption
+        assert len(server.requests) == calls
+
+
+    def test_falls_back_to_concurrent_calls(self, app, sample_video, anthropic_stub_server):
+        """Test captions are generated directly when Message Batches are unavailable"""
+        from app.services.caption_batch import CaptionPipeline
+
+        anthropic_stub_server.routes[('POST', '/v1/messages')] = lambda params, headers: (200, {
+            'id': 'msg', 'type': 'message', 'role': 'assistant', 'model': params['model'],
+            'content': [{'type': 'text', 'text': 'Send it!'}],
+            'stop_reason': 'end_turn', 'usage': {'input_tokens': 1, 'output_tokens': 1}
+        })
+
+        counts = CaptionPipeline(platforms=('instagram', 'tiktok')).run()
+        assert counts == {'pending': 0, 'submitted': 0, 'done': 2, 'failed': 0}
+        assert sample_video.captions.filter_by(platform='tiktok').one().caption == 'Send it!'
+
+
+class TestSocialMediaService:
+    """Tests for the Ayrshare client against a local fake server"""
+
+    def test_retries_rate_limit_and_server_errors(self, app, ayrshare_stub_server):
+        """Test 429/5xx responses are retried with backoff, and POSTs only on 429"""
+        from app.services.social_service import SocialMediaService
+
+        server = ayrshare_stub_server
+        responses = [(429, {'status': 'error'}), (503, {'status': 'error'}), (200, {'id': 'p1', 'likes': 3})]
+        server.routes[('GET', '/api/analytics/post/p1')] = lambda params, headers: responses.pop(0)
+        server.routes[('POST', '/api/post')] = (502, {'status': 'error'})
+
+        delays = []
+        service = SocialMediaService(sleep=delays.append)
+        assert service.get_analytics('p1') == {'id': 'p1', 'likes': 3}
+        assert len(delays) == 2
+        assert all(0 <= delay <= app.config['AYRSHARE_BACKOFF_MAX_SECONDS'] for delay in delays)
+        assert server.requests[0]['method'] == 'GET'
+
+        with pytest.raises(Exception, match='Social media post error'):
+            service.post('Fresh powder', ['instagram'])
+        assert len([r for r in server.requests if r['method'] == 'POST']) == 1
+
+    def test_fan_out_analytics(self, app, ayrshare_stub_server):
+        """Test analytics for several posts are fetched concurrently, keeping failures per post"""
+        from app.services.social_service import SocialMediaService
+
+        server = ayrshare_stub_server
+        for post_id in ('a', 'b', 'c'):
+            server.routes[('GET', f'/api/analytics/post/{post_id}')] = (200, {'id': post_id})
+        app.config['AYRSHARE_MAX_RETRIES'] = 0
+
+        results = SocialMediaService().get_analytics_many(['a', 'b', 'c', 'missing'])
+        assert [results[post_id] for post_id in ('a', 'b', 'c')] == [{'id': 'a'}, {'id': 'b'}, {'id': 'c'}]
+        assert isinstance(results['missing'], Exception)
+        assert len(server.requests) == 4
+
+
+class TestPostScheduler:
+    """Tests for the scheduled social post queue"""
+
+    def test_posts_due_together_share_one_batch_job(self, app):
+        """Test local times are stored as UTC and posts in one window get one job"""
+        from datetime import datetime
+        from app.services.post_scheduler import build_scheduler, queue_post
+
+        scheduler = build_scheduler(app)
+        scheduler.start(paused=True)
+        first = queue_post('Lift opens', ['instagram'], datetime(2031, 7, 1, 12, 0), scheduler=scheduler)
+        queue_post('Lift opens (TikTok)', ['tiktok'], datetime(2031, 7, 1, 12, 0), scheduler=scheduler)
+        queue_post('Sunset session', ['facebook'], datetime(2031, 7, 1, 18, 0), scheduler=scheduler)
+
+        assert first.scheduled_for == datetime(2031, 7, 1, 9, 0)  # Europe/Sofia is UTC+3 in summer
+        jobs = scheduler.get_jobs()
+        scheduler.shutdown(wait=False)
+        assert len(jobs) == 2
+        assert all(job.func_ref == 'app.services.post_scheduler:run_due_posts' for job in jobs)
+
+    def test_dispatch_publishes_each_post_once(self, app, ayrshare_stub_server):
+        """Test a batch claims due posts, and a second firing publishes nothing again"""
+        from datetime import datetime, timedelta
+        from app import db
+        from app.models.scheduled_post import ScheduledPost
+        from app.services.post_scheduler import PostDispatcher
+
+        server = ayrshare_stub_server
+        server.routes[('POST', '/api/post')] = lambda params, headers: (
+            (500, {'status': 'error'}) if 'fail' in params['post'] else (200, {'status': 'success', 'id': 'ayr-1'})
+        )
+        now = datetime.utcnow()
+        db.session.add_all([
+            ScheduledPost(content='Powder alert', platforms='instagram', scheduled_for=now - timedelta(minutes=1)),
+            ScheduledPost(content='Will fail', platforms='tiktok', scheduled_for=now - timedelta(seconds=5)),
+            ScheduledPost(content='Tomorrow', platforms='facebook', scheduled_for=now + timedelta(days=1)),
+        ])
+        db.session.commit()
+
+        assert PostDispatcher().run() == (1, 1)
+        assert PostDispatcher().run() == (0, 0)
+        assert len([r for r in server.requests if r['method'] == 'POST']) == 2
+
+        statuses = dict(db.session.query(ScheduledPost.content, ScheduledPost.status))
+        assert statuses == {'Powder alert': 'posted', 'Will fail': 'failed', 'Tomorrow': 'pending'}
+        assert ScheduledPost.query.filter_by(content='Powder alert').one().ayrshare_id == 'ayr-1'
+
+    def test_idle_sweep_needs_no_api_key(self, app):
+        """Test a sweep with nothing due returns early, and no scheduler starts without a key"""
+        from app.services.post_scheduler import PostDispatcher, start_scheduler
+
+        app.config['AYRSHARE_API_KEY'] = None
+        assert PostDispatcher().dispatch_once() == (0, 0)
+        assert start_scheduler(app) is None
+
+
+class TestImportProfile:
+    """Tests for the lazy services package and import-time profiling"""
+
+    def test_parse_importtime(self):
+        """Test -X importtime lines are parsed with depth and grouped per package"""
+        from app.utils.import_profile import by_package, parse_importtime, total_us
+
+        entries = parse_importtime(
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |     stripe._util\n'
+            'import time:       300 |        420 |   stripe\n'
+            'import time:        80 |        500 | app.services\n'
+            'Traceback noise\n'
+        )
+        assert [(e['module'], e['depth']) for e in entries] == [('stripe._util', 2), ('stripe', 1), ('app.services', 0)]
+        assert by_package(entries) == [('stripe', 420), ('app', 80)]
+        assert total_us(entries) == 500
+
+    def test_app_import_skips_service_sdks(self):
+        """Test importing the app package does not import the AI, payment or social SDKs"""
+        import os
+        from app.utils.import_profile import profile_imports
+
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        modules = {entry['module'] for entry in profile_imports('import app', cwd=root)}
+        assert 'app.services.mail' in modules
+        assert not modules & {'anthropic', 'stripe', 'app.services.ai_service', 'app.services.social_service'}
+
+        from app.services import AIService
+        from app.services.ai_service import AIService as direct
+        assert AIService is direct
+
+
+class TestAppBoot:
+    """Tests for the create_app boot path"""
+
+    def test_boot_record_and_schema_check(self, app):
+        """Test boot phases are recorded and the schema check compares against the Alembic head"""
+        from app import db
+        from app.utils.schema import schema_status
+
+        boot = app.extensions['boot']
+        assert {'extensions', 'redis', 'socketio', 'blueprints', 'database'} <= set(boot['phases'])
+        assert boot['schema'] == 'create_all' and boot['redis'] is None
+
+        status, detail = schema_status(app, db)
+        assert status == 'behind' and detail.startswith('database at none')
+
+    def test_redis_consumers_share_one_pool(self, monkeypatch):
+        """Test the limiter, SocketIO queue and redis_client use the pool probed once at boot"""
+        import app as app_module
+        from app import create_app
+        from app.utils import redis_pool
+        from config.config import TestingConfig
+
+        probes = []
+        monkeypatch.setattr(redis_pool, 'probe', lambda client: probes.append(client) or (True, 0.1, None))
+        monkeypatch.setattr(TestingConfig, 'REDIS_URL', 'redis://redis.invalid:6379/0')
+        monkeypatch.setattr(TestingConfig, 'RATELIMIT_ENABLED', True)
+        monkeypatch.setattr(app_module, 'redis_pool', None)
+        monkeypatch.setattr(app_module, 'redis_client', None)
+
+        app = create_app('testing')
+        pool = app_module.redis_pool
+        assert len(probes) == 1
+        assert app_module.redis_client.connection_pool is pool
+        assert app_module.socketio.server.manager.redis.connection_pool is pool
+        assert app_module.limiter._storage.storage.connection_pool is pool
+        assert app.extensions['boot']['limiter'] == 'redis'
+
+    def test_socketio_listener_survives_idle_periods(self, redis_stub_server):
+        """Test the SocketIO pubsub listener outlives the command socket timeout"""
+        import threading
+        import redis
+        from app.utils.redis_pool import PooledRedisManager, create_pool, create_pubsub_pool
+
+        config = {'REDIS_SOCKET_TIMEOUT': 0.2}
+        url = redis_stub_server.url
+        command_pool = create_pool(url, config)
+
+        # A listener on the command pool times out while idle
+        idle = redis.Redis(connection_pool=command_pool).pubsub(ignore_subscribe_messages=True)
+        idle.subscribe('flask-socketio')
+        with pytest.raises(redis.exceptions.TimeoutError):
+            next(idle.listen())
+        idle.close()
+
+        manager = PooledRedisManager(url, command_pool, create_pubsub_pool(url, config), channel='flask-socketio')
+        manager._redis_connect()
+        manager.pubsub.subscribe('flask-socketio')
+        messages = manager.pubsub.listen()
+        threading.Timer(0.6, redis_stub_server.publish, ('flask-socketio', b'emit')).start()
+        assert next(messages)['data'] == b'emit'
+        assert manager.redis.connection_pool.connection_kwargs['socket_timeout'] == 0.2
+        manager.pubsub.close()
+
+
+class TestTemplateProfile:
+    """Tests for the template bytecode cache and render benchmark"""
+
+    def test_production_profile_compiles_templates(self, app, tmp_path):
+        """Test the production profile turns off auto-reload and caches compiled templates on disk"""
+        from config.config import ProductionConfig
+        from app.utils.template_cache import compile_templates, configure_templates
+
+        assert app.jinja_env.auto_reload is True and app.jinja_env.bytecode_cache is None
+        assert ProductionConfig.TEMPLATES_AUTO_RELOAD is False and ProductionConfig.SEND_FILE_MAX_AGE_DEFAULT > 0
+
+        app.config.update(TEMPLATES_AUTO_RELOAD=False, JINJA_BYTECODE_CACHE=True, JINJA_BYTECODE_CACHE_DIR=str(tmp_path))
+        assert configure_templates(app) == str(tmp_path)
+        assert app.jinja_env.auto_reload is False
+
+        compiled, errors = compile_templates(app)
+        assert errors == {}
+        assert compiled == len(app.jinja_env.list_templates())
+        assert len(list(tmp_path.iterdir())) == compiled
+
+    def test_benchmark_renders_both_profiles(self, app):
+        """Test the benchmark renders each page's template under both profiles"""
+        from app.utils.template_cache import benchmark_templates
+
+        results = benchmark_templates(app, iterations=2)
+        assert set(results) == {'index.html', 'gallery/index.html'}
+        for profiles in results.values():
+            assert set(profiles) == {'development', 'production'}
+            assert all(timing['cold_ms'] > 0 and timing['warm_ms'] > 0 for timing in profiles.values())
+
+
+class TestAssetPipeline:
+    """Tests for fingerprinted, precompressed static assets"""
+
+    @staticmethod
+    def _static_folder(tmp_path):
+        (tmp_path / 'css').mkdir()
+        (tmp_path / 'js').mkdir()
+        (tmp_path / 'uploads').mkdir()
+        (tmp_path / 'css' / 'style.css').write_text('/* theme */\n.a  .b:hover {\n    color: red;\n    content: "a ; b";\n}\n' * 20)
+        (tmp_path / 'js' / 'one.js').write_text('// helpers\nfunction one() {\n    return 1;\n}\n' * 20)
+        (tmp_path / 'js' / 'two.js').write_text('/**\n * Two\n */\nconst two = one() + 1\n')
+        (tmp_path / 'uploads' / 'clip.mp4').write_bytes(b'video')
+        return tmp_path
+
+    def test_build_fingerprints_bundles_and_compresses(self, tmp_path):
+        """Test the build writes hashed, minified files with .gz/.br siblings and a manifest"""
+        import brotli
+        import gzip
+        import json
+        from app.utils.assets import build_assets, minify_css
+
+        assert minify_css('.a  .b:hover {\n color: red;\n content: "a ; b";\n}') == '.a .b:hover{color:red;content:"a ; b"}\n'
+
+        static = self._static_folder(tmp_path)
+        manifest = build_assets(str(static), bundles={'js/site.js': ['js/one.js', 'js/two.js']})
+        assert json.loads((static / 'build' / 'manifest.json').read_text()) == manifest
+        assert set(manifest['assets']) == {'css/style.css', 'js/one.js', 'js/two.js', 'js/site.js'}
+
+        site = manifest['assets']['js/site.js']
+        assert site.startswith('build/js/site.') and site.endswith('.js')
+        built = (static / site).read_bytes()
+        assert b'helpers' not in built and b'Two' not in built and b'const two = one() + 1' in built
+        assert manifest['encodings'][site] == ['br', 'gzip']
+        assert brotli.decompress((static / (site + '.br')).read_bytes()) == built
+        assert gzip.decompress((static / (site + '.gz')).read_bytes()) == built
+        assert manifest['sizes']['js/site.js']['built'] < manifest['sizes']['js/site.js']['source']
+
+        # Same content, same names: rebuilding is stable
+        assert build_assets(str(static), bundles={'js/site.js': ['js/one.js', 'js/two.js']}) == manifest
+
+    def test_hashed_urls_are_served_immutable_and_precompressed(self, app, client, tmp_path):
+        """Test url_for emits manifest URLs and the static view serves the accepted encoding"""
+        from flask import render_template_string, url_for
+        from app.utils import assets
+
+        static = self._static_folder(tmp_path)
+        manifest = assets.build_assets(str(static), bundles={'js/site.js': ['js/one.js', 'js/two.js']})
+        app.static_folder = str(static)
+
+        with app.test_request_context():
+            assert assets.bundle_urls('js/site.js') == ['/static/js/utils.js', '/static/js/main.js', '/static/js/navbar.js']
+            app.config['ASSETS_USE_MANIFEST'] = True
+            assets.load_manifest(app)
+            style_url = url_for('static', filename='css/style.css')
+            assert style_url == '/static/' + manifest['assets']['css/style.css']
+            assert render_template_string("{{ bundle_urls('js/site.js')|join }}") == '/static/' + manifest['assets']['js/site.js']
+
+        response = client.get(style_url, headers={'Accept-Encoding': 'gzip, br'})
+        assert response.headers['Content-Encoding'] == 'br'
+        assert response.mimetype == 'text/css'
+        assert 'immutable' in response.headers['Cache-Control'] and 'max-age=31536000' in response.headers['Cache-Control']
+
+        response = client.get(style_url, headers={'Accept-Encoding': 'identity'})
+        assert 'Content-Encoding' not in response.headers
+        assert response.data == (static / manifest['assets']['css/style.css']).read_bytes()
+
 
 class TestTestimonialModel:
     """Tests for Testimonial model"""
@@ -42,6 +42,68 @@ class TestMainRoutes:
         response = client.get('/faq')
         assert response.status_code == 200
 
+    def test_health_metrics_requires_admin_or_token(self, app, client, admin_user):
+        """Test /health/metrics is hidden from anonymous clients"""
+        assert client.get('/health/metrics').status_code == 404
+
+        app.config['METRICS_TOKEN'] = 'scrape-secret'
+        assert client.get('/health/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 404
+        response = client.get('/health/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+        assert response.status_code == 200
+        assert 'counters' in response.get_json()
+
+        app.config['METRICS_TOKEN'] = None
+        client.post('/auth/login', data={'email': 'admin@example.com', 'password': 'adminpass123'})
+        assert client.get('/health/metrics').status_code == 200
+
+    def test_compiled_tailwind_replaces_cdn(self, app, tmp_path):
+        """Test pages link site.css instead of the Tailwind CDN runtime once it is built"""
+        from app.utils.assets import detect_stylesheet
+        from app.utils.page_weight import compare_modes
+
+        assert detect_stylesheet(app) is False
+        assert 'https://cdn.tailwindcss.com' in app.test_client().get('/').get_data(as_text=True)  # DEBUG only
+        (tmp_path / 'css').mkdir()
+        (tmp_path / 'css' / 'site.css').write_text('.flex{display:flex}' * 50)
+        app.static_folder = str(tmp_path)
+        assert detect_stylesheet(app) is True
+
+        html = app.test_client().get('/').get_data(as_text=True)
+        assert '/static/css/site.css' in html
+        assert 'cdn.tailwindcss.com' not in html and '/static/css/style.css' not in html
+
+        report = compare_modes(app, ['/'], fetch=False)['/']
+        cdn_urls = [asset['url'] for asset in report['cdn']['assets']]
+        compiled = {asset['url']: asset for asset in report['compiled']['assets']}
+        assert 'https://cdn.tailwindcss.com' in cdn_urls and '/static/css/style.css' in cdn_urls
+        assert compiled['/static/css/site.css']['raw'] == 950 and compiled['/static/css/site.css']['local']
+        assert report['compiled']['requests'] == report['cdn']['requests'] - 1
+        assert app.extensions['tailwind_css'] is True
+
+    def test_missing_site_css_fails_boot_outside_debug(self, monkeypatch):
+        """Test a non-DEBUG app refuses to start without site.css instead of serving unstyled pages"""
+        from app import create_app
+        from config.config import TestingConfig
+
+        monkeypatch.setattr(TestingConfig, 'DEBUG', False)
+        with pytest.raises(RuntimeError, match='site.css is missing'):
+            create_app('testing')
+
+
+class TestNewsletterRoutes:
+    """Tests for newsletter subscription"""
+
+    def test_subscribe_queues_welcome_email(self, client):
+        """Test subscribing writes the welcome email to the outbox"""
+        from app.models.newsletter import Newsletter
+        from app.models.email_outbox import EmailOutbox
+        response = client.post('/newsletter/subscribe', data={'email': 'new@example.com'})
+        assert response.status_code == 302
+        assert Newsletter.query.filter_by(email='new@example.com').count() == 1
+        queued = EmailOutbox.query.one()
+        assert queued.recipient_list == ['new@example.com']
+        assert queued.template == 'newsletter_welcome'
+
 
 class TestAuthRoutes:
     """Tests for authentication routes"""
@@ -107,6 +169,462 @@ class TestAdminRoutes:
         # Should be redirected or forbidden
         assert response.status_code in [200, 302, 403]
 
+    def test_admin_waivers_grouped_by_email(self, client, admin_user):
+        """Test waivers are grouped per email with the latest signature and order"""
+        from datetime import datetime, timedelta
+        from app import db
+        from app.models.waiver import Waiver
+        from app.models.public_booking import PublicBooking
+        from app.models.public_booking_waiver import PublicBookingWaiver
+
+        now = datetime.utcnow()
+        order = PublicBooking(package_key='basic', package_name='Basic', amount_cents=5000)
+        db.session.add(order)
+        waivers = [
+            Waiver(client_name='Rider', client_email=' Rider@Example.com', legal_name_signature='Old Name',
+                   ip_address='127.0.0.1', signed_at=now - timedelta(days=2)),
+            Waiver(client_name='Rider', client_email='rider@example.com', legal_name_signature='New Name',
+                   ip_address='127.0.0.1', signed_at=now),
+            Waiver(client_name='Other', client_email='other@example.com', legal_name_signature='Other Rider',
+                   ip_address='127.0.0.1', signed_at=now - timedelta(days=1)),
+        ]
+        db.session.add_all(waivers)
+        db.session.flush()
+        db.session.add(PublicBookingWaiver(public_booking_id=order.id, waiver_id=waivers[1].id))
+        db.session.commit()
+
+        groups = Waiver.email_groups(page=1, per_page=10)
+        assert groups.total == 2
+        assert [(g['email'], g['count'], g['latest_booking_id']) for g in groups.items] == [
+            ('rider@example.com', 2, order.id),
+            ('other@example.com', 1, None),
+        ]
+        assert [w.legal_name_signature for w, _ in Waiver.for_email('RIDER@example.com')] == ['New Name', 'Old Name']
+
+        client.post('/auth/login', data={'email': 'admin@example.com', 'password': 'adminpass123'})
+        response = client.get('/admin/waivers')
+        assert response.status_code == 200
+        assert b'New Name' in response.data
+        assert f'Order #{order.id}'.encode() in response.data
+
+    def test_admin_social_renders_synced_posts(self, client, admin_user, ayrshare_stub_server):
+        """Test social-sync stores posts and snapshots, and the dashboard reads only local tables"""
+        from datetime import datetime
+        from app.models.social_post import SocialPost, SocialPostMetrics
+        from app.services.social_sync import SocialSync
+
+        server = ayrshare_stub_server
+        created = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.000Z')
+        server.routes[('GET', '/api/history')] = (200, [
+            {'id': 'p1', 'post': 'First powder day', 'platforms': ['instagram', 'facebook'], 'status': 'success',
+             'created': created, 'postIds': [{'platform': 'instagram', 'id': 'ig1', 'postUrl': 'https://instagram.com/p/ig1'}]},
+            {'id': 'p2', 'post': 'Park laps', 'platforms': ['tiktok'], 'status': 'success', 'created': created},
+        ])
+        server.routes[('GET', '/api/analytics/post/p1')] = (200, {
+            'instagram': {'analytics': {'likeCount': 10, 'commentsCount': 2, 'impressionsCount': 300}},
+            'facebook': {'analytics': {'likeCount': 5, 'sharesCount': 1}},
+        })
+        server.routes[('GET', '/api/analytics/post/p2')] = (200, {'tiktok': {'analytics': {'likeCount': 7, 'videoViews': 900}}})
+
+        assert SocialSync(page_size=1).run() == {'fetched': 2, 'inserted': 2, 'pages': 2, 'snapshots': 3}
+        assert SocialSync().run()['inserted'] == 0
+        history_calls = [r for r in server.requests if r['path'] == '/api/history']
+        assert 'lastDays' not in history_calls[0]['params'] and history_calls[1]['params']['lastDays'] == '2'
+
+        post = SocialPost.query.filter_by(ayrshare_id='p1').one()
+        assert (post.likes, post.comments, post.shares, post.impressions) == (15, 2, 1, 300)
+        assert SocialPostMetrics.query.count() == 6
+        assert [point['likes'] for point in SocialPostMetrics.trend()] == [22, 22]
+
+        client.post('/auth/login', data={'email': 'admin@example.com', 'password': 'adminpass123'})
+        calls = len(server.requests)
+        response = client.get('/admin/social')
+        assert response.status_code == 200
+        assert b'First powder day' in response.data
+        assert b'https://instagram.com/p/ig1' in response.data
+        assert len(server.requests) == calls
+
+
+class TestWaiverRoutes:
+    """Tests for waiver link routes"""
+
+    def test_waiver_form_with_signed_token(self, client, sample_booking):
+        """Test waiver form loads from a signed token"""
+        token = sample_booking.generate_waiver_token()
+        response = client.get(f'/waiver/{token}')
+        assert response.status_code == 200
+
+    def test_waiver_form_invalid_token(self, client, sample_booking):
+        """Test invalid waiver tokens redirect home"""
+        response = client.get('/waiver/not-a-real-token')
+        assert response.status_code == 302
+
+
+class TestPaymentRoutes:
+    """Tests for the public Stripe Checkout flow"""
+
+    def test_checkout_goes_through_gateway(self, client, fake_stripe):
+        """Test checkout creates a session via the pooled gateway with an idempotency key"""
+        fake_stripe.routes[('POST', '/v1/checkout/sessions')] = (200, {
+            'id': 'cs_test_1', 'object': 'checkout.session', 'url': 'https://checkout.stripe.com/c/cs_test_1'
+        })
+
+        response = client.get('/payment/checkout/basic')
+        assert response.status_code == 303
+        assert response.headers['Location'] == 'https://checkout.stripe.com/c/cs_test_1'
+
+        client.get('/payment/checkout/basic')
+        first, second = fake_stripe.requests
+        assert first['params']['line_items[0][price_data][unit_amount]'] == '15000'
+        assert first['headers']['Idempotency-Key'].startswith('checkout-basic-')
+        assert first['headers']['Idempotency-Key'] == second['headers']['Idempotency-Key']
+
+    def test_circuit_breaker_fails_fast(self, app, fake_stripe):
+        """Test the breaker opens after repeated upstream failures"""
+        import stripe
+        from app.services.stripe_gateway import get_stripe_gateway, StripeUnavailableError
+
+        fake_stripe.routes[('GET', '/v1/checkout/sessions/cs_test_1')] = (503, {'error': {'message': 'Down'}})
+        gateway = get_stripe_gateway()
+        gateway.breaker.failure_threshold = 2
+
+        for _ in range(2):
+            with pytest.raises(stripe.APIError):
+                gateway.retrieve_checkout_session('cs_test_1')
+        with pytest.raises(StripeUnavailableError):
+            gateway.retrieve_checkout_session('cs_test_1')
+        assert len(fake_stripe.requests) == 2
+
+    def test_webhook_records_booking_and_success_reads_it(self, client, fake_stripe, post_stripe_event):
+        """Test the success page uses the webhook-recorded booking without calling Stripe"""
+        from app.models.public_booking import PublicBooking
+
+        response = post_stripe_event({
+            'id': 'evt_1',
+            'type': 'checkout.session.completed',
+            'data': {'object': {
+                'id': 'cs_test_1', 'object': 'checkout.session', 'payment_status': 'paid',
+                'payment_intent': 'pi_1', 'amount_total': 15000, 'currency': 'eur',
+                'customer_details': {'email': 'rider@example.com', 'name': 'Rider'},
+                'metadata': {'package': 'basic', 'package_name': 'Basic Session'}
+            }}
+        })
+        assert response.status_code == 200
+
+        from app.services.stripe_events import StripeEventProcessor
+        assert StripeEventProcessor().drain_once() == 1
+
+        booking = PublicBooking.query.filter_by(stripe_checkout_session_id='cs_test_1').one()
+        assert booking.amount_cents == 15000
+        assert booking.customer_email == 'rider@example.com'
+
+        response = client.get('/payment/success/basic?session_id=cs_test_1')
+        assert response.status_code == 302
+        assert '/payment/waiver/basic' in response.headers['Location']
+        assert fake_stripe.requests == []
+        assert PublicBooking.query.count() == 1
+
+    def test_success_falls_back_to_stripe_before_webhook(self, client, fake_stripe):
+        """Test the success page retrieves the session when the webhook has not arrived"""
+        from app.models.public_booking import PublicBooking
+
+        fake_stripe.routes[('GET', '/v1/checkout/sessions/cs_test_2')] = (200, {
+            'id': 'cs_test_2', 'object': 'checkout.session', 'payment_status': 'paid',
+            'payment_intent': 'pi_2', 'amount_total': 25000, 'currency': 'eur'
+        })
+
+        response = client.get('/payment/success/pro?session_id=cs_test_2')
+        assert response.status_code == 302
+        assert len(fake_stripe.requests) == 1
+
+        booking = PublicBooking.query.filter_by(stripe_checkout_session_id='cs_test_2').one()
+        assert booking.amount_cents == 25000
+        assert booking.paid_at is not None
+
+    def test_webhook_acks_and_dedupes_events(self, client, post_stripe_event):
+        """Test the webhook only stores events and short-circuits redeliveries"""
+        from app import db
+        from app.models.stripe_event import StripeEvent
+        from app.models.public_booking import PublicBooking
+        from app.services.stripe_events import StripeEventProcessor
+
+        event = {
+            'id': 'evt_dup', 'type': 'checkout.session.completed', 'created': 1700000000,
+            'data': {'object': {
+                'id': 'cs_test_3', 'payment_status': 'paid', 'amount_total': 35000,
+                'metadata': {'package': 'expert'}
+            }}
+        }
+        assert post_stripe_event(event).get_json() == {'status': 'queued'}
+        assert post_stripe_event(event).get_json() == {'status': 'duplicate'}
+        assert StripeEvent.query.count() == 1
+        assert PublicBooking.query.count() == 0
+
+        assert StripeEventProcessor().drain_once() == 1
+        assert db.session.get(StripeEvent, 'evt_dup').status == StripeEvent.STATUS_PROCESSED
+        assert PublicBooking.query.one().amount_cents == 35000
+
+    def test_failed_event_is_retried(self, app, post_stripe_event, monkeypatch):
+        """Test a failing event is rescheduled with backoff, then dead-lettered"""
+        from datetime import datetime
+        from app import db
+        from app.models.stripe_event import StripeEvent
+        from app.services import stripe_events
+
+        def boom(obj):
+            raise RuntimeError('database unavailable')
+        monkeypatch.setitem(stripe_events.HANDLERS, 'checkout.session.completed', boom)
+        app.config['STRIPE_EVENTS_MAX_ATTEMPTS'] = 2
+
+        post_stripe_event({'id': 'evt_fail', 'type': 'checkout.session.completed', 'data': {'object': {'id': 'cs_x'}}})
+        processor = stripe_events.StripeEventProcessor()
+        assert processor.drain_once() == 0
+
+        event = db.session.get(StripeEvent, 'evt_fail')
+        assert event.status == StripeEvent.STATUS_PENDING
+        assert event.next_attempt_at > datetime.utcnow()
+
+        event.next_attempt_at = datetime.utcnow()
+        db.session.commit()
+        processor.drain_once()
+        assert db.session.get(StripeEvent, 'evt_fail').status == StripeEvent.STATUS_DEAD
+
+    def test_later_event_waits_for_earlier_failed_event(self, app, post_stripe_event, monkeypatch):
+        """Test a later event for an object is not claimed until its earlier failed event is applied"""
+        from datetime import datetime
+        from app import db
+        from app.models.stripe_event import StripeEvent
+        from app.services import stripe_events
+
+        applied = []
+        failing = {'evt_first'}
+
+        def handler(obj):
+            if obj['event'] in failing:
+                raise RuntimeError('database unavailable')
+            applied.append(obj['event'])
+        monkeypatch.setitem(stripe_events.HANDLERS, 'checkout.session.completed', handler)
+        monkeypatch.setitem(stripe_events.HANDLERS, 'checkout.session.expired', handler)
+
+        post_stripe_event({'id': 'evt_first', 'type': 'checkout.session.completed', 'created': 100,
+                           'data': {'object': {'id': 'cs_ord', 'event': 'evt_first'}}})
+        post_stripe_event({'id': 'evt_second', 'type': 'checkout.session.expired', 'created': 200,
+                           'data': {'object': {'id': 'cs_ord', 'event': 'evt_second'}}})
+        post_stripe_event({'id': 'evt_other', 'type': 'checkout.session.completed', 'created': 150,
+                           'data': {'object': {'id': 'cs_other', 'event': 'evt_other'}}})
+
+        processor = stripe_events.StripeEventProcessor()
+        processor.drain_once()
+        assert applied == ['evt_other']
+
+        # The failed event is backing off; the next batch must not run evt_second ahead of it
+        processor.drain_once()
+        assert applied == ['evt_other']
+        assert db.session.get(StripeEvent, 'evt_second').status == StripeEvent.STATUS_PENDING
+
+        failing.clear()
+        db.session.get(StripeEvent, 'evt_first').next_attempt_at = datetime.utcnow()
+        db.session.commit()
+        processor.drain_once()
+        processor.drain_once()
+        assert applied == ['evt_other', 'evt_first', 'evt_second']
+
+    def test_reconcile_backfills_bookings(self, app, stripe_mock_server):
+        """Test reconcile pages through sessions over HTTP and upserts missing/stale bookings"""
+        from app import db
+        from app.models.public_booking import PublicBooking
+        from app.models.sync_state import SyncState
+        from app.services.stripe_reconcile import StripeReconciler, HIGH_WATER_MARK_KEY
+
+        def session(n, **extra):
+            return dict({
+                'id': f'cs_rec_{n}', 'object': 'checkout.session', 'payment_status': 'paid',
+                'payment_intent': f'pi_rec_{n}', 'amount_total': 15000, 'currency': 'eur',
+                'metadata': {'package': 'basic'}
+            }, **extra)
+
+        sessions = [session(1), session(2), session(3, payment_status='unpaid'), session(4)]
+
+        def list_sessions(params, headers):
+            start = 0
+            if 'starting_after' in params:
+                start = [s['id'] for s in sessions].index(params['starting_after']) + 1
+            page = sessions[start:start + int(params['limit'])]
+            return 200, {'object': 'list', 'url': '/v1/checkout/sessions', 'data': page,
+                         'has_more': start + len(page) < len(sessions)}
+        stripe_mock_server.routes[('GET', '/v1/checkout/sessions')] = list_sessions
+
+        # cs_rec_2 only has an unverified placeholder from the success page
+        db.session.add(PublicBooking(package_key='basic', package_name='Basic Session',
+                                     stripe_checkout_session_id='cs_rec_2', status='paid'))
+        db.session.commit()
+
+        result = StripeReconciler(page_size=2).run()
+        assert result == {'pages': 2, 'scanned': 4, 'inserted': 2, 'updated': 1}
+        assert [r['params'].get('starting_after') for r in stripe_mock_server.requests] == [None, 'cs_rec_2']
+        assert 'created[gte]' not in stripe_mock_server.requests[0]['params']
+
+        bookings = {b.stripe_checkout_session_id: b for b in PublicBooking.query.all()}
+        assert sorted(bookings) == ['cs_rec_1', 'cs_rec_2', 'cs_rec_4']
+        assert bookings['cs_rec_2'].amount_cents == 15000
+        assert bookings['cs_rec_2'].paid_at is not None
+
+        # Second run is incremental and finds nothing new
+        high_water_mark = int(SyncState.get_value(HIGH_WATER_MARK_KEY))
+        result = StripeReconciler(page_size=2).run()
+        assert result['inserted'] == result['updated'] == 0
+        assert stripe_mock_server.requests[2]['params']['created[gte]'] == str(
+            high_water_mark - app.config['STRIPE_RECONCILE_OVERLAP_SECONDS']
+        )
+
+    def test_reconcile_merges_concurrent_inserts(self, app, stripe_mock_server, monkeypatch):
+        """Test a booking written by the webhook mid-page is merged, not an IntegrityError"""
+        from app import db
+        from app.models.public_booking import PublicBooking
+        from app.models.sync_state import SyncState
+        from app.services import stripe_reconcile
+
+        stripe_mock_server.routes[('GET', '/v1/checkout/sessions')] = (200, {
+            'object': 'list', 'url': '/v1/checkout/sessions', 'has_more': False, 'data': [{
+                'id': 'cs_race', 'object': 'checkout.session', 'payment_status': 'paid',
+                'payment_intent': 'pi_race', 'amount_total': 15000, 'currency': 'eur',
+                'metadata': {'package': 'basic'}
+            }]
+        })
+        insert = stripe_reconcile.StripeReconciler._insert
+
+        def webhook_wins(session_id, cs, package):
+            # The webhook records the session after the page's IN query
+            db.session.execute(PublicBooking.__table__.insert().values(
+                package_key='basic', package_name='Basic Session', stripe_checkout_session_id=session_id,
+                status='paid', currency='eur'
+            ))
+            return insert(session_id, cs, package)
+        monkeypatch.setattr(stripe_reconcile.StripeReconciler, '_insert', staticmethod(webhook_wins))
+
+        result = stripe_reconcile.StripeReconciler().run()
+        assert (result['inserted'], result['updated']) == (0, 1)
+        booking = PublicBooking.query.one()
+        assert booking.stripe_payment_intent_id == 'pi_race' and booking.amount_cents == 15000
+        assert SyncState.get_value(stripe_reconcile.HIGH_WATER_MARK_KEY) is not None
+
+
+class TestChatNamespace:
+    """Tests for the /chat SocketIO namespace"""
+
+    @pytest.fixture
+    def fake_stream(self, app):
+        """Fake Anthropic client whose stream yields the canned chunks"""
+        from contextlib import contextmanager
+        from types import SimpleNamespace
+        from app.services.ai_service import _clients
+
+        calls = []
+        usage = SimpleNamespace(input_tokens=20, cache_read_input_tokens=60, cache_creation_input_tokens=0)
+
+        @contextmanager
+        def stream(**params):
+            calls.append(params)
+            yield SimpleNamespace(text_stream=iter(['Hi', ' there', '!']),
+                                  get_final_message=lambda: SimpleNamespace(usage=usage))
+
+        def create(**params):
+            calls.append(params)
+            return SimpleNamespace(content=[SimpleNamespace(type='text', text='Asked about Pro pricing.')])
+
+        app.config['ANTHROPIC_API_KEY'] = 'sk-ant-test'
+        _clients['sk-ant-test'] = SimpleNamespace(messages=SimpleNamespace(stream=stream, create=create),
+                                                  close=lambda: None)
+        return calls
+
+    @pytest.fixture
+    def chat_client(self, app, monkeypatch):
+        """SocketIO test client on /chat with the namespace's emits recorded"""
+        from app import socketio
+        from app.routes import chat
+
+        emitted = []
+        monkeypatch.setattr(chat, 'emit', lambda event, data: emitted.append((event, data)))
+        client = socketio.test_client(app, namespace='/chat')
+        client.emitted = emitted
+        yield client
+        client.disconnect(namespace='/chat')
+
+    def test_streams_chunks_and_keeps_history(self, app, fake_stream, chat_client):
+        """Test replies stream chunk by chunk and history stays on the server"""
+        from app.utils import metrics
+
+        chat_client.emit('message', {'message': 'Hello'}, namespace='/chat')
+        assert chat_client.emitted == [
+            ('chunk', {'text': 'Hi'}), ('chunk', {'text': ' there'}), ('chunk', {'text': '!'}), ('done', {})
+        ]
+        assert metrics.snapshot()['timings']['chat.ttft']['count'] >= 1
+
+        chat_client.emit('message', {'message': 'Prices?'}, namespace='/chat')
+        assert fake_stream[1]['messages'] == [
+            {'role': 'user', 'content': 'Hello'},
+            {'role': 'assistant', 'content': 'Hi there!'},
+            {'role': 'user', 'content': 'Prices?'}
+        ]
+        instructions, knowledge = fake_stream[1]['system']
+        assert 'Pro Session' in knowledge['text']
+        # One breakpoint after both static blocks
+        assert 'cache_control' not in instructions
+        assert knowledge['cache_control'] == {'type': 'ephemeral'}
+        assert metrics.snapshot()['gauges']['ai.chat.cache_hit_rate'] == 0.75
+
+        chat_client.emit('message', {'message': 'Thanks'}, namespace='/chat')
+        # Within the token budget nothing is dropped
+        assert [m['content'] for m in fake_stream[2]['messages']] == [
+            'Hello', 'Hi there!', 'Prices?', 'Hi there!', 'Thanks'
+        ]
+
+    def test_rolls_old_turns_into_summary(self, app, fake_stream, chat_client):
+        """Test history over the token budget is summarized once and sent as a system block"""
+        app.config['CHAT_HISTORY_TOKEN_BUDGET'] = 20
+
+        chat_client.emit('message', {'message': 'How much is the Pro package for two riders?'}, namespace='/chat')
+        chat_client.emit('message', {'message': 'And can you film at the terrain park on Saturday?'}, namespace='/chat')
+        chat_client.emit('message', {'message': 'Great'}, namespace='/chat')
+
+        stream_calls = [call for call in fake_stream if 'system' in call]
+        summary_calls = [call for call in fake_stream if 'system' not in call]
+        assert len(summary_calls) == 1
+        assert 'Pro package' in summary_calls[0]['messages'][0]['content']
+        assert stream_calls[-1]['system'][-1]['text'].endswith('Asked about Pro pricing.')
+        assert 'cache_control' not in stream_calls[-1]['system'][-1]
+        assert stream_calls[-1]['messages'][0]['role'] == 'user'
+
+    def test_rejects_when_streams_are_saturated(self, app, fake_stream, chat_client):
+        """Test a worker at its stream limit tells the client to retry"""
+        from app.services.chat_service import stream_slots
+
+        app.config['CHAT_MAX_CONCURRENT_STREAMS'] = 1
+        assert stream_slots.try_acquire(1)
+        try:
+            chat_client.emit('message', {'message': 'Hello'}, namespace='/chat')
+        finally:
+            stream_slots.release()
+        assert [event for event, _ in chat_client.emitted] == ['chat_error']
+        assert fake_stream == []
+
+    def test_rejects_messages_over_budget(self, app, fake_stream, chat_client):
+        """Test a connection past its message budget gets no more AI calls"""
+        app.config['CHAT_MESSAGES_PER_CONNECTION'] = 2
+
+        for message in ('One', 'Two', 'Three'):
+            chat_client.emit('message', {'message': message}, namespace='/chat')
+        assert len(fake_stream) == 2
+        assert chat_client.emitted[-1][0] == 'chat_error'
+
+    def test_refuses_connections_when_disabled(self, app):
+        """Test the namespace honours CHAT_ENABLED"""
+        from app import socketio
+
+        app.config['CHAT_ENABLED'] = False
+        client = socketio.test_client(app, namespace='/chat')
+        assert not client.is_connected(namespace='/chat')
+
 
 class TestVideoRoutes:
     """Tests for video-related routes"""
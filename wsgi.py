@@ -55,10 +55,11 @@ logger.info(f"Environment: {os.getenv('FLASK_ENV', 'development')}")
 logger.info(f"Port: {os.getenv('PORT', '5000')}")
 
 try:
-    from app import create_app, socketio
+    from app import create_app, socketio, start_background_tasks
     
     # Create the Flask application
     app = create_app()
+    start_background_tasks(app)
     logger.info("Application created successfully!")
     
 except Exception as e: